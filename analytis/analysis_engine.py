@@ -11,6 +11,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
+from functools import cached_property
 import logging
 from datetime import datetime
 
@@ -18,12 +19,12 @@ from .engines import IndicatorEngine, ScoringEngine, SignalEngine
 from .engines.indicator_engine import IndicatorConfig
 from .engines.scoring_engine import ScoringConfig, SignalAction, SignalStrength
 from .engines.signal_engine import TradingSignal
-from .data.loader import load_stock_data
+from .data.loader import load_stock_data, load_stock_data_many
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisConfig:
     """Complete analysis configuration"""
     # Indicator configuration
@@ -72,6 +73,24 @@ class AnalysisResult:
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
+    
+    @cached_property
+    def signals_df(self) -> pd.DataFrame:
+        """
+        Signals as a columnar DataFrame, built once on first access.
+        
+        Columns: timestamp, action, strength, score, description, with
+        action/strength as their string values so filters can be
+        vectorized instead of looping over TradingSignal objects.
+        """
+        signals = self.signals
+        return pd.DataFrame({
+            'timestamp': [s.timestamp for s in signals],
+            'action': pd.Categorical([s.action.value for s in signals]),
+            'strength': pd.Categorical([s.strength.value for s in signals]),
+            'score': np.fromiter((s.score for s in signals), dtype=float, count=len(signals)),
+            'description': [s.description for s in signals],
+        })
 
 
 class AnalysisEngine:
@@ -115,6 +134,28 @@ class AnalysisEngine:
                 end_date=end_date or self.config.end_date
             )
             
+            return self.analyze_frame(df, symbol)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol}: {e}")
+            return self._create_empty_result(symbol, error=str(e))
+    
+    def analyze_frame(self, df: pd.DataFrame, symbol: str) -> AnalysisResult:
+        """
+        Perform complete analysis on already-loaded OHLCV data.
+        
+        Lets callers load price history once and analyze it under several
+        configurations without hitting the database again. The frame is
+        not modified.
+        
+        Args:
+            df: DataFrame with columns ['Open', 'High', 'Low', 'Close', 'Volume']
+            symbol: Stock symbol the data belongs to
+            
+        Returns:
+            AnalysisResult object with complete analysis
+        """
+        try:
             if df.empty:
                 logger.warning(f"No data found for {symbol}")
                 return self._create_empty_result(symbol)
@@ -196,6 +237,36 @@ class AnalysisEngine:
         
         return results
     
+    def analyze_many(self,
+                     symbols: List[str],
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Dict[str, AnalysisResult]:
+        """
+        Perform analysis for multiple symbols using a single data query.
+        
+        Unlike analyze_multiple_symbols, price history for all symbols is
+        loaded in one round trip and then analyzed in memory.
+        
+        Args:
+            symbols: List of stock symbols to analyze
+            start_date: Start date for analysis (YYYY-MM-DD)
+            end_date: End date for analysis (YYYY-MM-DD)
+            
+        Returns:
+            Dictionary mapping symbol to AnalysisResult
+        """
+        try:
+            frames = load_stock_data_many(
+                symbols,
+                start_date=start_date or self.config.start_date,
+                end_date=end_date or self.config.end_date
+            )
+        except Exception as e:
+            logger.error(f"Error loading data for {len(symbols)} symbols: {e}")
+            return {symbol: self._create_empty_result(symbol, error=str(e)) for symbol in symbols}
+        
+        return {symbol: self.analyze_frame(frames[symbol.upper()], symbol) for symbol in symbols}
+    
     def get_analysis_summary(self, results: List[AnalysisResult]) -> Dict[str, Any]:
         """
         Get a summary of analysis results across multiple symbols.
@@ -9,10 +9,11 @@ from __future__ import annotations
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+import dataclasses
 from dataclasses import dataclass
 import logging
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 from .engines import IndicatorEngine, ScoringEngine, SignalEngine
 from .engines.indicator_engine import IndicatorConfig
@@ -110,6 +111,24 @@ class DatabaseIntegratedAnalysisEngine:
         self.scoring_engine = None
         self.signal_engine = None
     
+    async def warmup(self, connections: int = 4) -> int:
+        """
+        Pre-open pooled database connections before the first queries.
+        
+        Args:
+            connections: Expected number of concurrent queries
+            
+        Returns:
+            Number of connections opened
+        """
+        try:
+            from database.api.database import get_database_manager
+            return await get_database_manager().warmup_async(connections)
+        except Exception as e:
+            # Not fatal: connections are then opened on first use
+            logger.warning(f"Connection pool warmup failed: {e}")
+            return 0
+    
     async def analyze_symbol(self, 
                            symbol: str,
                            start_date: Optional[str] = None,
@@ -127,138 +146,95 @@ class DatabaseIntegratedAnalysisEngine:
         Returns:
             AnalysisResult object with complete analysis and database references
         """
+        result = await self.analyze_symbol_no_commit(symbol, start_date, end_date, config)
+        
+        try:
+            await self.bulk_persist([result])
+        except Exception as e:
+            logger.error(f"Error in database-integrated analysis for {symbol}: {e}")
+            return self._create_empty_result(symbol, result.config, error=str(e))
+        
+        # bulk_persist records a result it failed to store instead of raising
+        error = result.metadata.get('error')
+        if error:
+            return self._create_empty_result(symbol, result.config, error=error)
+        
+        return result
+    
+    async def analyze_symbol_no_commit(self,
+                                       symbol: str,
+                                       start_date: Optional[str] = None,
+                                       end_date: Optional[str] = None,
+                                       config: Optional[AnalysisConfig] = None) -> AnalysisResult:
+        """
+        Analyze a single symbol without writing anything to the database.
+        
+        Pass the results to bulk_persist() to store a whole batch in one
+        transaction.
+        
+        Args:
+            symbol: Stock symbol to analyze
+            start_date: Start date for analysis (YYYY-MM-DD)
+            end_date: End date for analysis (YYYY-MM-DD)
+            config: Analysis configuration
+            
+        Returns:
+            AnalysisResult object without database references
+        """
         logger.info(f"Starting database-integrated analysis for {symbol}")
         
+        # Use default config if not provided
+        if config is None:
+            config = AnalysisConfig()
+        
         try:
-            # Use default config if not provided
-            if config is None:
-                config = AnalysisConfig()
+            # Load data
+            from analytis.data.loader import load_ohlcv_daily
+            df = await load_ohlcv_daily(
+                symbol=symbol,
+                start=pd.to_datetime(start_date or config.start_date),
+                end=pd.to_datetime(end_date or config.end_date)
+            )
             
-            # Initialize repositories with session
-            from database.api.database import get_async_session
-            async with get_async_session() as session:
-                self.config_repo = ConfigRepository(session)
-                self.indicator_repo = IndicatorRepository(session)
-                self.analysis_repo = AnalysisRepository(session)
-                self.signal_repo = SignalRepository(session)
-                
-                # Get or create configurations in database
-                indicator_config_id = await self._get_or_create_indicator_config(config)
-                scoring_config_id = await self._get_or_create_scoring_config(config.scoring)
-                analysis_config_id = await self._get_or_create_analysis_config(config)
-                
-                # Load data
-                from analytis.data.loader import load_ohlcv_daily
-                import pandas as pd
-                df = await load_ohlcv_daily(
-                    symbol=symbol,
-                    start=pd.to_datetime(start_date or config.start_date),
-                    end=pd.to_datetime(end_date or config.end_date)
-                )
-                
-                if df.empty:
-                    logger.warning(f"No data found for {symbol}")
-                    return self._create_empty_result(symbol, config)
-                
-                # Initialize engines with configs
-                self.indicator_engine = IndicatorEngine(config)
-                self.scoring_engine = ScoringEngine(config.scoring)
-                self.signal_engine = SignalEngine(self.indicator_engine, self.scoring_engine)
-                
-                # Validate data
-                if not self.indicator_engine.validate_data(df):
-                    logger.error(f"Invalid data for {symbol}")
-                    return self._create_empty_result(symbol, config)
-                
-                # Calculate indicators
-                start_time = datetime.now()
-                df_with_indicators = self.indicator_engine.calculate_all_indicators(df)
-                calculation_duration = (datetime.now() - start_time).total_seconds() * 1000
-                
-                # Save indicator calculation to database
-                indicator_calculation_id = await self.indicator_repo.save_indicator_calculation(
-                    symbol=symbol,
-                    calculation_date=date.today(),
-                    config_id=indicator_config_id,
-                    indicators=self.indicator_engine.get_indicator_summary(df_with_indicators),
-                    data_points=len(df_with_indicators),
-                    start_date=df.index[0].date() if len(df) > 0 else date.today(),
-                    end_date=df.index[-1].date() if len(df) > 0 else date.today(),
-                    calculation_duration_ms=int(calculation_duration)
-                )
-                
-                # Generate signals
-                start_time = datetime.now()
-                signals = self.signal_engine.generate_signals(
-                    df_with_indicators, 
-                    symbol, 
-                    config.min_score_threshold
-                )
-                analysis_duration = (datetime.now() - start_time).total_seconds() * 1000
-                
-                # Get latest indicator values
-                latest_indicators = self.indicator_engine.get_indicator_summary(df_with_indicators)
-                
-                # Get signal summary
-                signal_summary = self.signal_engine.get_signal_summary(signals)
-                
-                # Save analysis result to database
-                analysis_result_id = await self.analysis_repo.save_analysis_result(
-                    symbol=symbol,
-                    analysis_date=date.today(),
-                    indicator_calculation_id=indicator_calculation_id,
-                    indicator_config_id=indicator_config_id,
-                    scoring_config_id=scoring_config_id,
-                    analysis_config_id=analysis_config_id,
-                    total_signals=len(signals),
-                    buy_signals=sum(1 for s in signals if s.action == SignalAction.BUY),
-                    sell_signals=sum(1 for s in signals if s.action == SignalAction.SELL),
-                    hold_signals=sum(1 for s in signals if s.action == SignalAction.HOLD),
-                    avg_score=np.mean([s.score for s in signals]) if signals else 0.0,
-                    max_score=max([s.score for s in signals]) if signals else 0.0,
-                    min_score=min([s.score for s in signals]) if signals else 0.0,
-                    analysis_duration_ms=int(analysis_duration),
-                    data_info={
-                        'total_rows': len(df),
-                        'start_date': df.index[0].isoformat() if len(df) > 0 else None,
-                        'end_date': df.index[-1].isoformat() if len(df) > 0 else None,
-                        'data_source': 'database',
-                        'columns': list(df.columns)
-                    },
-                    summary=signal_summary
-                )
-                
-                # Save signals to database
-                if signals:
-                    signal_data = []
-                    for signal in signals:
-                        signal_data.append({
-                            'analysis_result_id': analysis_result_id,
-                            'symbol': signal.symbol,
-                            'signal_date': signal.timestamp.date(),
-                            'signal_time': signal.timestamp,
-                            'action': signal.action.value,
-                            'strength': signal.strength.value,
-                            'score': signal.score,
-                            'description': signal.description,
-                            'triggered_rules': signal.triggered_rules,
-                            'context': signal.context,
-                            'indicators_at_signal': signal.indicators,
-                            'metadata': signal.metadata
-                        })
-                    
-                    await self.signal_repo.save_signals_batch(signal_data)
+            if df.empty:
+                logger.warning(f"No data found for {symbol}")
+                return self._create_empty_result(symbol, config)
+            
+            # Initialize engines with configs
+            self.indicator_engine = IndicatorEngine(config.indicator_config)
+            self.scoring_engine = ScoringEngine(config.scoring_config)
+            self.signal_engine = SignalEngine(self.indicator_engine, self.scoring_engine)
+            
+            # Validate data
+            if not self.indicator_engine.validate_data(df):
+                logger.error(f"Invalid data for {symbol}")
+                return self._create_empty_result(symbol, config)
+            
+            # Calculate indicators
+            start_time = datetime.now()
+            df_with_indicators = self.indicator_engine.calculate_all_indicators(df)
+            calculation_duration = (datetime.now() - start_time).total_seconds() * 1000
+            
+            # Generate signals
+            start_time = datetime.now()
+            signals = self.signal_engine.generate_signals(
+                df_with_indicators, 
+                symbol, 
+                config.min_score_threshold
+            )
+            analysis_duration = (datetime.now() - start_time).total_seconds() * 1000
+            
+            # Get latest indicator values
+            latest_indicators = self.indicator_engine.get_indicator_summary(df_with_indicators)
+            
+            # Get signal summary
+            signal_summary = self.signal_engine.get_signal_summary(signals)
             
             # Create result
             result = AnalysisResult(
                 symbol=symbol,
                 analysis_date=datetime.now(),
                 config=config,
-                indicator_calculation_id=indicator_calculation_id,
-                indicator_config_id=indicator_config_id,
-                scoring_config_id=scoring_config_id,
-                analysis_config_id=analysis_config_id,
-                analysis_result_id=analysis_result_id,
                 data_info={
                     'total_rows': len(df),
                     'start_date': df.index[0].isoformat() if len(df) > 0 else None,
@@ -271,6 +247,8 @@ class DatabaseIntegratedAnalysisEngine:
                 signal_summary=signal_summary,
                 metadata={
                     'analysis_duration_seconds': analysis_duration / 1000,
+                    'calculation_duration_ms': int(calculation_duration),
+                    'analysis_duration_ms': int(analysis_duration),
                     'config_hash': self._get_config_hash(config),
                     'engine_version': '2.0.0-db'
                 }
@@ -283,6 +261,123 @@ class DatabaseIntegratedAnalysisEngine:
             logger.error(f"Error in database-integrated analysis for {symbol}: {e}")
             return self._create_empty_result(symbol, config, error=str(e))
     
+    async def bulk_persist(self, results: List[AnalysisResult]) -> None:
+        """
+        Store analysis results and their signals in a single transaction.
+        
+        Results without data (empty or failed analyses) are skipped. Each
+        result is stored under its own savepoint: a result that fails to store
+        is rolled back alone and the error is recorded in its
+        metadata['error']. Database references are filled in on each stored
+        result.
+        
+        Args:
+            results: Results from analyze_symbol_no_commit()
+        """
+        results = [r for r in results if r.data_info.get('total_rows')]
+        if not results:
+            return
+        
+        from database.api.database import get_async_session
+        async with get_async_session() as session:
+            self.config_repo = ConfigRepository(session)
+            self.indicator_repo = IndicatorRepository(session)
+            self.analysis_repo = AnalysisRepository(session)
+            self.signal_repo = SignalRepository(session)
+            
+            # Resolve configuration IDs once per distinct config
+            config_ids = {}
+            
+            for result in results:
+                config = result.config
+                if id(config) not in config_ids:
+                    config_ids[id(config)] = (
+                        await self._get_or_create_indicator_config(config.indicator_config),
+                        await self._get_or_create_scoring_config(config.scoring_config),
+                        await self._get_or_create_analysis_config(config)
+                    )
+                indicator_config_id, scoring_config_id, analysis_config_id = config_ids[id(config)]
+                
+                try:
+                    async with session.begin_nested():
+                        analysis_result_id, indicator_calculation_id = await self._persist_result(
+                            result, indicator_config_id, scoring_config_id, analysis_config_id
+                        )
+                except Exception as e:
+                    logger.error(f"Error storing analysis for {result.symbol}: {e}")
+                    result.metadata['error'] = str(e)
+                    continue
+                
+                result.indicator_calculation_id = indicator_calculation_id
+                result.indicator_config_id = indicator_config_id
+                result.scoring_config_id = scoring_config_id
+                result.analysis_config_id = analysis_config_id
+                result.analysis_result_id = analysis_result_id
+            
+            await session.commit()
+    
+    async def _persist_result(self, result: AnalysisResult, indicator_config_id: int,
+                              scoring_config_id: int, analysis_config_id: int) -> Tuple[int, int]:
+        """Store one result's indicator calculation, analysis row and signals without committing"""
+        signals = result.signals
+        scores = [s.score for s in signals]
+        
+        # Save indicator calculation to database
+        indicator_calculation_id = await self.indicator_repo.save_indicator_calculation(
+            symbol=result.symbol,
+            calculation_date=date.today(),
+            config_id=indicator_config_id,
+            indicators=result.indicators,
+            data_points=result.data_info['total_rows'],
+            start_date=date.fromisoformat(result.data_info['start_date'][:10]),
+            end_date=date.fromisoformat(result.data_info['end_date'][:10]),
+            calculation_duration_ms=result.metadata['calculation_duration_ms'],
+            commit=False
+        )
+        
+        # Save analysis result to database
+        analysis_result_id = await self.analysis_repo.save_analysis_result(
+            symbol=result.symbol,
+            analysis_date=date.today(),
+            indicator_calculation_id=indicator_calculation_id,
+            indicator_config_id=indicator_config_id,
+            scoring_config_id=scoring_config_id,
+            analysis_config_id=analysis_config_id,
+            total_signals=len(signals),
+            buy_signals=sum(1 for s in signals if s.action == SignalAction.BUY),
+            sell_signals=sum(1 for s in signals if s.action == SignalAction.SELL),
+            hold_signals=sum(1 for s in signals if s.action == SignalAction.HOLD),
+            avg_score=np.mean(scores) if scores else 0.0,
+            max_score=max(scores) if scores else 0.0,
+            min_score=min(scores) if scores else 0.0,
+            analysis_duration_ms=result.metadata['analysis_duration_ms'],
+            data_info=result.data_info,
+            summary=result.signal_summary,
+            commit=False
+        )
+        
+        # Save the result's signals in one insert
+        if signals:
+            await self.signal_repo.save_signals_batch([
+                {
+                    'analysis_result_id': analysis_result_id,
+                    'symbol': signal.symbol,
+                    'signal_date': signal.timestamp.date(),
+                    'signal_time': signal.timestamp,
+                    'action': signal.action.value,
+                    'strength': signal.strength.value,
+                    'score': signal.score,
+                    'description': signal.description,
+                    'triggered_rules': signal.triggered_rules,
+                    'context': signal.context,
+                    'indicators_at_signal': signal.indicators,
+                    'metadata': signal.metadata
+                }
+                for signal in signals
+            ], commit=False)
+        
+        return analysis_result_id, indicator_calculation_id
+    
     async def _get_or_create_indicator_config(self, config: IndicatorConfig) -> int:
         """Get or create indicator configuration in database"""
         try:
@@ -398,7 +493,10 @@ class DatabaseIntegratedAnalysisEngine:
     def _configs_match(self, config_obj: Any, config_dict: Dict[str, Any]) -> bool:
         """Check if configuration object matches dictionary"""
         try:
-            if hasattr(config_obj, '__dict__'):
+            if dataclasses.is_dataclass(config_obj):
+                # Config dataclasses use slots, so there is no __dict__ to read
+                obj_dict = {f.name: getattr(config_obj, f.name) for f in dataclasses.fields(config_obj)}
+            elif hasattr(config_obj, '__dict__'):
                 obj_dict = config_obj.__dict__
             else:
                 obj_dict = self._indicator_config_to_dict(config_obj) if isinstance(config_obj, IndicatorConfig) else {}
@@ -443,8 +541,8 @@ class DatabaseIntegratedAnalysisEngine:
         try:
             from database.api.database import get_async_session
             async with get_async_session() as session:
-                self.analysis_repo = AnalysisRepository(session)
-                analyses = await self.analysis_repo.get_analyses_by_date_range(
+                analysis_repo = AnalysisRepository(session)
+                analyses = await analysis_repo.get_analyses_by_date_range(
                     symbol=symbol,
                     start_date=date.today() - pd.Timedelta(days=365),
                     end_date=date.today()
@@ -459,32 +557,113 @@ class DatabaseIntegratedAnalysisEngine:
         try:
             from database.api.database import get_async_session
             async with get_async_session() as session:
-                self.signal_repo = SignalRepository(session)
-                signals = await self.signal_repo.get_signals_by_symbol(symbol)
+                signal_repo = SignalRepository(session)
+                signals = await signal_repo.get_signals_by_symbol(symbol)
                 return signals[:limit]
         except Exception as e:
             logger.error(f"Error getting signal history for {symbol}: {e}")
             return []
-    
+
+    async def get_signals_by_action(self, action: str, strength: Optional[str] = None,
+                                    limit: int = 10,
+                                    description_max: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the latest signals for an action; description_max truncates descriptions in SQL"""
+        try:
+            from database.api.database import get_async_session
+            async with get_async_session() as session:
+                signal_repo = SignalRepository(session)
+                return await signal_repo.get_recent_signals(
+                    limit=limit, action=action, strength=strength,
+                    description_max=description_max
+                )
+        except Exception as e:
+            logger.error(f"Error getting {action} signals: {e}")
+            return []
+
+    async def get_recent_signals(self, days: int = 30, limit: int = 100,
+                                 description_max: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get signals from the last `days` days; full descriptions unless description_max is set"""
+        try:
+            from database.api.database import get_async_session
+            async with get_async_session() as session:
+                signal_repo = SignalRepository(session)
+                return await signal_repo.get_recent_signals(
+                    limit=limit, start_date=date.today() - timedelta(days=days),
+                    description_max=description_max
+                )
+        except Exception as e:
+            logger.error(f"Error getting recent signals: {e}")
+            return []
+
+    async def get_recent_analyses(self, days: int = 30, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the latest analyses from the last `days` days across all symbols"""
+        try:
+            from database.api.database import get_async_session
+            async with get_async_session() as session:
+                analysis_repo = AnalysisRepository(session)
+                return await analysis_repo.get_recent_analyses(
+                    limit=limit, start_date=date.today() - timedelta(days=days)
+                )
+        except Exception as e:
+            logger.error(f"Error getting recent analyses: {e}")
+            return []
+
+    async def iter_recent_signals(self, days: int = 30, limit: Optional[int] = None,
+                                  chunk_size: int = 500,
+                                  description_max: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream signals from the last `days` days through a server-side cursor"""
+        from database.api.database import get_async_session
+        async with get_async_session() as session:
+            signal_repo = SignalRepository(session)
+            async for signal in signal_repo.stream_recent_signals(
+                start_date=date.today() - timedelta(days=days),
+                limit=limit, chunk_size=chunk_size,
+                description_max=description_max
+            ):
+                yield signal
+
+    async def count_old_data(self, cutoff_date: date) -> Dict[str, int]:
+        """Count analyses, signals and indicator calculations dated before cutoff_date"""
+        try:
+            from sqlalchemy import text
+            from database.api.database import get_async_session
+            async with get_async_session() as session:
+                # One round trip: the three counts as scalar subqueries
+                result = await session.execute(text("""
+                    SELECT
+                        (SELECT count(*) FROM stockai.analysis_results
+                         WHERE analysis_date < :cutoff) AS analyses,
+                        (SELECT count(*) FROM stockai.signal_results
+                         WHERE signal_date < :cutoff) AS signals,
+                        (SELECT count(*) FROM stockai.indicator_calculations
+                         WHERE calculation_date < :cutoff) AS indicators
+                """), {'cutoff': cutoff_date})
+                return dict(result.mappings().one())
+        except Exception as e:
+            logger.error(f"Error counting old data: {e}")
+            return {'analyses': 0, 'signals': 0, 'indicators': 0}
+
     async def get_database_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
         try:
             from database.api.database import get_async_session
             async with get_async_session() as session:
-                self.config_repo = ConfigRepository(session)
-                self.indicator_repo = IndicatorRepository(session)
-                self.analysis_repo = AnalysisRepository(session)
-                self.signal_repo = SignalRepository(session)
+                # Local repositories: the engine may serve concurrent queries,
+                # so per-call sessions must not be stored on self
+                config_repo = ConfigRepository(session)
+                indicator_repo = IndicatorRepository(session)
+                analysis_repo = AnalysisRepository(session)
+                signal_repo = SignalRepository(session)
                 
                 return {
                     'configurations': {
-                        'indicator_configs': len(await self.config_repo.get_configs_by_type('indicator')),
-                        'scoring_configs': len(await self.config_repo.get_configs_by_type('scoring')),
-                        'analysis_configs': len(await self.config_repo.get_configs_by_type('analysis'))
+                        'indicator_configs': len(await config_repo.get_configs_by_type('indicator')),
+                        'scoring_configs': len(await config_repo.get_configs_by_type('scoring')),
+                        'analysis_configs': len(await config_repo.get_configs_by_type('analysis'))
                     },
-                    'indicator_calculations': await self.indicator_repo.get_calculation_stats(),
-                    'analysis_results': await self.analysis_repo.get_analysis_stats(),
-                    'signals': await self.signal_repo.get_signal_stats()
+                    'indicator_calculations': await indicator_repo.get_calculation_stats(),
+                    'analysis_results': await analysis_repo.get_analysis_stats(),
+                    'signals': await signal_repo.get_signal_stats()
                 }
         except Exception as e:
             logger.error(f"Error getting database stats: {e}")
@@ -0,0 +1,5 @@
+"""
+Analysis Data Module
+
+This module provides data loaders for the analysis engines.
+"""
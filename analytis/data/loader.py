@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional
 import pandas as pd
 from sqlalchemy import select
 
@@ -61,3 +61,52 @@ async def load_ohlcv_daily(symbol: str, start: Optional[pd.Timestamp] = None, en
     return df
 
 
+def load_stock_data_many(symbols: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Load stock data for several symbols with one query (synchronous wrapper)"""
+    import asyncio
+    start = pd.to_datetime(start_date) if start_date else None
+    end = pd.to_datetime(end_date) if end_date else None
+    try:
+        asyncio.get_running_loop()
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            future = executor.submit(lambda: asyncio.run(load_ohlcv_daily_many(symbols, start, end)))
+            return future.result()
+    except RuntimeError:
+        return asyncio.run(load_ohlcv_daily_many(symbols, start, end))
+
+
+async def load_ohlcv_daily_many(symbols: List[str], start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    """Load daily OHLCV for several symbols in a single stock_prices query.
+
+    Returns a dict of symbol -> DataFrame shaped like load_ohlcv_daily's result;
+    symbols without rows map to an empty frame.
+    """
+    wanted = [s.upper() for s in symbols]
+    get_database_manager().initialize()
+    async with get_async_session() as session:
+        q = select(
+            StockPrice.symbol,
+            StockPrice.time,
+            StockPrice.open,
+            StockPrice.high,
+            StockPrice.low,
+            StockPrice.close,
+            StockPrice.volume,
+        ).where(StockPrice.symbol.in_(wanted))
+        # Date bounds go into the query so only the needed rows are transferred
+        if start is not None:
+            q = q.where(StockPrice.time >= (pd.to_datetime(start).tz_localize('UTC') if pd.to_datetime(start).tz is None else pd.to_datetime(start)))
+        if end is not None:
+            q = q.where(StockPrice.time <= (pd.to_datetime(end).tz_localize('UTC') if pd.to_datetime(end).tz is None else pd.to_datetime(end)))
+        res = await session.execute(q)
+        rows = res.all()
+    empty = pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"]).astype({
+        "Open": float, "High": float, "Low": float, "Close": float, "Volume": int
+    })
+    frames = {symbol: empty.copy() for symbol in wanted}
+    if rows:
+        all_df = pd.DataFrame(rows, columns=["symbol", "time", "Open", "High", "Low", "Close", "Volume"])
+        for symbol, group in all_df.groupby("symbol", sort=False):
+            frames[symbol] = group.drop(columns="symbol").set_index("time").sort_index()
+    return frames
@@ -14,10 +14,95 @@ from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 import logging
 
+try:
+    from numba import njit
+    numba_available = True
+except ImportError:
+    numba_available = False
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _obv_loop(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Single-pass OBV over float64 arrays (compiled with numba when available)"""
+    n = close.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    total = 0.0
+    if n > 0:
+        out[0] = 0.0
+    for i in range(1, n):
+        change = close[i] - close[i - 1]
+        if change > 0:
+            total += volume[i]
+        elif change < 0:
+            total -= volume[i]
+        out[i] = total
+    return out
+
+
+def _obv_numpy(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Vectorized OBV used when numba is not installed"""
+    change = np.diff(close, prepend=np.nan)
+    return np.cumsum(np.where(change > 0, volume, np.where(change < 0, -volume, 0.0)))
+
+
+# cache=True keeps the compiled kernel on disk so only the first run pays for compilation
+_obv_kernel = njit(cache=True)(_obv_loop) if numba_available else _obv_numpy
+
+
+def _rsi_loop(close: np.ndarray, period: int) -> np.ndarray:
+    """Single-pass RSI with running gain/loss sums over a simple moving window.
+
+    Matches the pandas path: missing changes count as zero, the first
+    period - 1 values are NaN, and a window with no losses gives 100
+    (or NaN if it also has no gains).
+    
+    Subtracting values back out of the running sums leaves rounding
+    residue, so sums below a tolerance scaled to the largest price change
+    are clamped to 0.0; otherwise a flat window could read as ~0 or ~100
+    instead of NaN or 100.
+    """
+    n = close.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    gains = np.zeros(n, dtype=np.float64)
+    losses = np.zeros(n, dtype=np.float64)
+    largest = 0.0
+    for i in range(1, n):
+        change = close[i] - close[i - 1]
+        if change > 0:
+            gains[i] = change
+        elif change < 0:
+            losses[i] = -change
+        if abs(change) > largest:
+            largest = abs(change)
+    eps = largest * 1e-9
+    
+    gain_sum = 0.0
+    loss_sum = 0.0
+    for i in range(n):
+        gain_sum += gains[i]
+        loss_sum += losses[i]
+        if i >= period:
+            gain_sum -= gains[i - period]
+            loss_sum -= losses[i - period]
+        if abs(gain_sum) < eps:
+            gain_sum = 0.0
+        if abs(loss_sum) < eps:
+            loss_sum = 0.0
+        if i < period - 1:
+            out[i] = np.nan
+        elif loss_sum == 0.0:
+            out[i] = 100.0 if gain_sum > 0.0 else np.nan
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + gain_sum / loss_sum)
+    return out
+
+
+# Only compiled when numba is available; otherwise _calculate_rsi keeps the pandas path
+_rsi_kernel = njit(cache=True)(_rsi_loop) if numba_available else None
+
+
+@dataclass(slots=True)
 class IndicatorConfig:
     """Configuration for technical indicators"""
     # Moving Averages
@@ -121,6 +206,11 @@ class IndicatorEngine:
     
     def _calculate_rsi(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate RSI (Relative Strength Index)"""
+        if _rsi_kernel is not None:
+            close_numeric = pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=np.float64)
+            df['RSI'] = _rsi_kernel(close_numeric, self.config.rsi_period)
+            return df
+        
         delta = df['Close'].diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=self.config.rsi_period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=self.config.rsi_period).mean()
@@ -180,17 +270,12 @@ class IndicatorEngine:
     
     def _calculate_obv(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate OBV (On-Balance Volume)"""
-        # Ensure Close column is numeric
-        close_numeric = pd.to_numeric(df['Close'], errors='coerce')
-        volume_numeric = pd.to_numeric(df['Volume'], errors='coerce')
-        
-        # Calculate price change
-        price_change = close_numeric.diff()
+        # Ensure Close/Volume are numeric float64 arrays for the kernel
+        close_numeric = pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=np.float64)
+        volume_numeric = pd.to_numeric(df['Volume'], errors='coerce').to_numpy(dtype=np.float64)
         
         # Calculate OBV
-        obv = np.where(price_change > 0, volume_numeric,
-                      np.where(price_change < 0, -volume_numeric, 0))
-        df['OBV'] = np.cumsum(obv)
+        df['OBV'] = _obv_kernel(close_numeric, volume_numeric)
         
         # OBV Moving Average
         df['OBV_MA20'] = df['OBV'].rolling(window=self.config.ma_medium).mean()
@@ -43,7 +43,7 @@ class ScoringRule:
     enabled: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class ScoringConfig:
     """Configuration for the scoring engine"""
     # Signal strength thresholds
@@ -9,7 +9,7 @@ from __future__ import annotations
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime, date
-from sqlalchemy import select, insert, update, delete, and_, or_
+from sqlalchemy import select, insert, update, delete, and_, or_, column, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.api.repositories import BaseRepository
@@ -36,7 +36,8 @@ class AnalysisRepository(BaseRepository):
                                  min_score: Optional[float] = None,
                                  analysis_duration_ms: Optional[int] = None,
                                  data_info: Optional[Dict[str, Any]] = None,
-                                 summary: Optional[Dict[str, Any]] = None) -> int:
+                                 summary: Optional[Dict[str, Any]] = None,
+                                 commit: bool = True) -> int:
         """
         Save analysis result.
         
@@ -57,6 +58,7 @@ class AnalysisRepository(BaseRepository):
             analysis_duration_ms: Analysis duration in milliseconds
             data_info: Dataset information
             summary: Analysis summary
+            commit: Commit immediately; pass False when the caller owns the transaction
             
         Returns:
             Analysis result ID
@@ -84,7 +86,8 @@ class AnalysisRepository(BaseRepository):
             
             result = await self._execute_query(query)
             analysis_id = result.scalar()
-            await self._commit()
+            if commit:
+                await self._commit()
             
             logger.info(f"Saved analysis result for {symbol} on {analysis_date} with ID {analysis_id}")
             return analysis_id
@@ -213,6 +216,36 @@ class AnalysisRepository(BaseRepository):
             logger.error(f"Failed to get analyses for {symbol} in date range: {e}")
             raise
     
+    async def get_recent_analyses(self,
+                                limit: int = 50,
+                                start_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most recent analyses across all symbols.
+        
+        Args:
+            limit: Maximum number of analyses to return
+            start_date: Optional start date filter
+            
+        Returns:
+            List of analysis results, newest first
+        """
+        try:
+            query = select("*").select_from(text("stockai.analysis_results"))
+            
+            if start_date:
+                query = query.where(column("analysis_date") >= start_date)
+            
+            query = query.order_by(column("analysis_date").desc(), column("id").desc()).limit(limit)
+            
+            result = await self._execute_query(query)
+            rows = result.fetchall()
+            
+            return [dict(row._mapping) for row in rows]
+            
+        except Exception as e:
+            logger.error(f"Failed to get recent analyses: {e}")
+            raise
+    
     async def get_analyses_by_config_combination(self,
                                                indicator_config_id: int,
                                                scoring_config_id: int,
@@ -29,7 +29,8 @@ class IndicatorRepository(BaseRepository):
                                        data_points: int,
                                        start_date: date,
                                        end_date: date,
-                                       calculation_duration_ms: Optional[int] = None) -> int:
+                                       calculation_duration_ms: Optional[int] = None,
+                                       commit: bool = True) -> int:
         """
         Save indicator calculation results.
         
@@ -42,6 +43,7 @@ class IndicatorRepository(BaseRepository):
             start_date: Start date of data
             end_date: End date of data
             calculation_duration_ms: Calculation duration in milliseconds
+            commit: Commit immediately; pass False when the caller owns the transaction
             
         Returns:
             Calculation ID
@@ -76,7 +78,8 @@ class IndicatorRepository(BaseRepository):
             
             result = await self._execute_query(query, params)
             calculation_id = result.scalar()
-            await self._commit()
+            if commit:
+                await self._commit()
             
             logger.info(f"Saved indicator calculation for {symbol} on {calculation_date} with ID {calculation_id}")
             return calculation_id
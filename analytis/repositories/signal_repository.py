@@ -7,15 +7,39 @@ This module provides database operations for signal results.
 from __future__ import annotations
 
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 from datetime import datetime, date
-from sqlalchemy import select, insert, update, delete, and_, or_
+from sqlalchemy import select, insert, update, delete, and_, or_, column, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.api.repositories import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+# signal_results columns returned alongside a truncated description
+_SIGNAL_COLUMNS = (
+    "id", "analysis_result_id", "symbol", "signal_date", "signal_time",
+    "action", "strength", "score", "triggered_rules", "context",
+    "indicators_at_signal", "metadata", "created_at",
+)
+
+
+def _select_signals(description_max: Optional[int] = None):
+    """
+    Build the base signal_results select.
+
+    With ``description_max`` the description is truncated server-side
+    (``LEFT(description, :maxlen)``) and its full length is returned as
+    ``desc_len``, so print-only callers do not pull whole descriptions.
+    """
+    if description_max is None:
+        return select("*").select_from(text("stockai.signal_results"))
+    return select(
+        *(column(name) for name in _SIGNAL_COLUMNS),
+        func.left(column("description"), description_max).label("description"),
+        func.char_length(column("description")).label("desc_len"),
+    ).select_from(text("stockai.signal_results"))
+
 
 class SignalRepository(BaseRepository):
     """Repository for signal result operations"""
@@ -66,8 +90,7 @@ class SignalRepository(BaseRepository):
                 triggered_rules=triggered_rules,
                 context=context,
                 indicators_at_signal=indicators_at_signal,
-                metadata=metadata,
-                created_at=datetime.utcnow()
+                metadata=metadata
             ).returning("stockai.signal_results.id")
             
             result = await self._execute_query(query)
@@ -81,12 +104,13 @@ class SignalRepository(BaseRepository):
             logger.error(f"Failed to save signal for {symbol}: {e}")
             raise
     
-    async def save_signals_batch(self, signals: List[Dict[str, Any]]) -> List[int]:
+    async def save_signals_batch(self, signals: List[Dict[str, Any]], commit: bool = True) -> List[int]:
         """
         Save multiple signals in batch.
         
         Args:
             signals: List of signal data dictionaries
+            commit: Commit immediately; pass False when the caller owns the transaction
             
         Returns:
             List of signal IDs
@@ -110,15 +134,15 @@ class SignalRepository(BaseRepository):
                     'triggered_rules': signal.get('triggered_rules'),
                     'context': signal.get('context'),
                     'indicators_at_signal': signal.get('indicators_at_signal'),
-                    'metadata': signal.get('metadata'),
-                    'created_at': datetime.utcnow()
+                    'metadata': signal.get('metadata')
                 })
             
             query = insert("stockai.signal_results").values(signal_data).returning("stockai.signal_results.id")
             
             result = await self._execute_query(query)
             signal_ids = [row[0] for row in result.fetchall()]
-            await self._commit()
+            if commit:
+                await self._commit()
             
             logger.info(f"Saved {len(signal_ids)} signals in batch")
             return signal_ids
@@ -238,7 +262,8 @@ class SignalRepository(BaseRepository):
                                            action: str,
                                            strength: str,
                                            start_date: Optional[date] = None,
-                                           end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+                                           end_date: Optional[date] = None,
+                                           description_max: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get signals by action and strength.
         
@@ -247,25 +272,26 @@ class SignalRepository(BaseRepository):
             strength: Signal strength
             start_date: Optional start date filter
             end_date: Optional end date filter
+            description_max: Optional server-side description truncation length
             
         Returns:
             List of signals
         """
         try:
-            query = select("*").select_from("stockai.signal_results").where(
+            query = _select_signals(description_max).where(
                 and_(
-                    "stockai.signal_results.action" == action,
-                    "stockai.signal_results.strength" == strength
+                    column("action") == action,
+                    column("strength") == strength
                 )
             )
             
             if start_date:
-                query = query.where("stockai.signal_results.signal_date" >= start_date)
+                query = query.where(column("signal_date") >= start_date)
             
             if end_date:
-                query = query.where("stockai.signal_results.signal_date" <= end_date)
+                query = query.where(column("signal_date") <= end_date)
             
-            query = query.order_by("stockai.signal_results.signal_time DESC")
+            query = query.order_by(column("signal_time").desc())
             
             result = await self._execute_query(query)
             rows = result.fetchall()
@@ -279,7 +305,9 @@ class SignalRepository(BaseRepository):
     async def get_recent_signals(self, 
                                limit: int = 100,
                                action: Optional[str] = None,
-                               strength: Optional[str] = None) -> List[Dict[str, Any]]:
+                               strength: Optional[str] = None,
+                               start_date: Optional[date] = None,
+                               description_max: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get recent signals.
         
@@ -287,20 +315,25 @@ class SignalRepository(BaseRepository):
             limit: Maximum number of signals to return
             action: Optional action filter
             strength: Optional strength filter
+            start_date: Optional start date filter
+            description_max: Optional server-side description truncation length
             
         Returns:
             List of recent signals
         """
         try:
-            query = select("*").select_from("stockai.signal_results")
+            query = _select_signals(description_max)
             
             if action:
-                query = query.where("stockai.signal_results.action" == action)
+                query = query.where(column("action") == action)
             
             if strength:
-                query = query.where("stockai.signal_results.strength" == strength)
+                query = query.where(column("strength") == strength)
             
-            query = query.order_by("stockai.signal_results.signal_time DESC").limit(limit)
+            if start_date:
+                query = query.where(column("signal_date") >= start_date)
+            
+            query = query.order_by(column("signal_time").desc()).limit(limit)
             
             result = await self._execute_query(query)
             rows = result.fetchall()
@@ -311,6 +344,52 @@ class SignalRepository(BaseRepository):
             logger.error(f"Failed to get recent signals: {e}")
             raise
     
+    async def stream_recent_signals(self,
+                                    start_date: Optional[date] = None,
+                                    limit: Optional[int] = None,
+                                    chunk_size: int = 500,
+                                    description_max: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream recent signals without materializing the full result.
+        
+        Async sessions read through a server-side cursor, fetching
+        ``chunk_size`` rows per round trip; sync sessions fall back to a
+        regular query.
+        
+        Args:
+            start_date: Optional start date filter
+            limit: Optional maximum number of signals
+            chunk_size: Rows fetched per cursor round trip
+            description_max: Optional server-side description truncation length
+            
+        Yields:
+            Signals, newest first
+        """
+        query = _select_signals(description_max)
+        
+        if start_date:
+            query = query.where(column("signal_date") >= start_date)
+        
+        query = query.order_by(column("signal_time").desc())
+        
+        if limit:
+            query = query.limit(limit)
+        
+        try:
+            if self.is_async:
+                result = await self.session.stream(
+                    query.execution_options(yield_per=chunk_size)
+                )
+                async for row in result:
+                    yield dict(row._mapping)
+            else:
+                for row in self.session.execute(query):
+                    yield dict(row._mapping)
+                    
+        except Exception as e:
+            logger.error(f"Failed to stream recent signals: {e}")
+            raise
+    
     async def update_signal(self,
                           signal_id: int,
                           **kwargs) -> bool:
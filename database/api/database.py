@@ -11,9 +11,10 @@ Author: StockAI Team
 Version: 1.0.0
 """
 
+import asyncio
 import os
 import logging
-from typing import Optional, AsyncGenerator, Dict, Any
+from typing import Optional, AsyncGenerator, Dict, Any, List, Set
 from contextlib import asynccontextmanager
 
 from sqlalchemy import create_engine, text, MetaData
@@ -24,7 +25,7 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine
 )
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, NullPool
 from sqlalchemy.engine import Engine
 
 from ..schema import Base, get_all_models
@@ -32,6 +33,40 @@ from ..schema import Base, get_all_models
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Connection pool presets selected via DB_PROFILE
+POOL_PROFILES = {
+    # Long-running API server / concurrent analysis workers
+    'analyzer': {'pool_size': 20, 'max_overflow': 40},
+    # One-shot loader and setup scripts
+    'dataloader': {'pool_size': 2, 'max_overflow': 0},
+}
+
+# TimescaleDB hypertables and their time columns
+HYPERTABLES = (
+    ('stockai.stock_prices', 'time'),
+    ('stockai.foreign_trades', 'time'),
+    ('stockai.stock_statistics', 'date'),
+)
+
+# Age after which hypertable chunks are compressed
+COMPRESSION_AFTER = "7 days"
+
+
+def compression_statements(table_name: str, time_column: str) -> List[str]:
+    """Native compression settings and policy for one hypertable"""
+    return [
+        f"""
+            ALTER TABLE {table_name} SET (
+                timescaledb.compress,
+                timescaledb.compress_segmentby = 'symbol',
+                timescaledb.compress_orderby = '{time_column} DESC'
+            );
+        """,
+        f"""
+            SELECT add_compression_policy('{table_name}', INTERVAL '{COMPRESSION_AFTER}', if_not_exists => TRUE);
+        """,
+    ]
+
 class DatabaseConfig:
     """Database configuration class"""
     
@@ -43,11 +78,19 @@ class DatabaseConfig:
         self.username = os.getenv("POSTGRES_USER", "stockai_user")
         self.password = os.getenv("POSTGRES_PASSWORD", "stockai_password_2025")
         
-        # Connection pool settings
-        self.pool_size = int(os.getenv("DB_POOL_SIZE", "10"))
-        self.max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        # Connection pool settings (profile presets, overridable per variable)
+        self.profile = os.getenv("DB_PROFILE", "analyzer").lower()
+        profile_defaults = POOL_PROFILES.get(self.profile, POOL_PROFILES["analyzer"])
+        self.pool_size = int(os.getenv("DB_POOL_SIZE", profile_defaults["pool_size"]))
+        self.max_overflow = int(os.getenv("DB_MAX_OVERFLOW", profile_defaults["max_overflow"]))
         self.pool_timeout = int(os.getenv("DB_POOL_TIMEOUT", "30"))
-        self.pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+        self.pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        
+        # asyncpg driver settings
+        self.statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1024"))
+        self.prepared_statement_cache_size = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "512"))
+        self.jit_enabled = os.getenv("DB_JIT_ENABLED", "false").lower() == "true"
         
         # TimescaleDB settings
         self.timescale_enabled = os.getenv("TIMESCALE_ENABLED", "true").lower() == "true"
@@ -67,6 +110,15 @@ class DatabaseConfig:
         """Get asynchronous database URL"""
         return f"postgresql+asyncpg://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}"
     
+    @property
+    def async_connect_args(self) -> Dict[str, Any]:
+        """Get asyncpg connection arguments (statement caching, server settings)"""
+        return {
+            'statement_cache_size': self.statement_cache_size,
+            'prepared_statement_cache_size': self.prepared_statement_cache_size,
+            'server_settings': {'jit': 'on' if self.jit_enabled else 'off'}
+        }
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary"""
         return {
@@ -78,6 +130,11 @@ class DatabaseConfig:
             'max_overflow': self.max_overflow,
             'pool_timeout': self.pool_timeout,
             'pool_recycle': self.pool_recycle,
+            'pool_pre_ping': self.pool_pre_ping,
+            'profile': self.profile,
+            'statement_cache_size': self.statement_cache_size,
+            'prepared_statement_cache_size': self.prepared_statement_cache_size,
+            'jit_enabled': self.jit_enabled,
             'timescale_enabled': self.timescale_enabled,
             'compression_enabled': self.compression_enabled,
             'retention_days': self.retention_days,
@@ -88,8 +145,9 @@ class DatabaseConfig:
 class DatabaseManager:
     """Database connection and session manager"""
     
-    def __init__(self, config: Optional[DatabaseConfig] = None):
+    def __init__(self, config: Optional[DatabaseConfig] = None, standalone: bool = False):
         self.config = config or DatabaseConfig()
+        self.standalone = standalone
         self._engine: Optional[Engine] = None
         self._async_engine: Optional[AsyncEngine] = None
         self._session_factory: Optional[sessionmaker] = None
@@ -103,14 +161,25 @@ class DatabaseManager:
             return
         
         try:
+            if self.standalone:
+                # One-shot scripts: open a fresh connection per checkout and
+                # close it on release instead of keeping a pool around
+                pool_kwargs = {'poolclass': NullPool}
+                sync_pool_kwargs = pool_kwargs
+            else:
+                pool_kwargs = {
+                    'pool_size': self.config.pool_size,
+                    'max_overflow': self.config.max_overflow,
+                    'pool_timeout': self.config.pool_timeout,
+                    'pool_recycle': self.config.pool_recycle,
+                    'pool_pre_ping': self.config.pool_pre_ping
+                }
+                sync_pool_kwargs = {'poolclass': QueuePool, **pool_kwargs}
+            
             # Create synchronous engine
             self._engine = create_engine(
                 self.config.database_url,
-                poolclass=QueuePool,
-                pool_size=self.config.pool_size,
-                max_overflow=self.config.max_overflow,
-                pool_timeout=self.config.pool_timeout,
-                pool_recycle=self.config.pool_recycle,
+                **sync_pool_kwargs,
                 echo=self.config.echo,
                 future=True
             )
@@ -118,10 +187,8 @@ class DatabaseManager:
             # Create asynchronous engine
             self._async_engine = create_async_engine(
                 self.config.async_database_url,
-                pool_size=self.config.pool_size,
-                max_overflow=self.config.max_overflow,
-                pool_timeout=self.config.pool_timeout,
-                pool_recycle=self.config.pool_recycle,
+                **pool_kwargs,
+                connect_args=self.config.async_connect_args,
                 echo=self.config.echo,
                 future=True
             )
@@ -191,11 +258,7 @@ class DatabaseManager:
                 conn.commit()
                 
                 # Create hypertables for time-series tables
-                hypertables = [
-                    ('stockai.stock_prices', 'time'),
-                    ('stockai.foreign_trades', 'time'),
-                    ('stockai.stock_statistics', 'date')
-                ]
+                hypertables = HYPERTABLES
                 
                 for table_name, time_column in hypertables:
                     try:
@@ -208,14 +271,10 @@ class DatabaseManager:
                 
                 # Setup compression if enabled
                 if self.config.compression_enabled:
-                    for table_name, _ in hypertables:
+                    for table_name, time_column in hypertables:
                         try:
-                            conn.execute(text(f"""
-                                ALTER TABLE {table_name} SET (
-                                    timescaledb.compress,
-                                    timescaledb.compress_segmentby = 'symbol'
-                                );
-                            """))
+                            for statement in compression_statements(table_name, time_column):
+                                conn.execute(text(statement))
                             logger.info(f"Enabled compression for {table_name}")
                         except Exception as e:
                             logger.warning(f"Failed to enable compression for {table_name}: {str(e)}")
@@ -290,6 +349,56 @@ class DatabaseManager:
             logger.error(f"Failed to setup TimescaleDB (async): {str(e)}")
             raise
     
+    async def get_hypertables_async(self) -> Set[str]:
+        """Qualified names (schema.table) of the existing TimescaleDB hypertables
+        
+        Empty when the timescaledb extension is not installed.
+        """
+        if not self._initialized:
+            raise RuntimeError("Database not initialized. Call initialize() first.")
+        
+        async with self._async_engine.connect() as conn:
+            installed = await conn.execute(text(
+                "SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"
+            ))
+            if installed.scalar() is None:
+                return set()
+            
+            result = await conn.execute(text("""
+                SELECT hypertable_schema || '.' || hypertable_name
+                FROM timescaledb_information.hypertables
+            """))
+            return {row[0] for row in result}
+    
+    async def setup_compression_async(self) -> List[str]:
+        """Enable native compression on the hypertables that actually exist
+        
+        Tables that are not listed in timescaledb_information.hypertables
+        (extension missing, or hypertable creation skipped) are left alone.
+        Returns the tables compression was enabled for.
+        """
+        if not (self.config.timescale_enabled and self.config.compression_enabled):
+            return []
+        
+        existing = await self.get_hypertables_async()
+        
+        enabled = []
+        async with self._async_engine.begin() as conn:
+            for table_name, time_column in HYPERTABLES:
+                if table_name not in existing:
+                    logger.warning(f"{table_name} is not a hypertable, skipping compression")
+                    continue
+                try:
+                    async with conn.begin_nested():
+                        for statement in compression_statements(table_name, time_column):
+                            await conn.execute(text(statement))
+                    enabled.append(table_name)
+                    logger.info(f"Enabled compression for {table_name}")
+                except Exception as e:
+                    logger.warning(f"Failed to enable compression for {table_name}: {str(e)}")
+        
+        return enabled
+    
     def get_session(self) -> Session:
         """Get synchronous database session"""
         if not self._initialized:
@@ -357,6 +466,30 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Error closing async database connections: {str(e)}")
     
+    async def warmup_async(self, connections: int) -> int:
+        """Open ``connections`` pooled connections concurrently so the first
+        queries do not pay connection setup; returns how many were opened.
+        
+        Connections go back to the pool afterwards and stay open up to
+        ``pool_size``.
+        """
+        if not self._initialized:
+            raise RuntimeError("Database not initialized. Call initialize() first.")
+        
+        if self.standalone:
+            # NullPool: connections are closed on release, nothing to keep warm
+            return 0
+        
+        connections = min(connections, self.config.pool_size)
+        
+        async def _touch() -> None:
+            async with self._async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        
+        await asyncio.gather(*(_touch() for _ in range(connections)))
+        logger.info(f"Warmed up {connections} pooled connections")
+        return connections
+    
     def health_check(self) -> bool:
         """Check database health"""
         try:
@@ -381,8 +514,15 @@ class DatabaseManager:
 # Global database manager instance
 db_manager: Optional[DatabaseManager] = None
 
-def get_database_manager() -> DatabaseManager:
-    """Get global database manager instance"""
+def get_database_manager(standalone: bool = False) -> DatabaseManager:
+    """Get global database manager instance
+    
+    With ``standalone=True`` a separate, non-pooled manager is returned for
+    one-shot scripts; the global instance is left untouched.
+    """
+    if standalone:
+        return DatabaseManager(standalone=True)
+    
     global db_manager
     if db_manager is None:
         db_manager = DatabaseManager()
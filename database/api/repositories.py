@@ -11,11 +11,12 @@ Version: 1.0.0
 """
 
 import logging
-from datetime import datetime, date
-from typing import Optional, List, Dict, Any, Tuple, Union
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Set, Tuple, Union
 from decimal import Decimal
 
 from sqlalchemy import select, update, delete, func, and_, or_, desc, asc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.sql import Select
@@ -100,6 +101,94 @@ class StockRepository(BaseRepository):
             logger.error(f"Failed to get stock by symbol {symbol}: {str(e)}")
             raise
     
+    async def get_existing_symbols(self, symbols: List[str]) -> Set[str]:
+        """Get the subset of symbols that already exist (single query)"""
+        try:
+            if not symbols:
+                return set()
+            query = select(Stock.symbol).where(Stock.symbol.in_([s.upper() for s in symbols]))
+            result = await self._execute_query(query)
+            return set(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to get existing symbols: {str(e)}")
+            raise
+    
+    async def create_batch(self, stocks_data: List[Dict[str, Any]]) -> List[Stock]:
+        """Create multiple stocks"""
+        try:
+            stocks = [Stock(**data) for data in stocks_data]
+            self.session.add_all(stocks)
+            await self._commit()
+            return stocks
+        except Exception as e:
+            await self._rollback()
+            logger.error(f"Failed to create stocks batch: {str(e)}")
+            raise
+    
+    async def bulk_upsert_ignore(self, stocks_data: List[Dict[str, Any]], commit: bool = True) -> List[str]:
+        """Insert stocks, skipping symbols that already exist; returns inserted symbols.
+        
+        With commit=False the caller owns the transaction (commit and rollback).
+        """
+        try:
+            if not stocks_data:
+                return []
+            query = (
+                pg_insert(Stock)
+                .values(stocks_data)
+                .on_conflict_do_nothing(index_elements=['symbol'])
+                .returning(Stock.symbol)
+            )
+            result = await self._execute_query(query)
+            inserted = list(result.scalars().all())
+            if commit:
+                await self._commit()
+            return inserted
+        except Exception as e:
+            if commit:
+                await self._rollback()
+            logger.error(f"Failed to bulk insert stocks: {str(e)}")
+            raise
+    
+    async def copy_batch(self, stocks_data: List[Dict[str, Any]], commit: bool = True) -> int:
+        """Bulk-load new stocks via asyncpg COPY (no conflict handling).
+        
+        With commit=False the caller owns the transaction (commit and rollback).
+        """
+        columns = ['symbol', 'name', 'exchange', 'sector', 'industry', 'market_cap_tier', 'is_active']
+        try:
+            if not stocks_data:
+                return 0
+            # Enum columns are stored by member name, matching the ORM mapping
+            records = [
+                (
+                    data['symbol'].upper(),
+                    data['name'],
+                    MarketExchange(data['exchange']).name,
+                    data.get('sector'),
+                    data.get('industry'),
+                    MarketCapTier(data['market_cap_tier']).name if data.get('market_cap_tier') else None,
+                    data.get('is_active', True)
+                )
+                for data in stocks_data
+            ]
+            conn = await self.session.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                Stock.__tablename__,
+                schema_name='stockai',
+                columns=columns,
+                records=records
+            )
+            if commit:
+                await self._commit()
+            return len(records)
+        except Exception as e:
+            if commit:
+                await self._rollback()
+            logger.error(f"Failed to copy stocks batch: {str(e)}")
+            raise
+    
     async def get_all(
         self, 
         skip: int = 0, 
@@ -436,6 +525,7 @@ class StockPriceRepository(BaseRepository):
     ) -> List[Dict[str, Any]]:
         """Get daily summary for stocks"""
         try:
+            day_start = datetime.combine(date, datetime.min.time())
             query = select(
                 StockPrice.symbol,
                 StockPrice.open,
@@ -445,7 +535,8 @@ class StockPriceRepository(BaseRepository):
                 StockPrice.volume,
                 StockPrice.value
             ).where(
-                func.date(StockPrice.time) == date
+                # Half-open time range keeps the (symbol, time) index and chunk exclusion usable
+                and_(StockPrice.time >= day_start, StockPrice.time < day_start + timedelta(days=1))
             )
             
             if symbols:
@@ -600,6 +691,7 @@ class ForeignTradeRepository(BaseRepository):
     ) -> List[Dict[str, Any]]:
         """Get daily foreign trade summary"""
         try:
+            day_start = datetime.combine(date, datetime.min.time())
             query = select(
                 ForeignTrade.symbol,
                 ForeignTrade.buy_volume,
@@ -609,7 +701,8 @@ class ForeignTradeRepository(BaseRepository):
                 ForeignTrade.sell_value,
                 ForeignTrade.net_value
             ).where(
-                func.date(ForeignTrade.time) == date
+                # Half-open time range keeps the (symbol, time) index and chunk exclusion usable
+                and_(ForeignTrade.time >= day_start, ForeignTrade.time < day_start + timedelta(days=1))
             )
             
             if symbols:
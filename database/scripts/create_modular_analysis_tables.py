@@ -8,276 +8,589 @@ This script creates a modular database schema for the analysis system:
 - Signal results (with references to analysis results)
 """
 
+import argparse
 import asyncio
 import logging
 import sys
 import os
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Optional, Tuple
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from sqlalchemy import text
-from database.api.database import get_async_session, get_database_manager
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from database.api.database import get_database_manager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def create_modular_analysis_tables():
-    """Create all modular analysis tables"""
+# Advisory lock key guarding the schema bootstrap transaction
+SCHEMA_BOOTSTRAP_LOCK_ID = 429496001
+
+
+# Range of monthly signal_results partitions created at bootstrap
+PARTITION_MONTHS_BACK = 12
+PARTITION_MONTHS_AHEAD = 1
+
+
+# Domain types shared across tables
+DOMAIN_TYPES = {
+    "stock_symbol": "VARCHAR(10) CHECK (VALUE <> '')",
+}
+
+
+# Native enum types for the fixed-vocabulary discriminator columns
+ENUM_TYPES = {
+    "signal_action": ("MUA", "BÁN", "THEO DÕI"),
+    "signal_strength": ("WEAK", "MEDIUM", "STRONG", "RẤT MẠNH"),
+    "config_kind": ("indicator", "scoring", "analysis"),
+    "experiment_kind": ("backtest", "live", "optimization"),
+    "experiment_status": ("active", "completed", "failed"),
+}
+
+
+# TOAST/storage tuning for JSONB columns. Storage parameters such as
+# toast_tuple_target cannot be set on the partitioned signal_results parent.
+JSONB_STORAGE_TUNING = (
+    "ALTER TABLE stockai.indicator_calculations ALTER COLUMN indicators SET COMPRESSION lz4",
+    "ALTER TABLE stockai.signal_results ALTER COLUMN triggered_rules SET COMPRESSION lz4",
+    "ALTER TABLE stockai.analysis_configurations ALTER COLUMN config_data SET COMPRESSION lz4",
+    "ALTER TABLE stockai.analysis_results ALTER COLUMN summary SET COMPRESSION lz4",
+    "ALTER TABLE stockai.signal_results ALTER COLUMN metadata SET STORAGE MAIN",
+    "ALTER TABLE stockai.indicator_calculations SET (toast_tuple_target = 4096)",
+    "ALTER TABLE stockai.analysis_configurations SET (toast_tuple_target = 4096)",
+    "ALTER TABLE stockai.analysis_results SET (toast_tuple_target = 4096)",
+)
+
+
+# In-place column upgrades for tables created by earlier versions of this
+# script: (table, column, target type, column default). Each is applied only
+# while the column still has a different type, so re-runs are no-ops.
+COLUMN_UPGRADES = (
+    ("analysis_configurations", "config_type", "stockai.config_kind", None),
+    ("indicator_calculations", "id", "bigint", None),
+    ("indicator_calculations", "symbol", "stockai.stock_symbol", None),
+    ("analysis_results", "symbol", "stockai.stock_symbol", None),
+    ("analysis_results", "indicator_calculation_id", "bigint", None),
+    ("analysis_results", "avg_score", "real", None),
+    ("analysis_results", "max_score", "real", None),
+    ("analysis_results", "min_score", "real", None),
+    ("analysis_experiments", "experiment_type", "stockai.experiment_kind", "'backtest'"),
+    ("analysis_experiments", "status", "stockai.experiment_status", "'active'"),
+)
+
+
+# Tables whose SERIAL id columns are converted to identity columns
+IDENTITY_UPGRADES = (
+    "analysis_configurations",
+    "indicator_calculations",
+    "analysis_results",
+    "analysis_experiments",
+)
+
+
+# Columns copied from an unpartitioned signal_results into the partitioned one
+SIGNAL_RESULTS_COPY = (
+    "id, analysis_result_id, symbol, signal_date, signal_time, action, strength, "
+    "score, description, triggered_rules, context, indicators_at_signal, metadata, created_at"
+)
+
+
+# Default configurations seeded in a single executemany batch
+DEFAULT_CONFIGURATIONS = [
+    {
+        "name": "Default Indicator Config",
+        "description": "Default technical indicator configuration",
+        "config_type": "indicator",
+        "config_data": {
+            "ma_short": 9,
+            "ma_long": 50,
+            "ma_medium": 20,
+            "rsi_period": 14,
+            "rsi_overbought": 70,
+            "rsi_oversold": 30,
+            "macd_fast": 12,
+            "macd_slow": 26,
+            "macd_signal": 9,
+            "bb_period": 20,
+            "bb_std": 2.0,
+            "volume_avg_period": 20,
+            "volume_spike_multiplier": 1.8,
+            "ichimoku_tenkan": 9,
+            "ichimoku_kijun": 26,
+            "ichimoku_senkou_b": 52,
+            "obv_divergence_lookback": 30,
+            "squeeze_lookback": 120
+        },
+        "version": "1.0.0",
+        "is_active": True,
+        "created_by": "system"
+    },
+    {
+        "name": "Default Scoring Config",
+        "description": "Default scoring configuration",
+        "config_type": "scoring",
+        "config_data": {
+            "strong_threshold": 75.0,
+            "medium_threshold": 25.0,
+            "weak_threshold": 10.0,
+            "buy_strong_threshold": -75.0,
+            "buy_medium_threshold": -25.0,
+            "sell_medium_threshold": 25.0,
+            "sell_strong_threshold": 75.0,
+            "context_multipliers": {
+                "uptrend_buy": 1.5,
+                "uptrend_sell": 0.5,
+                "downtrend_sell": 1.5,
+                "downtrend_buy": 0.5,
+                "sideways": 0.7
+            },
+            "rule_weights": {
+                "STRONG": 3.0,
+                "MEDIUM": 2.0,
+                "WEAK": 1.0
+            }
+        },
+        "version": "1.0.0",
+        "is_active": True,
+        "created_by": "system"
+    },
+    {
+        "name": "Default Analysis Config",
+        "description": "Default analysis configuration",
+        "config_type": "analysis",
+        "config_data": {
+            "min_score_threshold": 10.0,
+            "lookback_days": 365,
+            "signal_generation_enabled": True,
+            "context_analysis_enabled": True,
+            "export_enabled": True
+        },
+        "version": "1.0.0",
+        "is_active": True,
+        "created_by": "system"
+    }
+]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Declarative description of a secondary index"""
+    name: str
+    columns: str
+    method: str = "btree"
+    include: Tuple[str, ...] = ()
+    with_params: Optional[str] = None
+    replaces: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Declarative description of a table and its indexes"""
+    name: str
+    columns: Tuple[str, ...]
+    unique: Tuple[str, ...] = ()
+    primary_key: Optional[str] = None
+    checks: Tuple[Tuple[str, str], ...] = ()
+    partition_by: Optional[str] = None
+    indexes: Tuple[IndexSpec, ...] = ()
+
+
+TABLE_SPECS = (
+    # 1. Analysis Configurations Table
+    TableSpec(
+        name="analysis_configurations",
+        columns=(
+            "id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY",
+            "name VARCHAR(255) NOT NULL",
+            "description TEXT",
+            "config_type stockai.config_kind NOT NULL",
+            "config_data JSONB NOT NULL",
+            "version VARCHAR(20) DEFAULT '1.0.0'",
+            "is_active BOOLEAN DEFAULT true",
+            "created_by VARCHAR(100)",
+            "created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()",
+            "updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()",
+        ),
+        unique=("name, version",),
+        indexes=(
+            IndexSpec("idx_analysis_configurations_type_active", "config_type, is_active"),
+        ),
+    ),
+    # 2. Indicator Calculations Table
+    TableSpec(
+        name="indicator_calculations",
+        columns=(
+            "id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY",
+            "symbol stockai.stock_symbol NOT NULL",
+            "calculation_date DATE NOT NULL",
+            "config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "indicators JSONB NOT NULL",  # All calculated indicators
+            "data_points INTEGER NOT NULL",
+            "start_date DATE NOT NULL",
+            "end_date DATE NOT NULL",
+            "calculation_duration_ms INTEGER",
+            "created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()",
+        ),
+        unique=("symbol, calculation_date, config_id",),
+        checks=(
+            ("chk_indicator_calculations_data_points", "data_points >= 0"),
+            ("chk_indicator_calculations_date_range", "end_date >= start_date"),
+        ),
+        indexes=(
+            IndexSpec("idx_indicator_calculations_symbol_date", "symbol, calculation_date"),
+            IndexSpec("idx_indicator_calculations_config", "config_id"),
+            # BRIN for time-window scans on the append-only table
+            IndexSpec("idx_indicator_calculations_date_brin", "calculation_date",
+                      method="brin", with_params="pages_per_range = 32"),
+        ),
+    ),
+    # 3. Analysis Results Table
+    TableSpec(
+        name="analysis_results",
+        columns=(
+            "id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY",
+            "symbol stockai.stock_symbol NOT NULL",
+            "analysis_date DATE NOT NULL",
+            "indicator_calculation_id BIGINT REFERENCES stockai.indicator_calculations(id)",
+            "indicator_config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "scoring_config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "analysis_config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "total_signals INTEGER DEFAULT 0",
+            "buy_signals INTEGER DEFAULT 0",
+            "sell_signals INTEGER DEFAULT 0",
+            "hold_signals INTEGER DEFAULT 0",
+            "avg_score REAL",
+            "max_score REAL",
+            "min_score REAL",
+            "analysis_duration_ms INTEGER",
+            "data_info JSONB",  # Dataset metadata
+            "summary JSONB",  # Analysis summary
+            "created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()",
+        ),
+        unique=("symbol, analysis_date, indicator_config_id, scoring_config_id, analysis_config_id",),
+        checks=(
+            ("chk_analysis_results_signal_counts",
+             "total_signals >= 0 AND buy_signals >= 0 AND sell_signals >= 0 AND hold_signals >= 0"),
+            ("chk_analysis_results_score_range", "min_score <= max_score"),
+        ),
+        indexes=(
+            # Covering index for index-only lookups of per-day summaries
+            IndexSpec("idx_analysis_results_symbol_date_cov", "symbol, analysis_date",
+                      include=("avg_score", "total_signals"),
+                      replaces="idx_analysis_results_symbol_date"),
+            IndexSpec("idx_analysis_results_configs",
+                      "indicator_config_id, scoring_config_id, analysis_config_id"),
+        ),
+    ),
+    # 4. Signal Results Table (range-partitioned by signal_date)
+    TableSpec(
+        name="signal_results",
+        columns=(
+            "id BIGINT GENERATED ALWAYS AS IDENTITY",
+            "analysis_result_id BIGINT REFERENCES stockai.analysis_results(id)",
+            "symbol stockai.stock_symbol NOT NULL",
+            "signal_date DATE NOT NULL",
+            "signal_time TIMESTAMP WITH TIME ZONE NOT NULL",
+            "action stockai.signal_action NOT NULL",
+            "strength stockai.signal_strength NOT NULL",
+            "score REAL NOT NULL",
+            "description TEXT",
+            "triggered_rules JSONB",  # Rules that triggered this signal
+            "context JSONB",  # Market context
+            "indicators_at_signal JSONB",  # Indicator values at signal time
+            "metadata JSONB",  # Additional metadata
+            # Per-row wall clock so rows inserted in one transaction stay ordered
+            "created_at TIMESTAMP WITH TIME ZONE DEFAULT clock_timestamp()",
+        ),
+        primary_key="id, signal_date",
+        partition_by="RANGE (signal_date)",
+        indexes=(
+            # Covering index for the symbol/date signal retrieval path
+            IndexSpec("idx_signal_results_symbol_date_cov", "symbol, signal_date",
+                      include=("action", "strength", "score"),
+                      replaces="idx_signal_results_symbol_date"),
+            # BRIN for time-window scans on the append-only table
+            IndexSpec("idx_signal_results_time_brin", "signal_time",
+                      method="brin", with_params="pages_per_range = 32"),
+            IndexSpec("idx_signal_results_action_strength", "action, strength"),
+            IndexSpec("idx_signal_results_analysis_result", "analysis_result_id"),
+        ),
+    ),
+    # 5. Analysis Experiments Table (for tracking different config combinations)
+    TableSpec(
+        name="analysis_experiments",
+        columns=(
+            "id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY",
+            "name VARCHAR(255) NOT NULL",
+            "description TEXT",
+            "indicator_config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "scoring_config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "analysis_config_id INTEGER REFERENCES stockai.analysis_configurations(id)",
+            "experiment_type stockai.experiment_kind DEFAULT 'backtest'",
+            "status stockai.experiment_status DEFAULT 'active'",
+            "start_date DATE",
+            "end_date DATE",
+            "symbols TEXT[]",  # Array of symbols to test
+            "results_summary JSONB",
+            "created_by VARCHAR(100)",
+            "created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()",
+            "updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()",
+        ),
+        checks=(
+            ("chk_analysis_experiments_date_range", "end_date >= start_date"),
+        ),
+    ),
+)
+
+
+@lru_cache(maxsize=None)
+def _render(spec: TableSpec) -> str:
+    """Render the CREATE TABLE statement for a table spec"""
+    lines = list(spec.columns)
+    if spec.primary_key:
+        lines.append(f"PRIMARY KEY ({spec.primary_key})")
+    lines.extend(f"UNIQUE({columns})" for columns in spec.unique)
+    lines.extend(f"CONSTRAINT {name} CHECK ({expression})" for name, expression in spec.checks)
+    
+    body = ",\n    ".join(lines)
+    ddl = f"CREATE TABLE IF NOT EXISTS stockai.{spec.name} (\n    {body}\n)"
+    if spec.partition_by:
+        ddl += f" PARTITION BY {spec.partition_by}"
+    return ddl + ";"
+
+
+@lru_cache(maxsize=None)
+def _render_indexes(spec: TableSpec) -> Tuple[str, ...]:
+    """Render the CREATE INDEX statements for a table spec"""
+    statements = []
+    for index in spec.indexes:
+        if index.replaces:
+            statements.append(f"DROP INDEX IF EXISTS stockai.{index.replaces};")
+        using = f" USING {index.method.upper()}" if index.method != "btree" else ""
+        ddl = (
+            f"CREATE INDEX IF NOT EXISTS {index.name} "
+            f"ON stockai.{spec.name}{using} ({index.columns})"
+        )
+        if index.include:
+            ddl += f" INCLUDE ({', '.join(index.include)})"
+        if index.with_params:
+            ddl += f" WITH ({index.with_params})"
+        statements.append(ddl + ";")
+    return tuple(statements)
+
+
+def _upgrade_column_sql(table: str, column: str, type_name: str, default: Optional[str]) -> str:
+    """Render the type upgrade of one existing column"""
+    target = f"stockai.{table}"
+    alter = f"ALTER TABLE {target} ALTER COLUMN {column}"
+    # A default of the old type cannot be cast automatically
+    drop_default = f"{alter} DROP DEFAULT;" if default else ""
+    set_default = f"{alter} SET DEFAULT {default};" if default else ""
+    return f"""
+        DO $$ BEGIN
+            IF (SELECT atttypid FROM pg_attribute
+                WHERE attrelid = '{target}'::regclass AND attname = '{column}') <> '{type_name}'::regtype THEN
+                {drop_default}
+                {alter} TYPE {type_name} USING {column}::text::{type_name};
+                {set_default}
+            END IF;
+        END $$;
+    """
+
+
+def _upgrade_identity_sql(table: str) -> str:
+    """Render the SERIAL -> GENERATED ALWAYS AS IDENTITY upgrade of a table's id"""
+    target = f"stockai.{table}"
+    return f"""
+        DO $$
+        DECLARE
+            seq TEXT;
+        BEGIN
+            IF (SELECT attidentity FROM pg_attribute
+                WHERE attrelid = '{target}'::regclass AND attname = 'id') = '' THEN
+                seq := pg_get_serial_sequence('{target}', 'id');
+                ALTER TABLE {target} ALTER COLUMN id DROP DEFAULT;
+                IF seq IS NOT NULL THEN
+                    EXECUTE 'DROP SEQUENCE ' || seq;
+                END IF;
+                ALTER TABLE {target} ALTER COLUMN id ADD GENERATED ALWAYS AS IDENTITY;
+                PERFORM setval(pg_get_serial_sequence('{target}', 'id'),
+                               COALESCE((SELECT max(id) FROM {target}), 0) + 1, false);
+            END IF;
+        END $$;
+    """
+
+
+def _add_check_sql(table: str, name: str, expression: str) -> str:
+    """Render adding a CHECK constraint missing from an existing table
+    
+    Added NOT VALID: enforced for new rows without failing the bootstrap on
+    legacy rows that predate the constraint.
+    """
+    target = f"stockai.{table}"
+    return f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint
+                           WHERE conrelid = '{target}'::regclass AND conname = '{name}') THEN
+                ALTER TABLE {target} ADD CONSTRAINT {name} CHECK ({expression}) NOT VALID;
+            END IF;
+        END $$;
+    """
+
+
+async def _ensure_monthly_partition(session, year: int, month: int):
+    """Create the signal_results partition for the given month if missing"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
     
-    # Initialize database
-    db_manager = get_database_manager()
+    await session.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS stockai.signal_results_{year:04d}_{month:02d}
+        PARTITION OF stockai.signal_results
+        FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}');
+    """))
+
+
+async def create_modular_analysis_tables(quiet: bool = False):
+    """Create all modular analysis tables
+    
+    Args:
+        quiet: Skip the summary query and printout (for CI/cron runs)
+    """
+    
+    # Initialize a non-pooled database manager for this one-shot script
+    db_manager = get_database_manager(standalone=True)
     db_manager.initialize()
     
-    async with get_async_session() as session:
+    async with db_manager.get_async_session() as session:
         try:
-            # 1. Analysis Configurations Table
-            logger.info("Creating analysis_configurations table...")
-            await session.execute(text("""
-                CREATE TABLE IF NOT EXISTS stockai.analysis_configurations (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    config_type VARCHAR(50) NOT NULL, -- 'indicator', 'scoring', 'analysis'
-                    config_data JSONB NOT NULL,
-                    version VARCHAR(20) DEFAULT '1.0.0',
-                    is_active BOOLEAN DEFAULT true,
-                    created_by VARCHAR(100),
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(name, version)
-                );
-            """))
+            # Serialize concurrent bootstraps (e.g. several replicas starting at
+            # once); the lock is held until the single commit below
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                {"lock_id": SCHEMA_BOOTSTRAP_LOCK_ID}
+            )
             
-            # 2. Indicator Calculations Table
-            logger.info("Creating indicator_calculations table...")
-            await session.execute(text("""
-                CREATE TABLE IF NOT EXISTS stockai.indicator_calculations (
-                    id SERIAL PRIMARY KEY,
-                    symbol VARCHAR(10) NOT NULL,
-                    calculation_date DATE NOT NULL,
-                    config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    indicators JSONB NOT NULL, -- All calculated indicators
-                    data_points INTEGER NOT NULL,
-                    start_date DATE NOT NULL,
-                    end_date DATE NOT NULL,
-                    calculation_duration_ms INTEGER,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(symbol, calculation_date, config_id)
-                );
-            """))
+            # 0. Enumerated and domain types for constrained columns
+            logger.info("Creating enum and domain types...")
+            for type_name, labels in ENUM_TYPES.items():
+                values = ", ".join(f"'{label}'" for label in labels)
+                await session.execute(text(f"""
+                    DO $$ BEGIN
+                        CREATE TYPE stockai.{type_name} AS ENUM ({values});
+                    EXCEPTION WHEN duplicate_object THEN NULL;
+                    END $$;
+                """))
             
-            # 3. Analysis Results Table
-            logger.info("Creating analysis_results table...")
-            await session.execute(text("""
-                CREATE TABLE IF NOT EXISTS stockai.analysis_results (
-                    id SERIAL PRIMARY KEY,
-                    symbol VARCHAR(10) NOT NULL,
-                    analysis_date DATE NOT NULL,
-                    indicator_calculation_id INTEGER REFERENCES stockai.indicator_calculations(id),
-                    indicator_config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    scoring_config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    analysis_config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    total_signals INTEGER DEFAULT 0,
-                    buy_signals INTEGER DEFAULT 0,
-                    sell_signals INTEGER DEFAULT 0,
-                    hold_signals INTEGER DEFAULT 0,
-                    avg_score DECIMAL(10,2),
-                    max_score DECIMAL(10,2),
-                    min_score DECIMAL(10,2),
-                    analysis_duration_ms INTEGER,
-                    data_info JSONB, -- Dataset metadata
-                    summary JSONB, -- Analysis summary
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(symbol, analysis_date, indicator_config_id, scoring_config_id, analysis_config_id)
-                );
-            """))
+            for domain_name, definition in DOMAIN_TYPES.items():
+                await session.execute(text(f"""
+                    DO $$ BEGIN
+                        CREATE DOMAIN stockai.{domain_name} AS {definition};
+                    EXCEPTION WHEN duplicate_object THEN NULL;
+                    END $$;
+                """))
             
-            # 4. Signal Results Table
-            logger.info("Creating signal_results table...")
-            await session.execute(text("""
-                CREATE TABLE IF NOT EXISTS stockai.signal_results (
-                    id SERIAL PRIMARY KEY,
-                    analysis_result_id INTEGER REFERENCES stockai.analysis_results(id),
-                    symbol VARCHAR(10) NOT NULL,
-                    signal_date DATE NOT NULL,
-                    signal_time TIMESTAMP WITH TIME ZONE NOT NULL,
-                    action VARCHAR(10) NOT NULL, -- 'MUA', 'BÁN', 'THEO DÕI'
-                    strength VARCHAR(20) NOT NULL, -- 'WEAK', 'MEDIUM', 'STRONG', 'RẤT MẠNH'
-                    score DECIMAL(10,2) NOT NULL,
-                    description TEXT,
-                    triggered_rules JSONB, -- Rules that triggered this signal
-                    context JSONB, -- Market context
-                    indicators_at_signal JSONB, -- Indicator values at signal time
-                    metadata JSONB, -- Additional metadata
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                );
-            """))
+            # An unpartitioned signal_results from an earlier version cannot get
+            # partitions attached: stash its rows and recreate it partitioned
+            result = await session.execute(text(
+                "SELECT relkind::text FROM pg_class WHERE oid = to_regclass('stockai.signal_results')"
+            ))
+            migrate_signal_results = result.scalar() == 'r'
+            if migrate_signal_results:
+                logger.warning("signal_results is not partitioned, migrating it to the partitioned layout...")
+                await session.execute(text("""
+                    CREATE TEMP TABLE signal_results_legacy ON COMMIT DROP AS
+                    SELECT * FROM stockai.signal_results;
+                """))
+                await session.execute(text("DROP TABLE stockai.signal_results;"))
             
-            # 5. Analysis Experiments Table (for tracking different config combinations)
-            logger.info("Creating analysis_experiments table...")
-            await session.execute(text("""
-                CREATE TABLE IF NOT EXISTS stockai.analysis_experiments (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    indicator_config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    scoring_config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    analysis_config_id INTEGER REFERENCES stockai.analysis_configurations(id),
-                    experiment_type VARCHAR(50) DEFAULT 'backtest', -- 'backtest', 'live', 'optimization'
-                    status VARCHAR(20) DEFAULT 'active', -- 'active', 'completed', 'failed'
-                    start_date DATE,
-                    end_date DATE,
-                    symbols TEXT[], -- Array of symbols to test
-                    results_summary JSONB,
-                    created_by VARCHAR(100),
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                );
-            """))
+            # 1-5. Tables (configurations, indicator calculations, analysis
+            # results, signal results, experiments)
+            for spec in TABLE_SPECS:
+                logger.info(f"Creating {spec.name} table...")
+                await session.execute(text(_render(spec)))
             
-            # Create indexes for performance
-            logger.info("Creating indexes...")
+            # Bring tables created by earlier versions up to the current
+            # definitions (identity ids, BIGINT keys, enums, REAL scores,
+            # symbol domain, CHECK constraints); no-ops on fresh tables
+            logger.info("Upgrading existing tables...")
+            for table in IDENTITY_UPGRADES:
+                await session.execute(text(_upgrade_identity_sql(table)))
+            for table, column, type_name, default in COLUMN_UPGRADES:
+                await session.execute(text(_upgrade_column_sql(table, column, type_name, default)))
+            for spec in TABLE_SPECS:
+                for name, expression in spec.checks:
+                    await session.execute(text(_add_check_sql(spec.name, name, expression)))
             
-            # Indexes for indicator_calculations
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_indicator_calculations_symbol_date 
-                ON stockai.indicator_calculations(symbol, calculation_date);
-            """))
-            
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_indicator_calculations_config 
-                ON stockai.indicator_calculations(config_id);
-            """))
+            # Monthly partitions covering the default lookback window, plus a
+            # default partition for signals outside of it
+            today = date.today()
+            for offset in range(-PARTITION_MONTHS_BACK, PARTITION_MONTHS_AHEAD + 1):
+                month_index = today.year * 12 + today.month - 1 + offset
+                await _ensure_monthly_partition(session, month_index // 12, month_index % 12 + 1)
             
-            # Indexes for analysis_results
             await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_analysis_results_symbol_date 
-                ON stockai.analysis_results(symbol, analysis_date);
+                CREATE TABLE IF NOT EXISTS stockai.signal_results_default
+                PARTITION OF stockai.signal_results DEFAULT;
             """))
             
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_analysis_results_configs 
-                ON stockai.analysis_results(indicator_config_id, scoring_config_id, analysis_config_id);
-            """))
+            if migrate_signal_results:
+                # Rows outside the monthly window land in the default partition
+                await session.execute(text(f"""
+                    INSERT INTO stockai.signal_results ({SIGNAL_RESULTS_COPY})
+                    OVERRIDING SYSTEM VALUE
+                    SELECT id, analysis_result_id, symbol, signal_date, signal_time,
+                           action::text::stockai.signal_action,
+                           strength::text::stockai.signal_strength,
+                           score::real, description, triggered_rules, context,
+                           indicators_at_signal, metadata, created_at
+                    FROM signal_results_legacy;
+                """))
+                await session.execute(text("""
+                    SELECT setval(pg_get_serial_sequence('stockai.signal_results', 'id'),
+                                  COALESCE((SELECT max(id) FROM stockai.signal_results), 0) + 1, false);
+                """))
+                logger.info("✅ signal_results migrated to the partitioned layout")
             
-            # Indexes for signal_results
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_signal_results_symbol_date 
-                ON stockai.signal_results(symbol, signal_date);
-            """))
+            # JSONB storage tuning: lz4 TOAST compression where the server
+            # supports it (PostgreSQL 14+), small metadata kept inline
+            logger.info("Tuning JSONB column storage...")
+            for statement in JSONB_STORAGE_TUNING:
+                await session.execute(text(f"""
+                    DO $$ BEGIN
+                        EXECUTE '{statement}';
+                    EXCEPTION WHEN syntax_error OR feature_not_supported OR invalid_parameter_value THEN
+                        RAISE NOTICE 'Skipped storage tuning: %', SQLERRM;
+                    END $$;
+                """))
             
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_signal_results_action_strength 
-                ON stockai.signal_results(action, strength);
-            """))
-            
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_signal_results_analysis_result 
-                ON stockai.signal_results(analysis_result_id);
-            """))
-            
-            # Indexes for analysis_configurations
-            await session.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_analysis_configurations_type_active 
-                ON stockai.analysis_configurations(config_type, is_active);
-            """))
+            # Create indexes for performance
+            logger.info("Creating indexes...")
+            for spec in TABLE_SPECS:
+                for statement in _render_indexes(spec):
+                    await session.execute(text(statement))
             
             # Insert default configurations
             logger.info("Inserting default configurations...")
             
-            # Default Indicator Configuration
-            await session.execute(text("""
-                INSERT INTO stockai.analysis_configurations (name, description, config_type, config_data, version, is_active, created_by)
-                VALUES (
-                    'Default Indicator Config',
-                    'Default technical indicator configuration',
-                    'indicator',
-                    '{
-                        "ma_short": 9,
-                        "ma_long": 50,
-                        "ma_medium": 20,
-                        "rsi_period": 14,
-                        "rsi_overbought": 70,
-                        "rsi_oversold": 30,
-                        "macd_fast": 12,
-                        "macd_slow": 26,
-                        "macd_signal": 9,
-                        "bb_period": 20,
-                        "bb_std": 2.0,
-                        "volume_avg_period": 20,
-                        "volume_spike_multiplier": 1.8,
-                        "ichimoku_tenkan": 9,
-                        "ichimoku_kijun": 26,
-                        "ichimoku_senkou_b": 52,
-                        "obv_divergence_lookback": 30,
-                        "squeeze_lookback": 120
-                    }',
-                    '1.0.0',
-                    true,
-                    'system'
-                ) ON CONFLICT (name, version) DO NOTHING;
-            """))
-            
-            # Default Scoring Configuration
-            await session.execute(text("""
-                INSERT INTO stockai.analysis_configurations (name, description, config_type, config_data, version, is_active, created_by)
-                VALUES (
-                    'Default Scoring Config',
-                    'Default scoring configuration',
-                    'scoring',
-                    '{
-                        "strong_threshold": 75.0,
-                        "medium_threshold": 25.0,
-                        "weak_threshold": 10.0,
-                        "buy_strong_threshold": -75.0,
-                        "buy_medium_threshold": -25.0,
-                        "sell_medium_threshold": 25.0,
-                        "sell_strong_threshold": 75.0,
-                        "context_multipliers": {
-                            "uptrend_buy": 1.5,
-                            "uptrend_sell": 0.5,
-                            "downtrend_sell": 1.5,
-                            "downtrend_buy": 0.5,
-                            "sideways": 0.7
-                        },
-                        "rule_weights": {
-                            "STRONG": 3.0,
-                            "MEDIUM": 2.0,
-                            "WEAK": 1.0
-                        }
-                    }',
-                    '1.0.0',
-                    true,
-                    'system'
-                ) ON CONFLICT (name, version) DO NOTHING;
-            """))
-            
-            # Default Analysis Configuration
+            # config_data is bound as JSONB so the dicts are sent through the
+            # driver's binary jsonb codec rather than cast from text
             await session.execute(text("""
                 INSERT INTO stockai.analysis_configurations (name, description, config_type, config_data, version, is_active, created_by)
-                VALUES (
-                    'Default Analysis Config',
-                    'Default analysis configuration',
-                    'analysis',
-                    '{
-                        "min_score_threshold": 10.0,
-                        "lookback_days": 365,
-                        "signal_generation_enabled": true,
-                        "context_analysis_enabled": true,
-                        "export_enabled": true
-                    }',
-                    '1.0.0',
-                    true,
-                    'system'
-                ) ON CONFLICT (name, version) DO NOTHING;
-            """))
+                VALUES (:name, :description, :config_type, :config_data, :version, :is_active, :created_by)
+                ON CONFLICT (name, version) DO NOTHING;
+            """).bindparams(bindparam("config_data", type_=JSONB)), DEFAULT_CONFIGURATIONS)
             
             await session.commit()
             logger.info("✅ All modular analysis tables created successfully!")
             
             # Print table summary
-            await print_table_summary(session)
+            if not quiet:
+                await print_table_summary(session)
             
         except Exception as e:
             await session.rollback()
@@ -285,6 +598,8 @@ async def create_modular_analysis_tables():
             raise
         finally:
             await session.close()
+    
+    await db_manager.close_async()
 
 
 async def print_table_summary(session):
@@ -324,4 +639,8 @@ async def print_table_summary(session):
 
 
 if __name__ == '__main__':
-    asyncio.run(create_modular_analysis_tables())
+    parser = argparse.ArgumentParser(description="Create modular analysis tables")
+    parser.add_argument("--quiet", action="store_true", help="Skip the table summary output")
+    args = parser.parse_args()
+    
+    asyncio.run(create_modular_analysis_tables(quiet=args.quiet))
@@ -16,12 +16,14 @@ import sys
 from pathlib import Path
 from typing import List, Dict, Any
 
+from sqlalchemy import text
+
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from database.api.database import initialize_database_async, get_database_manager
-from database.schema import get_all_models, get_timescale_tables
+from database.schema import get_all_models
 from fastapi.func.vn100_fetcher import VN100Fetcher
 
 # Setup logging
@@ -31,12 +33,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Parallel maintenance workers per view refresh backend
+REFRESH_PARALLEL_WORKERS = 4
+
+# Hypertables the continuous aggregates are built on
+AGGREGATE_SOURCE_TABLES = {'stockai.stock_prices', 'stockai.foreign_trades'}
+
+# Seed batches at or above this size are loaded with COPY instead of INSERT
+COPY_THRESHOLD = 100
+
+def _drop_relation_sql(name: str, relkind: str, drop: str) -> str:
+    """DROP stockai.<name> only if it exists with the given pg_class.relkind
+    
+    DROP VIEW / DROP MATERIALIZED VIEW fail on the other kind even with
+    IF EXISTS, so summary relations switching between the two are dropped
+    by kind.
+    """
+    return f"""
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'stockai' AND c.relname = '{name}' AND c.relkind = '{relkind}'
+        ) THEN
+            DROP {drop} stockai.{name};
+        END IF;
+    END $$;
+    """
+
 class DatabaseInitializer:
     """Database initialization class"""
     
     def __init__(self):
         self.db_manager = None
         self.vn100_fetcher = VN100Fetcher()
+        # Set in initialize(): summary views use continuous aggregates only
+        # when their source tables really are hypertables
+        self.use_continuous_aggregates = False
     
     async def initialize(self) -> None:
         """Initialize database"""
@@ -53,24 +87,38 @@ class DatabaseInitializer:
             # Setup TimescaleDB
             await self.setup_timescaledb()
             
+            await self.detect_continuous_aggregates()
+            
             # Seed VN100 data
             await self.seed_vn100_data()
             
-            # Create indexes
-            await self.create_additional_indexes()
-            
-            # Create materialized views
+            # Views and functions first: their DDL transactions read (and for
+            # continuous aggregates lock) the tables being indexed, and a
+            # concurrent index build would only wait for them to commit
             await self.create_materialized_views()
-            
-            # Create functions
             await self.create_functions()
             
+            # The index builds run concurrently among themselves
+            await self.create_additional_indexes()
+            
+            # Continuous aggregates are created WITH NO DATA; materialize them
+            # (or re-materialize the plain views) once before first use
+            await self.refresh_materialized_views()
+            
             logger.info("🎉 Database initialization completed successfully!")
             
         except Exception as e:
             logger.error(f"❌ Database initialization failed: {str(e)}")
             raise
     
+    async def detect_continuous_aggregates(self) -> bool:
+        """Use continuous aggregates only if their source tables are hypertables"""
+        self.use_continuous_aggregates = (
+            self.db_manager.config.timescale_enabled
+            and AGGREGATE_SOURCE_TABLES <= await self.db_manager.get_hypertables_async()
+        )
+        return self.use_continuous_aggregates
+    
     async def create_tables(self) -> None:
         """Create all database tables"""
         try:
@@ -90,10 +138,11 @@ class DatabaseInitializer:
         try:
             logger.info("⏰ Setting up TimescaleDB...")
             
-            # TimescaleDB setup is already done in database manager
-            # This is just for logging
-            hypertables = get_timescale_tables()
-            logger.info(f"✅ TimescaleDB setup completed for {len(hypertables)} hypertables")
+            # Compression is defined by the database manager and only applied
+            # to tables that timescaledb_information.hypertables lists
+            compressed = await self.db_manager.setup_compression_async()
+            
+            logger.info(f"✅ TimescaleDB setup completed, compression enabled for {len(compressed)} hypertables")
             
         except Exception as e:
             logger.error(f"❌ Failed to setup TimescaleDB: {str(e)}")
@@ -114,26 +163,23 @@ class DatabaseInitializer:
             # Load industry mapping
             industry_map = self.vn100_fetcher.load_industry_mapping()
             
+            # Invert the manual sector mapping once for O(1) fallback lookups
+            symbol_to_sector = {
+                symbol: sector_name
+                for sector_name, symbols in vn100_by_sector.items()
+                for symbol in symbols
+            }
+            
+            # Tier by rank: top 30, next 30, then the rest
+            tiers = ["Tier 1"] * 30 + ["Tier 2"] * 30 + ["Tier 3"] * (len(vn100_symbols) - 60)
+            
             # Create stocks data
             stocks_data = []
-            for i, symbol in enumerate(vn100_symbols, 1):
-                # Determine tier
-                if i <= 30:
-                    tier = "Tier 1"
-                elif i <= 60:
-                    tier = "Tier 2"
-                else:
-                    tier = "Tier 3"
-                
-                # Get sector from industry mapping
+            for symbol, tier in zip(vn100_symbols, tiers):
+                # Get sector from industry mapping, falling back to manual sector mapping
                 sector = industry_map.get(symbol, "Other")
-                
-                # Fallback to manual sector mapping
                 if sector == "Other":
-                    for sector_name, symbols in vn100_by_sector.items():
-                        if symbol in symbols:
-                            sector = sector_name
-                            break
+                    sector = symbol_to_sector.get(symbol, "Other")
                 
                 stock_data = {
                     'symbol': symbol,
@@ -151,30 +197,51 @@ class DatabaseInitializer:
             async with self.db_manager.get_async_session() as session:
                 stock_repo = RepositoryFactory.create_stock_repository(session)
                 
-                # Insert stocks in batches
-                batch_size = 50
+                # Seed data is idempotent to re-run, so skip the WAL flush wait;
+                # all batches share this one transaction and commit once
+                await session.execute(text("SET LOCAL synchronous_commit = off"))
+                
+                # A fresh schema has nothing to deduplicate against, so one
+                # probe lets every batch skip the existence checks
+                has_any = (await session.execute(
+                    text("SELECT 1 FROM stockai.stocks LIMIT 1")
+                )).scalar()
+                
+                # Insert stocks in batches sized so that full batches take the
+                # COPY path; only a short final batch falls back to INSERT
+                batch_size = COPY_THRESHOLD
                 for i in range(0, len(stocks_data), batch_size):
                     batch = stocks_data[i:i + batch_size]
                     try:
-                        # Check if stocks already exist
-                        existing_symbols = []
-                        for stock_data in batch:
-                            existing = await stock_repo.get_by_symbol(stock_data['symbol'])
-                            if existing:
-                                existing_symbols.append(stock_data['symbol'])
+                        # A savepoint per batch keeps a failed batch from
+                        # aborting the shared transaction
+                        async with session.begin_nested():
+                            if not has_any:
+                                # Empty table: COPY straight in
+                                inserted_count = await stock_repo.copy_batch(batch, commit=False)
+                            elif len(batch) >= COPY_THRESHOLD:
+                                # Large batches: filter existing symbols, then COPY the rest
+                                existing_symbols = await stock_repo.get_existing_symbols(
+                                    [s['symbol'] for s in batch]
+                                )
+                                new_batch = [s for s in batch if s['symbol'] not in existing_symbols]
+                                inserted_count = await stock_repo.copy_batch(new_batch, commit=False)
+                            else:
+                                # Insert atomically, letting Postgres skip existing symbols
+                                inserted_count = len(
+                                    await stock_repo.bulk_upsert_ignore(batch, commit=False)
+                                )
                         
-                        # Filter out existing symbols
-                        new_batch = [s for s in batch if s['symbol'] not in existing_symbols]
-                        
-                        if new_batch:
-                            await stock_repo.create_batch(new_batch)
-                            logger.info(f"✅ Inserted {len(new_batch)} stocks (batch {i//batch_size + 1})")
+                        if inserted_count:
+                            logger.info(f"✅ Inserted {inserted_count} stocks (batch {i//batch_size + 1})")
                         else:
                             logger.info(f"⏭️ Skipped batch {i//batch_size + 1} - all stocks already exist")
                             
                     except Exception as e:
                         logger.warning(f"⚠️ Failed to insert batch {i//batch_size + 1}: {str(e)}")
                         continue
+                
+                await session.commit()
             
             logger.info(f"✅ VN100 data seeding completed - {len(stocks_data)} stocks processed")
             
@@ -187,25 +254,56 @@ class DatabaseInitializer:
         try:
             logger.info("📊 Creating additional indexes...")
             
-            async with self.db_manager.get_async_session() as session:
-                # Additional indexes for better performance
-                indexes = [
-                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_stock_prices_symbol_date ON stockai.stock_prices (symbol, DATE(time));",
-                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_foreign_trades_symbol_date ON stockai.foreign_trades (symbol, DATE(time));",
-                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_stock_statistics_symbol_date ON stockai.stock_statistics (symbol, date);",
-                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_stocks_sector_tier ON stockai.stocks (sector, market_cap_tier);",
-                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_stock_prices_volume ON stockai.stock_prices (volume DESC) WHERE volume > 0;",
-                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_foreign_trades_net_volume ON stockai.foreign_trades (net_volume DESC) WHERE net_volume != 0;"
-                ]
-                
-                for index_sql in indexes:
-                    try:
-                        await session.execute(index_sql)
-                        logger.info(f"✅ Created index: {index_sql.split('idx_')[1].split(' ')[0]}")
-                    except Exception as e:
-                        logger.warning(f"⚠️ Failed to create index: {str(e)}")
-                
-                await session.commit()
+            # Additional indexes for better performance: (name, table, definition)
+            indexes = [
+                ("idx_stock_prices_symbol_time_desc", "stockai.stock_prices", "(symbol, time DESC)"),
+                ("idx_foreign_trades_symbol_time_desc", "stockai.foreign_trades", "(symbol, time DESC)"),
+                ("idx_stock_statistics_symbol_date", "stockai.stock_statistics", "(symbol, date)"),
+                ("idx_stocks_sector_tier", "stockai.stocks", "(sector, market_cap_tier)"),
+                # Matches the views' is_active filter; named apart from the
+                # model's plain idx_stocks_active so IF NOT EXISTS still builds it
+                ("idx_stocks_active_sector_tier", "stockai.stocks",
+                 "(id, sector, market_cap_tier) WHERE is_active = true"),
+                ("idx_stock_prices_volume", "stockai.stock_prices", "(volume DESC) WHERE volume > 0"),
+                ("idx_foreign_trades_net_volume", "stockai.foreign_trades",
+                 "(net_volume DESC) WHERE net_volume != 0")
+            ]
+            
+            # Superseded (symbol, DATE(time)) expression indexes, keyed by the
+            # index that replaces them; each is dropped only once its
+            # replacement exists
+            obsolete_indexes = {
+                "idx_stock_prices_symbol_time_desc": "idx_stock_prices_symbol_date",
+                "idx_foreign_trades_symbol_time_desc": "idx_foreign_trades_symbol_date"
+            }
+            
+            # TimescaleDB rejects CREATE INDEX CONCURRENTLY on hypertables
+            hypertables = await self.db_manager.get_hypertables_async()
+            engine = self.db_manager.get_async_engine()
+            
+            async def _create_index(index_name: str, table_name: str, definition: str) -> bool:
+                concurrently = "" if table_name in hypertables else "CONCURRENTLY "
+                index_sql = f"CREATE INDEX {concurrently}IF NOT EXISTS {index_name} ON {table_name} {definition};"
+                # CREATE INDEX CONCURRENTLY cannot run inside a transaction block,
+                # so each build gets its own autocommit connection
+                try:
+                    async with engine.connect() as conn:
+                        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                        await conn.execute(text(index_sql))
+                    logger.info(f"✅ Created index: {index_name}")
+                    return True
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to create index {index_name}: {str(e)}")
+                    return False
+            
+            # Independent index builds overlap their table scans
+            created = await asyncio.gather(*(_create_index(*index) for index in indexes))
+            
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                for (index_name, _, _), ok in zip(indexes, created):
+                    if ok and index_name in obsolete_indexes:
+                        await conn.execute(text(f"DROP INDEX IF EXISTS stockai.{obsolete_indexes[index_name]};"))
             
             logger.info("✅ Additional indexes created")
             
@@ -218,7 +316,16 @@ class DatabaseInitializer:
         try:
             logger.info("👁️ Creating materialized views...")
             
+            if self.use_continuous_aggregates:
+                await self.create_continuous_aggregates()
+                logger.info("✅ Continuous aggregates and summary views created")
+                return
+            
             async with self.db_manager.get_async_session() as session:
+                # Replace plain views left by an earlier continuous-aggregate setup
+                for view in ('daily_summary', 'sector_performance'):
+                    await session.execute(text(_drop_relation_sql(view, 'v', 'VIEW')))
+                
                 # Daily summary materialized view
                 daily_summary_sql = """
                 CREATE MATERIALIZED VIEW IF NOT EXISTS stockai.daily_summary AS
@@ -241,24 +348,26 @@ class DatabaseInitializer:
                     ft.sell_value,
                     ft.net_value,
                     CASE 
-                        WHEN LAG(sp.close) OVER (PARTITION BY s.symbol ORDER BY sp.time) IS NOT NULL 
-                        THEN ROUND(((sp.close - LAG(sp.close) OVER (PARTITION BY s.symbol ORDER BY sp.time)) / LAG(sp.close) OVER (PARTITION BY s.symbol ORDER BY sp.time)) * 100, 2)
-                        ELSE NULL 
+                        WHEN sp.prev_close IS NULL THEN NULL
+                        ELSE ROUND(((sp.close - sp.prev_close) / sp.prev_close) * 100, 2)
                     END as daily_return_pct
                 FROM stockai.stocks s
-                JOIN stockai.stock_prices sp ON s.id = sp.stock_id
-                LEFT JOIN stockai.foreign_trades ft ON s.id = ft.stock_id AND sp.time::date = ft.time::date
-                WHERE s.is_active = true
-                ORDER BY s.symbol, sp.time DESC;
+                JOIN (
+                    -- Evaluate the LAG window once per row
+                    SELECT *, LAG(close) OVER (PARTITION BY stock_id ORDER BY time) AS prev_close
+                    FROM stockai.stock_prices
+                ) sp ON s.id = sp.stock_id
+                LEFT JOIN stockai.foreign_trades ft ON s.id = ft.stock_id AND ft.time >= sp.time::date AND ft.time < sp.time::date + 1
+                WHERE s.is_active = true;
                 """
                 
-                await session.execute(daily_summary_sql)
+                await session.execute(text(daily_summary_sql))
                 
                 # Create unique index on materialized view
-                await session.execute("""
+                await session.execute(text("""
                     CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_summary_symbol_date 
                     ON stockai.daily_summary(symbol, date);
-                """)
+                """))
                 
                 # Sector performance view
                 sector_performance_sql = """
@@ -273,19 +382,36 @@ class DatabaseInitializer:
                     sp.time::date as date
                 FROM stockai.stocks s
                 JOIN stockai.stock_prices sp ON s.id = sp.stock_id
-                LEFT JOIN stockai.foreign_trades ft ON s.id = ft.stock_id AND sp.time::date = ft.time::date
+                LEFT JOIN stockai.foreign_trades ft ON s.id = ft.stock_id AND ft.time >= sp.time::date AND ft.time < sp.time::date + 1
                 WHERE s.is_active = true
-                GROUP BY s.sector, sp.time::date
-                ORDER BY s.sector, sp.time::date DESC;
+                GROUP BY s.sector, sp.time::date;
                 """
                 
-                await session.execute(sector_performance_sql)
+                await session.execute(text(sector_performance_sql))
+                
+                # An older setup created this index as non-unique; CREATE ... IF NOT
+                # EXISTS would keep it, and CONCURRENTLY refresh needs it unique
+                await session.execute(text("""
+                    DO $$
+                    BEGIN
+                        IF EXISTS (
+                            SELECT 1 FROM pg_index i
+                            JOIN pg_class c ON c.oid = i.indexrelid
+                            JOIN pg_namespace n ON n.oid = c.relnamespace
+                            WHERE n.nspname = 'stockai'
+                              AND c.relname = 'idx_sector_performance_sector_date'
+                              AND NOT i.indisunique
+                        ) THEN
+                            DROP INDEX stockai.idx_sector_performance_sector_date;
+                        END IF;
+                    END $$;
+                """))
                 
                 # Create index on sector performance view
-                await session.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_sector_performance_sector_date 
+                await session.execute(text("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_sector_performance_sector_date 
                     ON stockai.sector_performance(sector, date);
-                """)
+                """))
                 
                 await session.commit()
             
@@ -295,24 +421,178 @@ class DatabaseInitializer:
             logger.error(f"❌ Failed to create materialized views: {str(e)}")
             raise
     
+    async def create_continuous_aggregates(self) -> None:
+        """Create TimescaleDB continuous aggregates backing the summary views
+        
+        Continuous aggregates cannot contain window functions or outer joins,
+        so each hypertable gets its own daily rollup; daily_summary and
+        sector_performance become plain views joining the (much smaller)
+        rollups. Refresh policies materialize only recently changed buckets.
+        """
+        async with self.db_manager.get_async_session() as session:
+            # daily_summary/sector_performance may exist as materialized views
+            # (docker init script, or a setup without TimescaleDB); they become
+            # plain views below, which CREATE OR REPLACE VIEW cannot convert
+            for view in ('daily_summary', 'sector_performance'):
+                await session.execute(text(_drop_relation_sql(view, 'm', 'MATERIALIZED VIEW')))
+            
+            # Daily OHLCV rollup of stock_prices
+            await session.execute(text("""
+                CREATE MATERIALIZED VIEW IF NOT EXISTS stockai.daily_prices_1d
+                WITH (timescaledb.continuous) AS
+                SELECT 
+                    stock_id,
+                    time_bucket(INTERVAL '1 day', time) AS day,
+                    first(open, time) AS open,
+                    max(high) AS high,
+                    min(low) AS low,
+                    last(close, time) AS close,
+                    sum(volume) AS volume,
+                    sum(value) AS value
+                FROM stockai.stock_prices
+                GROUP BY stock_id, day
+                WITH NO DATA;
+            """))
+            
+            # Daily rollup of foreign_trades
+            await session.execute(text("""
+                CREATE MATERIALIZED VIEW IF NOT EXISTS stockai.daily_foreign_1d
+                WITH (timescaledb.continuous) AS
+                SELECT 
+                    stock_id,
+                    time_bucket(INTERVAL '1 day', time) AS day,
+                    sum(buy_volume) AS buy_volume,
+                    sum(sell_volume) AS sell_volume,
+                    sum(net_volume) AS net_volume,
+                    sum(buy_value) AS buy_value,
+                    sum(sell_value) AS sell_value,
+                    sum(net_value) AS net_value
+                FROM stockai.foreign_trades
+                GROUP BY stock_id, day
+                WITH NO DATA;
+            """))
+            
+            for aggregate in ('stockai.daily_prices_1d', 'stockai.daily_foreign_1d'):
+                await session.execute(text(f"""
+                    SELECT add_continuous_aggregate_policy('{aggregate}',
+                        start_offset => INTERVAL '7 days',
+                        end_offset => INTERVAL '1 hour',
+                        schedule_interval => INTERVAL '1 hour',
+                        if_not_exists => TRUE);
+                """))
+            
+            # Summary views over the rollups
+            await session.execute(text("""
+                CREATE OR REPLACE VIEW stockai.daily_summary AS
+                SELECT 
+                    s.symbol,
+                    s.name,
+                    s.exchange,
+                    s.sector,
+                    p.day::date as date,
+                    p.open,
+                    p.high,
+                    p.low,
+                    p.close,
+                    p.volume,
+                    p.value,
+                    f.buy_volume,
+                    f.sell_volume,
+                    f.net_volume,
+                    f.buy_value,
+                    f.sell_value,
+                    f.net_value,
+                    CASE 
+                        WHEN p.prev_close IS NULL THEN NULL
+                        ELSE ROUND(((p.close - p.prev_close) / p.prev_close) * 100, 2)
+                    END as daily_return_pct
+                FROM stockai.stocks s
+                JOIN (
+                    SELECT *, LAG(close) OVER (PARTITION BY stock_id ORDER BY day) AS prev_close
+                    FROM stockai.daily_prices_1d
+                ) p ON s.id = p.stock_id
+                LEFT JOIN stockai.daily_foreign_1d f ON f.stock_id = p.stock_id AND f.day = p.day
+                WHERE s.is_active = true;
+            """))
+            
+            await session.execute(text("""
+                CREATE OR REPLACE VIEW stockai.sector_performance AS
+                SELECT 
+                    s.sector,
+                    COUNT(DISTINCT s.symbol) as stock_count,
+                    AVG(p.close) as avg_price,
+                    SUM(p.volume) as total_volume,
+                    SUM(p.value) as total_value,
+                    AVG(f.net_volume) as avg_net_foreign_volume,
+                    p.day::date as date
+                FROM stockai.stocks s
+                JOIN stockai.daily_prices_1d p ON s.id = p.stock_id
+                LEFT JOIN stockai.daily_foreign_1d f ON f.stock_id = p.stock_id AND f.day = p.day
+                WHERE s.is_active = true
+                GROUP BY s.sector, p.day;
+            """))
+            
+            await session.commit()
+    
+    async def refresh_materialized_views(self) -> None:
+        """Refresh summary views, one backend per view in parallel
+        
+        Also available from the command line: init_database.py --refresh-views
+        """
+        if self.use_continuous_aggregates:
+            # refresh_continuous_aggregate cannot run inside a transaction block
+            statements = [
+                "CALL refresh_continuous_aggregate('stockai.daily_prices_1d', NULL, NULL);",
+                "CALL refresh_continuous_aggregate('stockai.daily_foreign_1d', NULL, NULL);"
+            ]
+        else:
+            statements = [
+                "REFRESH MATERIALIZED VIEW CONCURRENTLY stockai.daily_summary;",
+                "REFRESH MATERIALIZED VIEW CONCURRENTLY stockai.sector_performance;"
+            ]
+        
+        engine = self.db_manager.get_async_engine()
+        
+        async def _refresh(statement: str) -> None:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text(f"SET max_parallel_maintenance_workers = {REFRESH_PARALLEL_WORKERS};"))
+                try:
+                    await conn.execute(text(statement))
+                finally:
+                    # The connection goes back to the shared pool
+                    await conn.execute(text("RESET max_parallel_maintenance_workers;"))
+        
+        await asyncio.gather(*(_refresh(statement) for statement in statements))
+        logger.info("✅ Summary views refreshed")
+    
     async def create_functions(self) -> None:
         """Create database functions"""
         try:
             logger.info("🔧 Creating database functions...")
             
             async with self.db_manager.get_async_session() as session:
-                # Function to refresh materialized views
-                refresh_views_sql = """
-                CREATE OR REPLACE FUNCTION stockai.refresh_materialized_views()
-                RETURNS void AS $$
-                BEGIN
-                    REFRESH MATERIALIZED VIEW CONCURRENTLY stockai.daily_summary;
-                    REFRESH MATERIALIZED VIEW CONCURRENTLY stockai.sector_performance;
-                END;
-                $$ LANGUAGE plpgsql;
-                """
-                
-                await session.execute(refresh_views_sql)
+                # Materialized views are refreshed in parallel from Python
+                # (refresh_materialized_views / --refresh-views); the SQL
+                # function stays for cron and other external callers.
+                # Continuous aggregates are kept current by their policies, and
+                # REFRESH on the plain summary views would fail, so the refresh
+                # functions are dropped on that path.
+                if self.use_continuous_aggregates:
+                    refresh_views_sql = """
+                    DROP FUNCTION IF EXISTS stockai.refresh_materialized_views();
+                    DROP FUNCTION IF EXISTS stockai.refresh_daily_summary();
+                    """
+                else:
+                    refresh_views_sql = """
+                    CREATE OR REPLACE FUNCTION stockai.refresh_materialized_views()
+                    RETURNS void AS $$
+                    BEGIN
+                        REFRESH MATERIALIZED VIEW CONCURRENTLY stockai.daily_summary;
+                        REFRESH MATERIALIZED VIEW CONCURRENTLY stockai.sector_performance;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                    """
                 
                 # Function to get stock performance
                 stock_performance_sql = """
@@ -342,16 +622,17 @@ class DatabaseInitializer:
                         sp.volume,
                         ft.net_volume
                     FROM stockai.stock_prices sp
-                    LEFT JOIN stockai.foreign_trades ft ON sp.symbol = ft.symbol AND sp.time::date = ft.time::date
+                    LEFT JOIN stockai.foreign_trades ft ON sp.symbol = ft.symbol AND ft.time >= sp.time::date AND ft.time < sp.time::date + 1
                     WHERE sp.symbol = p_symbol
+                      -- Bound the scan so only recent chunks are read; the margin
+                      -- covers weekends/holidays between p_days trading sessions
+                      AND sp.time > now() - make_interval(days => p_days * 2 + 7)
                     ORDER BY sp.time DESC
                     LIMIT p_days;
                 END;
                 $$ LANGUAGE plpgsql;
                 """
                 
-                await session.execute(stock_performance_sql)
-                
                 # Function to get sector statistics
                 sector_stats_sql = """
                 CREATE OR REPLACE FUNCTION stockai.get_sector_statistics(p_sector VARCHAR(100))
@@ -374,14 +655,21 @@ class DatabaseInitializer:
                         AVG(ft.net_volume) as avg_net_foreign_volume
                     FROM stockai.stocks s
                     JOIN stockai.stock_prices sp ON s.id = sp.stock_id
-                    LEFT JOIN stockai.foreign_trades ft ON s.id = ft.stock_id AND sp.time::date = ft.time::date
+                    LEFT JOIN stockai.foreign_trades ft ON s.id = ft.stock_id AND ft.time >= sp.time::date AND ft.time < sp.time::date + 1
                     WHERE s.sector = p_sector AND s.is_active = true
                     GROUP BY s.sector;
                 END;
                 $$ LANGUAGE plpgsql;
                 """
                 
-                await session.execute(sector_stats_sql)
+                # asyncpg prepares every statement it is given and rejects
+                # multi-command strings, so send the whole script through the
+                # driver's simple-query protocol in a single round trip
+                conn = await session.connection()
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.execute(
+                    refresh_views_sql + "\n" + stock_performance_sql + "\n" + sector_stats_sql
+                )
                 
                 await session.commit()
             
@@ -468,8 +756,23 @@ async def init_database():
     initializer = DatabaseInitializer()
     await initializer.initialize()
 
+async def refresh_views():
+    """Refresh the summary views of an initialized database"""
+    initializer = DatabaseInitializer()
+    initializer.db_manager = get_database_manager()
+    initializer.db_manager.initialize()
+    await initializer.detect_continuous_aggregates()
+    try:
+        await initializer.refresh_materialized_views()
+    finally:
+        await initializer.db_manager.close_async()
+
 async def main():
     """Main function"""
+    if "--refresh-views" in sys.argv[1:]:
+        await refresh_views()
+        return
+    
     try:
         initializer = DatabaseInitializer()
         await initializer.initialize()
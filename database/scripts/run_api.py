@@ -12,6 +12,7 @@ Version: 1.0.0
 
 import asyncio
 import logging
+import os
 import sys
 import uvicorn
 from pathlib import Path
@@ -37,7 +38,10 @@ def main():
         # Configuration
         host = "0.0.0.0"
         port = 8000
-        reload = True
+        # Auto-reload is a development aid only; it runs a file watcher and
+        # cannot be combined with multiple workers
+        reload = os.getenv("API_RELOAD") == "1"
+        workers = 1 if reload else int(os.getenv("API_WORKERS", "4"))
         log_level = "info"
         
         logger.info(f"📡 API will be available at: http://{host}:{port}")
@@ -49,6 +53,9 @@ def main():
             "database.api.fastapi_app:app",
             host=host,
             port=port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
             reload=reload,
             log_level=log_level,
             access_log=True
@@ -2,7 +2,7 @@
 """
 Wipe All Data - Danger Zone
 
-This script deletes all data from core StockAI tables:
+This script truncates all core StockAI tables:
 - stockai.stock_prices
 - stockai.foreign_trades
 - stockai.stock_statistics
@@ -27,18 +27,16 @@ def wipe_all() -> None:
     db.initialize()
     engine = db.get_engine()
 
-    stmts = [
-        # Order matters because of FKs; child tables first
-        "DELETE FROM stockai.stock_prices;",
-        "DELETE FROM stockai.foreign_trades;",
-        "DELETE FROM stockai.stock_statistics;",
-        "DELETE FROM stockai.vn100_history;",
-        "DELETE FROM stockai.vn100_current;",
-    ]
+    # Single atomic TRUNCATE; hypertable chunks are dropped instead of
+    # rewritten row by row, and listing every table avoids FK ordering
+    stmt = (
+        "TRUNCATE TABLE stockai.stock_prices, stockai.foreign_trades, "
+        "stockai.stock_statistics, stockai.vn100_history, stockai.vn100_current "
+        "RESTART IDENTITY;"
+    )
 
     with engine.connect() as conn:
-        for stmt in stmts:
-            conn.execute(text(stmt))
+        conn.execute(text(stmt))
         conn.commit()
 
 
@@ -5,100 +5,276 @@ Batch Analysis Example
 Ví dụ phân tích hàng loạt nhiều mã cổ phiếu
 """
 
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from analytis.analysis_engine import AnalysisEngine, AnalysisConfig
 from analytis.engines.indicator_engine import IndicatorConfig
 from analytis.engines.scoring_engine import ScoringConfig
+from analytis.data.loader import load_ohlcv_daily
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import asyncio
+import dataclasses
+from dataclasses import dataclass
+from typing import Optional
+import functools
 import json
+import logging
+import numpy as np
+import pandas as pd
 
+# orjson (có trong requirements_database.txt) nhanh hơn json chuẩn nhiều lần
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+# numba là tùy chọn; không có thì njit chỉ trả lại hàm Python gốc
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# joblib là tùy chọn; có thì kết quả phân tích được cache trên đĩa giữa các lần chạy
+try:
+    from joblib import Memory
+    _memory = Memory(location=".cache/analytis", verbose=0)
+except ImportError:
+    _memory = None
+
+# Đặt biến môi trường này (--no-cache) để bỏ qua cache trên đĩa; dùng biến môi
+# trường để các process con cũng thấy
+NO_CACHE_ENV = "ANALYTIS_NO_CACHE"
+
+def disk_cache(func=None, cache_if=None, **kwargs):
+    """joblib Memory.cache nếu có joblib, bỏ qua khi NO_CACHE_ENV được đặt
+    
+    Kết quả không thỏa cache_if (nếu có) bị xóa khỏi đĩa ngay sau khi trả về,
+    để lần chạy sau tính lại thay vì dùng lại kết quả lỗi.
+    """
+    if func is None:
+        return lambda f: disk_cache(f, cache_if=cache_if, **kwargs)
+    if _memory is None:
+        return func
+    cached = _memory.cache(func, **kwargs)
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        if os.environ.get(NO_CACHE_ENV):
+            return func(*args, **kw)
+        result = cached(*args, **kw)
+        if cache_if is not None and not cache_if(result):
+            # Kết quả đã nằm trong cache nên call_and_shelve không tính lại
+            cached.call_and_shelve(*args, **kw).clear()
+        return result
+    return wrapper
+
+def _has_data(result):
+    """Chỉ cache kết quả phân tích có dữ liệu và không lỗi"""
+    return bool(result.data_info.get('total_rows')) and not result.data_info.get('error')
+
+# Tiến độ đi qua logging để có thể tắt bằng verbose=False
+log = logging.getLogger(__name__)
+
+# Thư mục ghi kết quả, tính một lần khi load module
+_OUT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Buffer 1 MiB để ghi các file kết quả lớn với ít syscall hơn
+_WRITE_BUFFER = 1 << 20
+
+class NDJSONWriter:
+    """Ghi từng kết quả thành một dòng JSON ngay khi có (NDJSON).
+    
+    Dùng như context manager; flush sau mỗi flush_every bản ghi để tiến độ
+    không mất khi script dừng giữa chừng.
+    """
+    
+    def __init__(self, path, flush_every=10):
+        self.path = path
+        self.flush_every = flush_every
+        self._count = 0
+        self._file = None
+    
+    def __enter__(self):
+        self._file = open(self.path, 'wb', buffering=_WRITE_BUFFER)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        return False
+    
+    def write(self, record, **extra):
+        # Trường bổ sung (vd. tên cấu hình) được gộp vào cùng dòng
+        if extra:
+            record = {**dataclasses.asdict(record), **extra}
+        if orjson_available:
+            line = orjson.dumps(record) + b"\n"
+        else:
+            line = (json.dumps(record, ensure_ascii=False, default=dataclasses.asdict) + "\n").encode('utf-8')
+        self._file.write(line)
+        self._count += 1
+        if self._count % self.flush_every == 0:
+            self._file.flush()
+
+@dataclass(slots=True)
+class SymbolResult:
+    """Kết quả phân tích một mã"""
+    symbol: str
+    success: bool
+    signals_count: int = 0
+    data_points: int = 0
+    error: str = ""
+    analysis_result_id: Optional[int] = None
+
+@functools.lru_cache(maxsize=1)
 def get_vn100_symbols():
     """Lấy danh sách mã VN100"""
-    # Danh sách mẫu VN100
-    return [
+    # Danh sách mẫu VN100 (tuple để bản cache không bị sửa)
+    return (
         "ACB", "BCM", "BID", "BVH", "CTG", "FPT", "GAS", "GVR", "HDB", "HPG",
         "MBB", "MSN", "MWG", "PLX", "POW", "PDR", "PVD", "SAB", "SSI", "TCB",
         "TPB", "VCB", "VHM", "VIC", "VJC", "VNM", "VPB", "VRE", "VSH", "VTO"
-    ]
+    )
+
+@njit(cache=True)
+def _summarize(counts):
+    """Tổng và trung bình số tín hiệu"""
+    total = counts.sum()
+    mean = total / counts.size
+    return total, mean
+
+def _top_k(counts, k):
+    """Chỉ số k phần tử lớn nhất, giảm dần (O(N) thay vì sắp xếp toàn bộ)"""
+    k = min(k, counts.size)
+    idx = np.argpartition(-counts, k - 1)[:k]
+    return idx[np.argsort(-counts[idx])]
+
+async def fetch_all_ohlcv(symbols, start_date, end_date):
+    """Tải đồng thời dữ liệu OHLCV của nhiều mã.
+    
+    Trả về dict mã -> DataFrame, hoặc Exception nếu mã đó tải lỗi.
+    """
+    # Các truy vấn chạy song song trên connection pool thay vì lần lượt
+    start = pd.to_datetime(start_date)
+    end = pd.to_datetime(end_date)
+    frames = await asyncio.gather(
+        *(load_ohlcv_daily(symbol, start, end) for symbol in symbols),
+        return_exceptions=True
+    )
+    return dict(zip(symbols, frames))
+
+def config_key(config):
+    """Khóa cache ổn định cho một AnalysisConfig"""
+    return repr(dataclasses.asdict(config))
+
+@disk_cache(ignore=['engine'], cache_if=_has_data)
+def _cached_analyze(engine, symbol, start_date, end_date, config_repr):
+    """analyze_symbol có cache theo (mã, khoảng thời gian, cấu hình)"""
+    return engine.analyze_symbol(symbol=symbol, start_date=start_date, end_date=end_date)
+
+_worker_engine = None
+_worker_config_key = None
+
+def _init_worker(config):
+    """Tạo engine một lần cho mỗi process con"""
+    global _worker_engine, _worker_config_key
+    _worker_engine = AnalysisEngine(config)
+    _worker_config_key = config_key(config)
 
-def analyze_batch_basic():
+def _analyze_one(symbol, start_date, end_date):
+    """Phân tích một mã trong process con (không bao giờ raise)"""
+    # Engine được tạo trong _init_worker vì không pickle được; chỉ config
+    # được gửi sang process con
+    try:
+        result = _cached_analyze(
+            _worker_engine, symbol, start_date, end_date, _worker_config_key
+        )
+        return SymbolResult(
+            symbol=symbol,
+            success=True,
+            signals_count=len(result.signals),
+            data_points=result.data_info['total_rows']
+        )
+    except Exception as e:
+        return SymbolResult(
+            symbol=symbol,
+            success=False,
+            error=str(e)
+        )
+
+def analyze_batch_basic(engine=None, writer=None, verbose=True):
     """Phân tích hàng loạt cơ bản"""
+    log.setLevel(logging.INFO if verbose else logging.WARNING)
     
-    symbols = get_vn100_symbols()[:10]  # 10 mã đầu tiên
-    engine = AnalysisEngine()
+    symbols = list(get_vn100_symbols()[:10])  # 10 mã đầu tiên
+    config = engine.config if engine else AnalysisConfig()
     
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=90)
+    start_iso = start_date.isoformat()
+    end_iso = end_date.isoformat()
     
-    print(f"=== Phân tích hàng loạt cơ bản ===")
-    print(f"Thời gian: {start_date} đến {end_date}")
-    print(f"Số mã: {len(symbols)}")
+    log.info(f"=== Phân tích hàng loạt cơ bản ===")
+    log.info(f"Thời gian: {start_date} đến {end_date}")
+    log.info(f"Số mã: {len(symbols)}")
     
     results = []
-    
-    for i, symbol in enumerate(symbols, 1):
-        print(f"\n[{i}/{len(symbols)}] Phân tích {symbol}...")
-        
-        try:
-            result = engine.analyze_symbol(
-                symbol=symbol,
-                start_date=start_date.isoformat(),
-                end_date=end_date.isoformat()
-            )
-            
-            results.append({
-                'symbol': symbol,
-                'success': True,
-                'signals_count': len(result.signals),
-                'data_points': result.data_info['total_rows'],
-                'latest_signal': result.signals[-1] if result.signals else None
-            })
-            
-            print(f"  ✅ Thành công: {len(result.signals)} tín hiệu")
-            
-        except Exception as e:
-            results.append({
-                'symbol': symbol,
-                'success': False,
-                'error': str(e)
-            })
-            print(f"  ❌ Lỗi: {e}")
+    n = len(symbols)
+    
+    # Mỗi mã độc lập và tốn CPU, chia đều cho các process
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             initializer=_init_worker, initargs=(config,)) as ex:
+        for i, result in enumerate(
+            ex.map(_analyze_one, symbols,
+                   [start_iso] * n, [end_iso] * n),
+            1
+        ):
+            results.append(result)
+            if writer:
+                writer.write(result)
+            log.info(f"\n[{i}/{n}] {result.symbol}:")
+            if result.success:
+                log.info(f"  ✅ Thành công: {result.signals_count} tín hiệu")
+            else:
+                log.warning(f"  ❌ Lỗi: {result.error}")
     
     # Tóm tắt kết quả
-    print(f"\n=== Tóm tắt kết quả ===")
-    successful = [r for r in results if r['success']]
-    failed = [r for r in results if not r['success']]
+    log.info(f"\n=== Tóm tắt kết quả ===")
+    successful = [r for r in results if r.success]
+    failed = [r for r in results if not r.success]
     
-    print(f"Thành công: {len(successful)}/{len(results)}")
-    print(f"Thất bại: {len(failed)}")
+    log.info(f"Thành công: {len(successful)}/{len(results)}")
+    log.info(f"Thất bại: {len(failed)}")
     
     if successful:
-        total_signals = sum(r['signals_count'] for r in successful)
-        avg_signals = total_signals / len(successful)
-        print(f"Tổng tín hiệu: {total_signals}")
-        print(f"Trung bình tín hiệu/mã: {avg_signals:.1f}")
+        counts = np.fromiter((r.signals_count for r in successful), dtype=np.int64,
+                             count=len(successful))
+        total_signals, avg_signals = _summarize(counts)
+        log.info(f"Tổng tín hiệu: {total_signals}")
+        log.info(f"Trung bình tín hiệu/mã: {avg_signals:.1f}")
         
         # Top 5 mã có nhiều tín hiệu nhất
-        top_signals = sorted(successful, key=lambda x: x['signals_count'], reverse=True)[:5]
-        print(f"\nTop 5 mã có nhiều tín hiệu:")
+        top_signals = [successful[i] for i in _top_k(counts, 5)]
+        log.info(f"\nTop 5 mã có nhiều tín hiệu:")
         for r in top_signals:
-            print(f"- {r['symbol']}: {r['signals_count']} tín hiệu")
+            log.info(f"- {r.symbol}: {r.signals_count} tín hiệu")
     
     if failed:
-        print(f"\nMã thất bại:")
+        log.info(f"\nMã thất bại:")
         for r in failed:
-            print(f"- {r['symbol']}: {r['error']}")
+            log.info(f"- {r.symbol}: {r.error}")
     
     return results
 
-def analyze_batch_with_configs():
+async def analyze_batch_with_configs(writer=None, verbose=True):
     """Phân tích hàng loạt với nhiều cấu hình"""
+    log.setLevel(logging.INFO if verbose else logging.WARNING)
     
-    symbols = get_vn100_symbols()[:5]  # 5 mã đầu tiên
+    symbols = list(get_vn100_symbols()[:5])  # 5 mã đầu tiên
     
     # Cấu hình 1: Nhạy cảm
     config1 = AnalysisConfig(
@@ -123,257 +299,297 @@ def analyze_batch_with_configs():
     
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=120)
+    start_iso = start_date.isoformat()
+    end_iso = end_date.isoformat()
     
-    print(f"\n=== Phân tích hàng loạt với nhiều cấu hình ===")
-    print(f"Thời gian: {start_date} đến {end_date}")
-    print(f"Số mã: {len(symbols)}")
-    print(f"Số cấu hình: {len(configs)}")
+    log.info(f"\n=== Phân tích hàng loạt với nhiều cấu hình ===")
+    log.info(f"Thời gian: {start_date} đến {end_date}")
+    log.info(f"Số mã: {len(symbols)}")
+    log.info(f"Số cấu hình: {len(configs)}")
     
-    all_results = {}
+    # Dữ liệu giá tải một lần cho tất cả các mã, dùng chung giữa các cấu hình
+    frames = await fetch_all_ohlcv(symbols, start_iso, end_iso)
     
-    for config_name, config in configs:
-        print(f"\n--- Cấu hình: {config_name} ---")
+    async def analyze_one_config(config_name, config):
+        """Phân tích tất cả các mã với một cấu hình"""
         engine = AnalysisEngine(config)
         config_results = []
         
-        for i, symbol in enumerate(symbols, 1):
-            print(f"[{i}/{len(symbols)}] {symbol}...")
+        def record(result):
+            config_results.append(result)
+            if writer:
+                writer.write(result, config=config_name)
+        
+        for symbol in symbols:
+            df = frames[symbol]
+            if isinstance(df, Exception):
+                record(SymbolResult(
+                    symbol=symbol,
+                    success=False,
+                    error=str(df)
+                ))
+                log.warning(f"  ❌ {config_name} {symbol}: {df}")
+                continue
             
             try:
-                result = engine.analyze_symbol(
-                    symbol=symbol,
-                    start_date=start_date.isoformat(),
-                    end_date=end_date.isoformat()
-                )
+                # analyze_frame tốn CPU; chạy trong thread để các cấu hình chạy song song
+                result = await asyncio.to_thread(engine.analyze_frame, df, symbol)
                 
-                config_results.append({
-                    'symbol': symbol,
-                    'success': True,
-                    'signals_count': len(result.signals),
-                    'data_points': result.data_info['total_rows'],
-                    'summary': result.signal_summary
-                })
+                record(SymbolResult(
+                    symbol=symbol,
+                    success=True,
+                    signals_count=len(result.signals),
+                    data_points=result.data_info.get('total_rows', 0)
+                ))
                 
-                print(f"  ✅ {len(result.signals)} tín hiệu")
+                log.info(f"  ✅ {config_name} {symbol}: {len(result.signals)} tín hiệu")
                 
             except Exception as e:
-                config_results.append({
-                    'symbol': symbol,
-                    'success': False,
-                    'error': str(e)
-                })
-                print(f"  ❌ {e}")
+                record(SymbolResult(
+                    symbol=symbol,
+                    success=False,
+                    error=str(e)
+                ))
+                log.warning(f"  ❌ {config_name} {symbol}: {e}")
         
-        all_results[config_name] = config_results
+        return config_results
+    
+    # Các cấu hình độc lập nên chạy đồng thời
+    config_results = await asyncio.gather(
+        *(analyze_one_config(config_name, config) for config_name, config in configs)
+    )
+    all_results = dict(zip([config_name for config_name, _ in configs], config_results))
     
     # So sánh kết quả
-    print(f"\n=== So sánh kết quả ===")
+    log.info(f"\n=== So sánh kết quả ===")
     
     for config_name, results in all_results.items():
-        successful = [r for r in results if r['success']]
+        successful = [r for r in results if r.success]
         if successful:
-            total_signals = sum(r['signals_count'] for r in successful)
-            avg_signals = total_signals / len(successful)
-            print(f"\n{config_name}:")
-            print(f"- Thành công: {len(successful)}/{len(results)}")
-            print(f"- Tổng tín hiệu: {total_signals}")
-            print(f"- Trung bình: {avg_signals:.1f}")
+            counts = np.fromiter((r.signals_count for r in successful), dtype=np.int64,
+                                 count=len(successful))
+            total_signals, avg_signals = _summarize(counts)
+            log.info(f"\n{config_name}:")
+            log.info(f"- Thành công: {len(successful)}/{len(results)}")
+            log.info(f"- Tổng tín hiệu: {total_signals}")
+            log.info(f"- Trung bình: {avg_signals:.1f}")
             
             # Top 3 mã
-            top = sorted(successful, key=lambda x: x['signals_count'], reverse=True)[:3]
-            print(f"- Top 3: {', '.join(f'{r['symbol']}({r['signals_count']})' for r in top)}")
+            top = [successful[i] for i in _top_k(counts, 3)]
+            top_str = ', '.join(f"{r.symbol}({r.signals_count})" for r in top)
+            log.info(f"- Top 3: {top_str}")
     
     return all_results
 
-def analyze_batch_async():
+async def analyze_batch_async(engine=None, writer=None, verbose=True):
     """Phân tích hàng loạt bất đồng bộ"""
+    log.setLevel(logging.INFO if verbose else logging.WARNING)
     
-    symbols = get_vn100_symbols()[:10]
-    engine = AnalysisEngine()
+    symbols = list(get_vn100_symbols()[:10])
+    engine = engine or AnalysisEngine()
     
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=90)
+    start_iso = start_date.isoformat()
+    end_iso = end_date.isoformat()
     
-    print(f"\n=== Phân tích hàng loạt bất đồng bộ ===")
-    print(f"Thời gian: {start_date} đến {end_date}")
-    print(f"Số mã: {len(symbols)}")
+    log.info(f"\n=== Phân tích hàng loạt bất đồng bộ ===")
+    log.info(f"Thời gian: {start_date} đến {end_date}")
+    log.info(f"Số mã: {len(symbols)}")
+    
+    # Dữ liệu giá tải trên event loop đang chạy: connection asyncpg gắn với
+    # loop tạo ra nó, nên các thread không được tự tải qua asyncio.run riêng
+    frames = await fetch_all_ohlcv(symbols, start_iso, end_iso)
+    
+    # analyze_frame tốn CPU; chạy trong thread riêng, semaphore giới hạn số mã
+    # chạy cùng lúc
+    sem = asyncio.Semaphore(16)
     
     async def analyze_symbol_async(symbol):
         """Phân tích một mã bất đồng bộ"""
         try:
-            result = engine.analyze_symbol(
+            df = frames[symbol]
+            if isinstance(df, Exception):
+                raise df
+            async with sem:
+                result = await asyncio.to_thread(engine.analyze_frame, df, symbol)
+            return SymbolResult(
                 symbol=symbol,
-                start_date=start_date.isoformat(),
-                end_date=end_date.isoformat()
+                success=True,
+                signals_count=len(result.signals),
+                data_points=result.data_info.get('total_rows', 0)
             )
-            return {
-                'symbol': symbol,
-                'success': True,
-                'signals_count': len(result.signals),
-                'data_points': result.data_info['total_rows']
-            }
         except Exception as e:
-            return {
-                'symbol': symbol,
-                'success': False,
-                'error': str(e)
-            }
+            return SymbolResult(
+                symbol=symbol,
+                success=False,
+                error=str(e)
+            )
     
     async def run_batch_async():
         """Chạy phân tích hàng loạt bất đồng bộ"""
-        tasks = [analyze_symbol_async(symbol) for symbol in symbols]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # analyze_symbol_async không raise, gather trả kết quả theo thứ tự mã
+        results = await asyncio.gather(
+            *(analyze_symbol_async(symbol) for symbol in symbols)
+        )
         
         # Xử lý kết quả
         processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append({
-                    'symbol': symbols[i],
-                    'success': False,
-                    'error': str(result)
-                })
-            else:
-                processed_results.append(result)
+        for result in results:
+            processed_results.append(result)
+            if writer:
+                writer.write(result)
         
         return processed_results
     
     # Chạy phân tích
-    results = asyncio.run(run_batch_async())
+    results = await run_batch_async()
     
     # Hiển thị kết quả
-    successful = [r for r in results if r['success']]
-    failed = [r for r in results if not r['success']]
+    successful = [r for r in results if r.success]
+    failed = [r for r in results if not r.success]
     
-    print(f"\nKết quả:")
-    print(f"Thành công: {len(successful)}/{len(results)}")
-    print(f"Thất bại: {len(failed)}")
+    log.info(f"\nKết quả:")
+    log.info(f"Thành công: {len(successful)}/{len(results)}")
+    log.info(f"Thất bại: {len(failed)}")
     
     if successful:
-        total_signals = sum(r['signals_count'] for r in successful)
-        avg_signals = total_signals / len(successful)
-        print(f"Tổng tín hiệu: {total_signals}")
-        print(f"Trung bình: {avg_signals:.1f}")
+        counts = np.fromiter((r.signals_count for r in successful), dtype=np.int64,
+                             count=len(successful))
+        total_signals, avg_signals = _summarize(counts)
+        log.info(f"Tổng tín hiệu: {total_signals}")
+        log.info(f"Trung bình: {avg_signals:.1f}")
     
     return results
 
-def analyze_batch_with_database():
+async def analyze_batch_with_database(writer=None, verbose=True):
     """Phân tích hàng loạt với lưu trữ database"""
+    log.setLevel(logging.INFO if verbose else logging.WARNING)
     
     try:
         from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
         
-        symbols = get_vn100_symbols()[:5]
+        symbols = list(get_vn100_symbols()[:5])
         
         async def run_batch_db():
             engine = DatabaseIntegratedAnalysisEngine()
             
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=90)
+            start_iso = start_date.isoformat()
+            end_iso = end_date.isoformat()
             
-            print(f"\n=== Phân tích hàng loạt với database ===")
-            print(f"Thời gian: {start_date} đến {end_date}")
-            print(f"Số mã: {len(symbols)}")
-            
-            results = []
+            log.info(f"\n=== Phân tích hàng loạt với database ===")
+            log.info(f"Thời gian: {start_date} đến {end_date}")
+            log.info(f"Số mã: {len(symbols)}")
             
+            # Phân tích từng mã, chưa ghi database
+            analyses = []
             for i, symbol in enumerate(symbols, 1):
-                print(f"[{i}/{len(symbols)}] {symbol}...")
+                log.info(f"[{i}/{len(symbols)}] {symbol}...")
+                
+                analysis = await engine.analyze_symbol_no_commit(
+                    symbol=symbol,
+                    start_date=start_iso,
+                    end_date=end_iso
+                )
+                analyses.append(analysis)
                 
-                try:
-                    result = await engine.analyze_symbol(
-                        symbol=symbol,
-                        start_date=start_date.isoformat(),
-                        end_date=end_date.isoformat()
-                    )
-                    
-                    results.append({
-                        'symbol': symbol,
-                        'success': True,
-                        'signals_count': len(result.signals),
-                        'analysis_result_id': result.analysis_result_id
-                    })
-                    
-                    print(f"  ✅ {len(result.signals)} tín hiệu (ID: {result.analysis_result_id})")
-                    
-                except Exception as e:
-                    results.append({
-                        'symbol': symbol,
-                        'success': False,
-                        'error': str(e)
-                    })
-                    print(f"  ❌ {e}")
+                error = analysis.data_info.get('error')
+                if error:
+                    log.warning(f"  ❌ {error}")
+                else:
+                    log.info(f"  ✅ {len(analysis.signals)} tín hiệu")
+            
+            # Ghi toàn bộ kết quả và tín hiệu trong một transaction; mã lưu
+            # thất bại được ghi lỗi vào metadata['error']
+            persist_error = None
+            try:
+                await engine.bulk_persist(analyses)
+                log.info(f"\n💾 Đã lưu kết quả vào database")
+            except Exception as e:
+                persist_error = str(e)
+                log.warning(f"\n❌ Lưu database thất bại: {e}")
+            
+            results = []
+            for analysis in analyses:
+                error = (analysis.data_info.get('error') or analysis.metadata.get('error')
+                         or persist_error)
+                if error:
+                    results.append(SymbolResult(
+                        symbol=analysis.symbol,
+                        success=False,
+                        error=error
+                    ))
+                else:
+                    results.append(SymbolResult(
+                        symbol=analysis.symbol,
+                        success=True,
+                        signals_count=len(analysis.signals),
+                        data_points=analysis.data_info.get('total_rows', 0),
+                        analysis_result_id=analysis.analysis_result_id
+                    ))
+                if writer:
+                    writer.write(results[-1])
             
             # Thống kê database
             stats = await engine.get_database_stats()
-            print(f"\nThống kê database sau phân tích:")
-            print(f"- Analysis Results: {stats.get('analysis_results', {}).get('total_analyses', 0)}")
-            print(f"- Signals: {stats.get('signals', {}).get('total_signals', 0)}")
+            log.info(f"\nThống kê database sau phân tích:")
+            log.info(f"- Analysis Results: {stats.get('analysis_results', {}).get('total_analyses', 0)}")
+            log.info(f"- Signals: {stats.get('signals', {}).get('total_signals', 0)}")
             
             return results
         
         # Chạy phân tích
-        results = asyncio.run(run_batch_db())
-        return results
+        return await run_batch_db()
         
     except ImportError:
-        print("Database engine không khả dụng, sử dụng engine thường")
-        return analyze_batch_basic()
+        log.warning("Database engine không khả dụng, sử dụng engine thường")
+        return analyze_batch_basic(writer=writer, verbose=verbose)
+
+async def _run_async_examples(engine, writer, verbose=True):
+    """Chạy các ví dụ bất đồng bộ trên cùng một event loop"""
+    results2 = await analyze_batch_with_configs(verbose=verbose)
+    results3 = await analyze_batch_async(engine, verbose=verbose)
+    results4 = await analyze_batch_with_database(writer, verbose=verbose)
+    return results2, results3, results4
 
 def export_results_to_json(results, filename="batch_analysis_results.json"):
     """Xuất kết quả ra file JSON"""
     
-    # Chuyển đổi kết quả thành JSON serializable
-    def serialize_result(result):
-        if result['success']:
-            return {
-                'symbol': result['symbol'],
-                'success': True,
-                'signals_count': result['signals_count'],
-                'data_points': result.get('data_points', 0)
-            }
-        else:
-            return {
-                'symbol': result['symbol'],
-                'success': False,
-                'error': result['error']
-            }
-    
-    # Xử lý kết quả
-    if isinstance(results, dict):
-        # Nhiều cấu hình
-        serialized = {}
-        for config_name, config_results in results.items():
-            serialized[config_name] = [serialize_result(r) for r in config_results]
+    # results là list SymbolResult (một cấu hình) hoặc dict tên cấu hình -> list;
+    # cả hai được mã hóa trực tiếp, không tạo bản sao dạng dict
+    output_path = os.path.join(_OUT_DIR, filename)
+    if orjson_available:
+        # orjson luôn ghi UTF-8 và tự mã hóa dataclass
+        with open(output_path, 'wb', buffering=_WRITE_BUFFER) as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     else:
-        # Một cấu hình
-        serialized = [serialize_result(r) for r in results]
-    
-    # Lưu file
-    output_path = os.path.join(os.path.dirname(__file__), filename)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(serialized, f, ensure_ascii=False, indent=2)
+        with open(output_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=dataclasses.asdict)
     
     print(f"\nKết quả đã được lưu vào: {output_path}")
     return output_path
 
-def main():
+def main(verbose=True):
     """Hàm chính"""
     
     print("=== Ví dụ phân tích hàng loạt ===")
     
     try:
-        # 1. Phân tích cơ bản
-        results1 = analyze_batch_basic()
+        # Một engine dùng chung cho các ví dụ cùng cấu hình mặc định
+        engine = AnalysisEngine()
         
-        # 2. Phân tích với nhiều cấu hình
-        results2 = analyze_batch_with_configs()
-        
-        # 3. Phân tích bất đồng bộ
-        results3 = analyze_batch_async()
+        # 1. Phân tích cơ bản
+        results1 = analyze_batch_basic(engine, verbose=verbose)
         
-        # 4. Phân tích với database (nếu có)
-        results4 = analyze_batch_with_database()
+        # 2. Phân tích với nhiều cấu hình, 3. bất đồng bộ và 4. với database
+        # (nếu có) dùng chung một event loop; kết quả database ghi NDJSON
+        ndjson_path = os.path.join(_OUT_DIR, "batch_database_results.ndjson")
+        with NDJSONWriter(ndjson_path) as writer:
+            results2, results3, results4 = asyncio.run(
+                _run_async_examples(engine, writer, verbose)
+            )
         
         # 5. Xuất kết quả
         export_results_to_json(results1, "batch_basic_results.json")
@@ -389,4 +605,15 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ví dụ phân tích hàng loạt")
+    parser.add_argument("--quiet", action="store_true", help="Chỉ in cảnh báo và lỗi")
+    parser.add_argument("--no-cache", action="store_true", help="Không dùng kết quả đã cache trên đĩa")
+    args = parser.parse_args()
+    
+    if args.no_cache:
+        os.environ[NO_CACHE_ENV] = "1"
+    
+    logging.basicConfig(format="%(message)s")
+    main(verbose=not args.quiet)
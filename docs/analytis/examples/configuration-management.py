@@ -7,13 +7,86 @@ Ví dụ quản lý cấu hình phân tích
 
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from analytis.analysis_engine import AnalysisEngine, AnalysisConfig
-from analytis.engines.indicator_engine import IndicatorConfig
+from analytis.engines.indicator_engine import IndicatorConfig, IndicatorEngine
 from analytis.engines.scoring_engine import ScoringConfig
+from analytis.data.loader import load_stock_data
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import dataclasses
+import functools
+import itertools
 import json
+import logging
+import logging.handlers
+import time
+import pandas as pd
+
+# orjson (có trong requirements_database.txt) nhanh hơn json chuẩn nhiều lần
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+# msgpack (có trong requirements_database.txt) cho file cấu hình nhị phân gọn và đọc nhanh hơn JSON
+try:
+    import msgpack
+    msgpack_available = True
+except ImportError:
+    msgpack_available = False
+
+# joblib là tùy chọn; không có thì lưới tham số được duyệt tuần tự
+try:
+    from joblib import Parallel, delayed
+    joblib_available = True
+except ImportError:
+    joblib_available = False
+
+# Tham số thuộc IndicatorConfig; các tham số còn lại nằm trực tiếp trên AnalysisConfig
+IND_FIELDS = {'ma_short', 'ma_long', 'rsi_period'}
+
+# Tiến độ kiểm thử/so sánh/tối ưu đi qua logging (được buffer trong __main__)
+log = logging.getLogger(__name__)
+
+# Cache dữ liệu giá trên đĩa để các lần chạy lại trong ngày không phải truy vấn DB
+_HISTORY_CACHE_DIR = os.path.join(".cache", "analytis", "history")
+_HISTORY_CACHE_TTL = 6 * 60 * 60
+
+# Đặt biến môi trường này (--no-cache) để luôn tải lại từ DB
+NO_CACHE_ENV = "ANALYTIS_NO_CACHE"
+
+# Khoảng dữ liệu chung cho cả kiểm thử và tối ưu; tối ưu chỉ cắt lấy phần cuối
+_HISTORY_DAYS = 120
+
+@functools.lru_cache(maxsize=8)
+def _load_history(symbol, start_iso, end_iso):
+    """Tải dữ liệu giá một lần cho mỗi (mã, khoảng thời gian)
+    
+    Dùng file cache trên đĩa nếu còn mới (theo mtime) và không bị tắt bằng
+    NO_CACHE_ENV, ngược lại tải từ DB rồi ghi lại. Không được sửa DataFrame trả về vì nó dùng chung giữa các lần gọi.
+    """
+    path = os.path.join(_HISTORY_CACHE_DIR, f"{symbol}_{start_iso}_{end_iso}.pkl")
+    
+    try:
+        if (not os.environ.get(NO_CACHE_ENV)
+                and time.time() - os.path.getmtime(path) < _HISTORY_CACHE_TTL):
+            return pd.read_pickle(path)
+    except OSError:
+        pass
+    
+    df = load_stock_data(symbol=symbol, start_date=start_iso, end_date=end_iso)
+    # Không lưu kết quả rỗng (lỗi DB, chưa có dữ liệu) để lần chạy sau tải lại
+    if not df.empty:
+        os.makedirs(_HISTORY_CACHE_DIR, exist_ok=True)
+        df.to_pickle(path)
+    return df
+
+def _history_window():
+    """(start, end) của khoảng dữ liệu chung"""
+    end_date = datetime.now().date()
+    return end_date - timedelta(days=_HISTORY_DAYS), end_date
 
 def create_custom_configs():
     """Tạo các cấu hình tùy chỉnh"""
@@ -163,150 +236,178 @@ def create_custom_configs():
     
     return configs
 
-def test_configurations():
-    """Kiểm thử các cấu hình"""
+def _run_one(task):
+    """Phân tích một cấu hình trong process con (phải ở mức module để pickle được)
+    
+    Dữ liệu giá được truyền vào nên process con không truy vấn DB.
+    """
+    
+    name, config, symbol, df = task
+    
+    try:
+        engine = AnalysisEngine(config)
+        result = engine.analyze_frame(df, symbol)
+        
+        latest = None
+        if result.signals:
+            signal = result.signals[-1]
+            latest = f"{signal.timestamp.date()} - {signal.action.value} {signal.strength.value}"
+        
+        return name, {
+            'success': True,
+            'signals_count': len(result.signals),
+            'data_points': result.data_info['total_rows'],
+            'summary': result.signal_summary,
+            'latest': latest
+        }
+        
+    except Exception as e:
+        return name, {
+            'success': False,
+            'error': str(e)
+        }
+
+def test_configurations(configs):
+    """Kiểm thử các cấu hình (mỗi cấu hình chạy trong một process riêng)"""
     
-    configs = create_custom_configs()
     symbol = "PDR"
     
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=120)
+    start_date, end_date = _history_window()
+    
+    log.info(f"\n=== Kiểm thử cấu hình ===")
+    log.info(f"Mã: {symbol}")
+    log.info(f"Thời gian: {start_date} đến {end_date}")
+    
+    # Tải dữ liệu một lần ở process cha rồi gửi cho các process con
+    df = _load_history(symbol, start_date.isoformat(), end_date.isoformat())
     
-    print(f"\n=== Kiểm thử cấu hình ===")
-    print(f"Mã: {symbol}")
-    print(f"Thời gian: {start_date} đến {end_date}")
+    # Các cấu hình độc lập nhau và phân tích chủ yếu là tính toán số,
+    # nên chạy song song bằng process để không bị GIL giới hạn
+    tasks = [(name, config, symbol, df) for name, config in configs.items()]
     
     results = {}
+    with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+        for name, result in executor.map(_run_one, tasks):
+            results[name] = result
     
     for name, config in configs.items():
-        print(f"\n--- {name.upper()} ---")
-        print(f"Tên: {config.name}")
-        print(f"Mô tả: {config.description}")
+        result = results[name]
+        log.info(f"\n--- {name.upper()} ---")
+        log.info(f"Tên: {config.name}")
+        log.info(f"Mô tả: {config.description}")
         
-        try:
-            engine = AnalysisEngine(config)
-            result = engine.analyze_symbol(
-                symbol=symbol,
-                start_date=start_date.isoformat(),
-                end_date=end_date.isoformat()
-            )
-            
-            results[name] = {
-                'success': True,
-                'signals_count': len(result.signals),
-                'data_points': result.data_info['total_rows'],
-                'summary': result.signal_summary
-            }
-            
-            print(f"✅ Thành công: {len(result.signals)} tín hiệu")
-            
-            if result.signals:
-                summary = result.signal_summary
-                print(f"  - Mua: {summary['buy_signals']}, Bán: {summary['sell_signals']}")
-                print(f"  - Mạnh: {summary['strong_signals']}, Trung bình: {summary['medium_signals']}")
-                print(f"  - Điểm TB: {summary['avg_score']:.2f}")
-                
-                # Tín hiệu gần nhất
-                latest = result.signals[-1]
-                print(f"  - Gần nhất: {latest.timestamp.date()} - {latest.action.value} {latest.strength.value}")
+        if not result['success']:
+            log.info(f"❌ Lỗi: {result['error']}")
+            continue
+        
+        log.info(f"✅ Thành công: {result['signals_count']} tín hiệu")
+        
+        if result['signals_count']:
+            summary = result['summary']
+            log.info(f"  - Mua: {summary['buy_signals']}, Bán: {summary['sell_signals']}")
+            log.info(f"  - Mạnh: {summary['strong_signals']}, Trung bình: {summary['medium_signals']}")
+            log.info(f"  - Điểm TB: {summary['avg_score']:.2f}")
             
-        except Exception as e:
-            results[name] = {
-                'success': False,
-                'error': str(e)
-            }
-            print(f"❌ Lỗi: {e}")
+            # Tín hiệu gần nhất
+            log.info(f"  - Gần nhất: {result['latest']}")
     
     return results
 
-def compare_configurations():
-    """So sánh các cấu hình"""
+def compare_configurations(results):
+    """So sánh các cấu hình (dùng kết quả từ test_configurations)"""
     
-    results = test_configurations()
+    log.info(f"\n=== So sánh cấu hình ===")
     
-    print(f"\n=== So sánh cấu hình ===")
-    
-    # Tạo bảng so sánh
-    print(f"{'Cấu hình':<15} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5} {'Mạnh':<5} {'Điểm TB':<10}")
-    print("-" * 70)
+    # Tạo bảng so sánh rồi ghi ra một lần
+    rows = [
+        f"{'Cấu hình':<15} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5} {'Mạnh':<5} {'Điểm TB':<10}",
+        "-" * 70
+    ]
     
     for name, result in results.items():
         if result['success']:
             summary = result['summary']
-            print(f"{name:<15} {result['signals_count']:<10} {summary['buy_signals']:<5} {summary['sell_signals']:<5} {summary['strong_signals']:<5} {summary['avg_score']:<10.2f}")
+            rows.append(f"{name:<15} {result['signals_count']:<10} {summary['buy_signals']:<5} {summary['sell_signals']:<5} {summary['strong_signals']:<5} {summary['avg_score']:<10.2f}")
         else:
-            print(f"{name:<15} {'LỖI':<10} {'-':<5} {'-':<5} {'-':<5} {'-':<10}")
+            rows.append(f"{name:<15} {'LỖI':<10} {'-':<5} {'-':<5} {'-':<5} {'-':<10}")
+    
+    log.info("\n".join(rows))
     
     # Phân tích
-    print(f"\n=== Phân tích ===")
+    log.info(f"\n=== Phân tích ===")
     
     successful_results = {k: v for k, v in results.items() if v['success']}
     
     if successful_results:
-        # Cấu hình có nhiều tín hiệu nhất
-        most_signals = max(successful_results.items(), key=lambda x: x[1]['signals_count'])
-        print(f"Nhiều tín hiệu nhất: {most_signals[0]} ({most_signals[1]['signals_count']} tín hiệu)")
+        # Tìm cả bốn cực trị trong một lần duyệt
+        most_signals = least_signals = highest_score = most_strong = None
         
-        # Cấu hình có ít tín hiệu nhất
-        least_signals = min(successful_results.items(), key=lambda x: x[1]['signals_count'])
-        print(f"Ít tín hiệu nhất: {least_signals[0]} ({least_signals[1]['signals_count']} tín hiệu)")
-        
-        # Cấu hình có điểm trung bình cao nhất
-        highest_score = max(successful_results.items(), key=lambda x: x[1]['summary']['avg_score'])
-        print(f"Điểm cao nhất: {highest_score[0]} ({highest_score[1]['summary']['avg_score']:.2f})")
+        for name, result in successful_results.items():
+            signals_count = result['signals_count']
+            avg_score = result['summary']['avg_score']
+            strong_signals = result['summary']['strong_signals']
+            
+            if most_signals is None or signals_count > most_signals[1]:
+                most_signals = (name, signals_count)
+            if least_signals is None or signals_count < least_signals[1]:
+                least_signals = (name, signals_count)
+            if highest_score is None or avg_score > highest_score[1]:
+                highest_score = (name, avg_score)
+            if most_strong is None or strong_signals > most_strong[1]:
+                most_strong = (name, strong_signals)
         
-        # Cấu hình có nhiều tín hiệu mạnh nhất
-        most_strong = max(successful_results.items(), key=lambda x: x[1]['summary']['strong_signals'])
-        print(f"Nhiều tín hiệu mạnh nhất: {most_strong[0]} ({most_strong[1]['summary']['strong_signals']} tín hiệu)")
+        log.info(f"Nhiều tín hiệu nhất: {most_signals[0]} ({most_signals[1]} tín hiệu)")
+        log.info(f"Ít tín hiệu nhất: {least_signals[0]} ({least_signals[1]} tín hiệu)")
+        log.info(f"Điểm cao nhất: {highest_score[0]} ({highest_score[1]:.2f})")
+        log.info(f"Nhiều tín hiệu mạnh nhất: {most_strong[0]} ({most_strong[1]} tín hiệu)")
     
     return results
 
-def save_configurations():
-    """Lưu cấu hình ra file"""
+def _write_json(path, data):
+    """Ghi JSON UTF-8 có thụt lề, dùng orjson nếu có"""
     
-    configs = create_custom_configs()
+    if orjson_available:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+def _config_to_dict(config):
+    """Chuyển một AnalysisConfig thành dict để lưu file"""
+    
+    return {
+        'name': config.name,
+        'description': config.description,
+        'indicator_config': dataclasses.asdict(config.indicator_config),
+        'scoring_config': dataclasses.asdict(config.scoring_config),
+        'min_score_threshold': config.min_score_threshold,
+        'lookback_days': config.lookback_days
+    }
+
+def save_configurations(configs):
+    """Lưu cấu hình ra file"""
     
     print(f"\n=== Lưu cấu hình ===")
     
-    # Lưu từng cấu hình
-    for name, config in configs.items():
+    # Chuyển đổi cấu hình thành dict (một lần cho mỗi cấu hình)
+    all_configs = {name: _config_to_dict(config) for name, config in configs.items()}
+    
+    # Lưu từng cấu hình, lấy lại từ all_configs thay vì dựng lại
+    for name, config_dict in all_configs.items():
         filename = f"config_{name}.json"
-        filepath = os.path.join(os.path.dirname(__file__), filename)
-        
-        # Chuyển đổi cấu hình thành dict
-        config_dict = {
-            'name': config.name,
-            'description': config.description,
-            'indicator_config': config.indicator_config.to_dict(),
-            'scoring_config': config.scoring_config.to_dict(),
-            'min_score_threshold': config.min_score_threshold,
-            'lookback_days': config.lookback_days
-        }
-        
-        # Lưu file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(config_dict, f, ensure_ascii=False, indent=2)
-        
+        _write_json(os.path.join(os.path.dirname(__file__), filename), config_dict)
         print(f"Đã lưu: {filename}")
     
-    # Lưu tất cả cấu hình
-    all_configs = {}
-    for name, config in configs.items():
-        all_configs[name] = {
-            'name': config.name,
-            'description': config.description,
-            'indicator_config': config.indicator_config.to_dict(),
-            'scoring_config': config.scoring_config.to_dict(),
-            'min_score_threshold': config.min_score_threshold,
-            'lookback_days': config.lookback_days
-        }
-    
-    all_configs_path = os.path.join(os.path.dirname(__file__), "all_configs.json")
-    with open(all_configs_path, 'w', encoding='utf-8') as f:
-        json.dump(all_configs, f, ensure_ascii=False, indent=2)
-    
+    # Lưu tất cả cấu hình: JSON để đọc, msgpack để tải lại nhanh
+    _write_json(os.path.join(os.path.dirname(__file__), "all_configs.json"), all_configs)
     print(f"Đã lưu tất cả: all_configs.json")
     
+    if msgpack_available:
+        with open(os.path.join(os.path.dirname(__file__), "all_configs.msgpack"), 'wb') as f:
+            f.write(msgpack.packb(all_configs, use_bin_type=True))
+        print(f"Đã lưu tất cả: all_configs.msgpack")
+    
     return list(configs.keys())
 
 def load_configurations():
@@ -315,14 +416,22 @@ def load_configurations():
     print(f"\n=== Tải cấu hình ===")
     
     all_configs_path = os.path.join(os.path.dirname(__file__), "all_configs.json")
+    msgpack_path = os.path.join(os.path.dirname(__file__), "all_configs.msgpack")
     
-    if not os.path.exists(all_configs_path):
+    use_msgpack = msgpack_available and os.path.exists(msgpack_path)
+    
+    if not use_msgpack and not os.path.exists(all_configs_path):
         print("Không tìm thấy file cấu hình")
         return {}
     
     try:
-        with open(all_configs_path, 'r', encoding='utf-8') as f:
-            configs_dict = json.load(f)
+        # Ưu tiên bản msgpack, quay về JSON nếu không có
+        if use_msgpack:
+            with open(msgpack_path, 'rb') as f:
+                configs_dict = msgpack.unpackb(f.read(), raw=False)
+        else:
+            with open(all_configs_path, 'r', encoding='utf-8') as f:
+                configs_dict = json.load(f)
         
         print(f"Đã tải {len(configs_dict)} cấu hình:")
         
@@ -347,10 +456,49 @@ def load_configurations():
         print(f"Lỗi tải cấu hình: {e}")
         return {}
 
+def _evaluate_cell(df, symbol, base_config, params, thresholds):
+    """Đánh giá một ô của lưới tham số với các ngưỡng điểm tăng dần
+    
+    Số tín hiệu không tăng khi ngưỡng tăng, nên khi một ngưỡng đã cho
+    0 tín hiệu (hoặc hai ngưỡng liên tiếp cho điểm 0) thì các ngưỡng lớn
+    hơn được bỏ qua.
+    """
+    
+    # ScoringConfig dùng chung tham chiếu với base_config (engine không sửa nó);
+    # chỉ IndicatorConfig là bản mới cho ô này
+    indicator_config = dataclasses.replace(base_config.indicator_config, **params)
+    config = dataclasses.replace(base_config, indicator_config=indicator_config)
+    scores = []
+    
+    try:
+        # Một engine cho cả ô; giữa các ngưỡng chỉ đổi min_score_threshold.
+        # config là bản riêng của ô nên sửa tại chỗ không ảnh hưởng base_config
+        engine = AnalysisEngine(config)
+        zero_streak = 0
+        
+        for threshold in thresholds:
+            engine.update_config(min_score_threshold=threshold)
+            result = engine.analyze_frame(df, symbol)
+            
+            # Tính điểm (số tín hiệu * điểm trung bình)
+            signals_count = len(result.signals)
+            score = signals_count * result.signal_summary['avg_score'] if signals_count else 0
+            scores.append((threshold, signals_count, score))
+            
+            # Không còn tín hiệu thì ngưỡng lớn hơn cũng vậy; hai lần liên tiếp
+            # điểm bằng 0 cũng coi như vùng đã bị chi phối và dừng sớm
+            zero_streak = zero_streak + 1 if score == 0 else 0
+            if signals_count == 0 or zero_streak >= 2:
+                break
+    except Exception as e:
+        return params, config, scores, str(e)
+    
+    return params, config, scores, None
+
 def optimize_configuration():
     """Tối ưu cấu hình"""
     
-    print(f"\n=== Tối ưu cấu hình ===")
+    log.info(f"\n=== Tối ưu cấu hình ===")
     
     # Cấu hình cơ sở
     base_config = AnalysisConfig()
@@ -364,126 +512,140 @@ def optimize_configuration():
     }
     
     symbol = "PDR"
-    end_date = datetime.now().date()
+    history_start, end_date = _history_window()
     start_date = end_date - timedelta(days=90)
     
-    print(f"Mã: {symbol}")
-    print(f"Thời gian: {start_date} đến {end_date}")
+    log.info(f"Mã: {symbol}")
+    log.info(f"Thời gian: {start_date} đến {end_date}")
+    
+    # Dữ liệu không đổi giữa các lần thử, chỉ tải một lần rồi phân tích trên bộ nhớ;
+    # dùng lại khoảng đã tải ở bước kiểm thử và cắt lấy 90 ngày cuối
+    history = _load_history(symbol, history_start.isoformat(), end_date.isoformat())
+    df = history[history.index >= pd.Timestamp(start_date, tz='UTC')]
+    
+    # Lưới đầy đủ trên các tham số chỉ báo; ngưỡng điểm được duyệt riêng
+    # trong từng ô để có thể cắt tỉa sớm
+    ind_names = [name for name in test_params if name in IND_FIELDS]
+    thresholds = sorted(test_params['min_score_threshold'])
+    grid = [
+        dict(zip(ind_names, values))
+        for values in itertools.product(*(test_params[name] for name in ind_names))
+    ]
+    
+    log.info(f"Lưới: {len(grid)} tổ hợp chỉ báo x {len(thresholds)} ngưỡng")
+    
+    if joblib_available:
+        outcomes = Parallel(n_jobs=-1)(
+            delayed(_evaluate_cell)(df, symbol, base_config, params, thresholds)
+            for params in grid
+        )
+    else:
+        outcomes = [_evaluate_cell(df, symbol, base_config, params, thresholds) for params in grid]
     
     best_config = None
     best_score = 0
     best_params = {}
+    evaluated = 0
     
-    # Thử nghiệm từng tham số
-    for param_name, param_values in test_params.items():
-        print(f"\n--- Thử nghiệm {param_name} ---")
-        
-        param_best_score = 0
-        param_best_value = None
+    for params, config, scores, error in outcomes:
+        evaluated += len(scores)
         
-        for value in param_values:
-            try:
-                # Tạo cấu hình thử nghiệm
-                if param_name == 'ma_short':
-                    test_config = AnalysisConfig(
-                        indicator_config=IndicatorConfig(ma_short=value, ma_long=base_config.indicator_config.ma_long),
-                        scoring_config=base_config.scoring_config,
-                        min_score_threshold=base_config.min_score_threshold,
-                        lookback_days=base_config.lookback_days
-                    )
-                elif param_name == 'ma_long':
-                    test_config = AnalysisConfig(
-                        indicator_config=IndicatorConfig(ma_short=base_config.indicator_config.ma_short, ma_long=value),
-                        scoring_config=base_config.scoring_config,
-                        min_score_threshold=base_config.min_score_threshold,
-                        lookback_days=base_config.lookback_days
-                    )
-                elif param_name == 'rsi_period':
-                    test_config = AnalysisConfig(
-                        indicator_config=IndicatorConfig(rsi_period=value),
-                        scoring_config=base_config.scoring_config,
-                        min_score_threshold=base_config.min_score_threshold,
-                        lookback_days=base_config.lookback_days
-                    )
-                elif param_name == 'min_score_threshold':
-                    test_config = AnalysisConfig(
-                        indicator_config=base_config.indicator_config,
-                        scoring_config=base_config.scoring_config,
-                        min_score_threshold=value,
-                        lookback_days=base_config.lookback_days
-                    )
-                
-                # Chạy phân tích
-                engine = AnalysisEngine(test_config)
-                result = engine.analyze_symbol(
-                    symbol=symbol,
-                    start_date=start_date.isoformat(),
-                    end_date=end_date.isoformat()
-                )
-                
-                # Tính điểm (số tín hiệu * điểm trung bình)
-                if result.signals:
-                    score = len(result.signals) * result.signal_summary['avg_score']
-                else:
-                    score = 0
-                
-                print(f"  {value}: {len(result.signals)} tín hiệu, điểm: {score:.2f}")
-                
-                if score > param_best_score:
-                    param_best_score = score
-                    param_best_value = value
-                
-                if score > best_score:
-                    best_score = score
-                    best_config = test_config
-                    best_params = {param_name: value}
-                
-            except Exception as e:
-                print(f"  {value}: Lỗi - {e}")
+        if error:
+            log.info(f"  {params}: Lỗi - {error}")
+            continue
         
-        print(f"  Tốt nhất: {param_best_value} (điểm: {param_best_score:.2f})")
+        for threshold, signals_count, score in scores:
+            if score > best_score:
+                best_score = score
+                best_config = dataclasses.replace(config, min_score_threshold=threshold)
+                best_params = {**params, 'min_score_threshold': threshold}
     
-    print(f"\n=== Kết quả tối ưu ===")
+    log.info(f"Đã đánh giá {evaluated}/{len(grid) * len(thresholds)} điểm (phần còn lại bị cắt tỉa)")
+    
+    log.info(f"\n=== Kết quả tối ưu ===")
     if best_config:
-        print(f"Điểm tốt nhất: {best_score:.2f}")
-        print(f"Tham số: {best_params}")
-        print(f"Cấu hình: {best_config.name}")
+        log.info(f"Điểm tốt nhất: {best_score:.2f}")
+        log.info(f"Tham số: {best_params}")
+        log.info(f"Cấu hình: {best_config.name}")
     else:
-        print("Không tìm thấy cấu hình tối ưu")
+        log.info("Không tìm thấy cấu hình tối ưu")
     
     return best_config, best_params
 
+def _warmup_indicators():
+    """Chạy chỉ báo trên vài dòng giả để biên dịch/nạp sẵn các kernel numba
+    
+    Kernel dùng cache=True, nên bản biên dịch ghi ra đĩa ở đây cũng được
+    các process con nạp lại thay vì mỗi process tự biên dịch.
+    """
+    df = pd.DataFrame({
+        'Open': [1.0, 1.0, 1.0],
+        'High': [1.0, 2.0, 1.5],
+        'Low': [1.0, 1.0, 1.0],
+        'Close': [1.0, 2.0, 1.5],
+        'Volume': [100.0, 200.0, 150.0]
+    })
+    IndicatorEngine().calculate_all_indicators(df)
+
+def _flush_logs():
+    """Đẩy các dòng log đang buffer ra trước khi in tiếp bằng print"""
+    for handler in log.handlers:
+        handler.flush()
+
 def main():
     """Hàm chính"""
     
     print("=== Ví dụ quản lý cấu hình ===")
     
     try:
-        # 1. Tạo cấu hình tùy chỉnh
+        # 0. Khởi động trước các kernel chỉ báo, tách chi phí biên dịch khỏi các bước đo
+        _warmup_indicators()
+        
+        # 1. Tạo cấu hình tùy chỉnh (một lần, dùng chung cho các bước sau)
         configs = create_custom_configs()
         
         # 2. Kiểm thử cấu hình
-        results = test_configurations()
+        results = test_configurations(configs)
         
         # 3. So sánh cấu hình
-        comparison = compare_configurations()
+        comparison = compare_configurations(results)
+        _flush_logs()
         
         # 4. Lưu cấu hình
-        saved_configs = save_configurations()
+        saved_configs = save_configurations(configs)
         
         # 5. Tải cấu hình
         loaded_configs = load_configurations()
         
         # 6. Tối ưu cấu hình
         best_config, best_params = optimize_configuration()
+        _flush_logs()
         
         print("\n=== Hoàn thành ===")
         print("Tất cả ví dụ quản lý cấu hình đã chạy thành công!")
         
     except Exception as e:
+        _flush_logs()
         print(f"Lỗi: {e}")
         import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ví dụ quản lý cấu hình")
+    parser.add_argument("--no-cache", action="store_true", help="Không dùng dữ liệu giá đã cache trên đĩa")
+    args = parser.parse_args()
+    
+    if args.no_cache:
+        os.environ[NO_CACHE_ENV] = "1"
+    
+    # Buffer tối đa 50 dòng rồi ghi một lần ra stdout; chỉ áp dụng cho logger
+    # của ví dụ để log INFO của các engine vẫn giữ mặc định
+    log.addHandler(logging.handlers.MemoryHandler(
+        capacity=50,
+        target=logging.StreamHandler(sys.stdout)
+    ))
+    log.setLevel(logging.INFO)
+    log.propagate = False
     main()
@@ -5,420 +5,491 @@ Database Integration Example
 Ví dụ tích hợp với database cho phân tích
 """
 
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum
 import asyncio
 import json
+import time
 
-def test_database_connection():
-    """Kiểm tra kết nối database"""
+# Engine tích hợp database là tùy chọn; import một lần, None nếu không khả dụng
+try:
+    from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+    from database.api.database import get_database_manager
+except ImportError:
+    DatabaseIntegratedAnalysisEngine = None
+
+# uvloop là tùy chọn (đã dùng cho API server); có thì asyncio.run chạy trên
+# event loop libuv, nhanh hơn với nhiều coroutine truy vấn DB nhỏ
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+# orjson (có trong requirements_database.txt) nhanh hơn json chuẩn nhiều lần
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+# ujson là lựa chọn dự phòng khi không có orjson
+try:
+    import ujson
+    ujson_available = True
+except ImportError:
+    ujson_available = False
+
+# Thống kê DB dùng lại trong cùng một khung 30 giây (key: engine + khung thời gian)
+_STATS_TTL = 30
+_stats_cache = {}
+
+# Độ dài mô tả in ra; phần còn lại bị cắt ngay trong SQL (LEFT(description, n))
+_DESC_MAX = 40
+
+# Mẫu dòng dựng sẵn cho các bảng kết quả: format_map nhận thẳng dict của từng dòng,
+# mô tả được cắt bằng format spec (.N) thay vì cắt chuỗi trong Python
+_HISTORY_ROW = "{analysis_date!s:<12} {total_signals:<10} {buy_signals:<5} {sell_signals:<5} {avg_score:<10.2f}".format_map
+_SIGNAL_HISTORY_ROW = "{signal_date!s:<12} {action:<10} {strength:<12} {score:<10.2f} {description:<30.30}".format_map
+_CONFIG_ROW = "- ID: {id}, Tên: {name}, Loại: {config_type}".format_map
+_CONFIG_RESULT_ROW = "{symbol:<8} {analysis_date!s:<12} {total_signals:<10} {buy_signals:<5} {sell_signals:<5}".format_map
+_ACTION_SIGNAL_ROW = "{symbol:<8} {signal_date!s:<12} {score:<10.2f} {description:<40.40}".format_map
+_TOP_SYMBOL_ROW = "{symbol:<8} {total_signals:<10} {buy_signals:<5} {sell_signals:<5} {avg_score:<10.2f}".format_map
+
+async def _cached_stats(engine):
+    """get_database_stats() có memo ngắn hạn, dùng chung giữa các ví dụ"""
+    key = (id(engine), int(time.monotonic() // _STATS_TTL))
+    if key not in _stats_cache:
+        _stats_cache[key] = await engine.get_database_stats()
+    return _stats_cache[key]
+
+class DBUnavailable(Exception):
+    """Không kết nối được database; các ví dụ còn lại bị bỏ qua"""
+
+async def test_database_connection(engine):
+    """Kiểm tra kết nối database, raise DBUnavailable nếu không kết nối được"""
     
     print("=== Kiểm tra kết nối database ===")
     
-    try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
-        
-        async def check_connection():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Kiểm tra kết nối
-            stats = await engine.get_database_stats()
-            print("✅ Kết nối database thành công")
-            
-            # Hiển thị thống kê
-            print(f"\nThống kê database:")
-            print(f"- Configurations: {stats.get('configurations', {})}")
-            print(f"- Indicator Calculations: {stats.get('indicator_calculations', {}).get('total_calculations', 0)}")
-            print(f"- Analysis Results: {stats.get('analysis_results', {}).get('total_analyses', 0)}")
-            print(f"- Signals: {stats.get('signals', {}).get('total_signals', 0)}")
-            
-            return True
-        
-        return asyncio.run(check_connection())
-        
-    except ImportError:
-        print("❌ Database engine không khả dụng")
-        return False
-    except Exception as e:
-        print(f"❌ Lỗi kết nối database: {e}")
-        return False
+    # SELECT 1 qua pool; lỗi kết nối được ghi log và trả về False
+    if not await get_database_manager().health_check_async():
+        raise DBUnavailable("health check thất bại")
+    
+    print("✅ Kết nối database thành công")
+    
+    # Chỉ mở sẵn kết nối khi database đã sẵn sàng: 4 kết nối cho 4 truy vấn
+    # chạy đồng thời ở bước 3-6, để truy vấn đầu tiên không phải chờ thiết lập
+    await engine.warmup(4)
+    
+    # Hiển thị thống kê
+    stats = await _cached_stats(engine)
+    print(f"\nThống kê database:")
+    print(f"- Configurations: {stats.get('configurations', {})}")
+    print(f"- Indicator Calculations: {stats.get('indicator_calculations', {}).get('total_calculations', 0)}")
+    print(f"- Analysis Results: {stats.get('analysis_results', {}).get('total_analyses', 0)}")
+    print(f"- Signals: {stats.get('signals', {}).get('total_signals', 0)}")
 
-def analyze_with_database():
+async def analyze_with_database(engine, run_now):
     """Phân tích với lưu trữ database"""
     
     print("\n=== Phân tích với database ===")
     
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
-        
-        async def run_analysis():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Phân tích
-            symbol = "PDR"
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=90)
-            
-            print(f"Mã: {symbol}")
-            print(f"Thời gian: {start_date} đến {end_date}")
-            
-            result = await engine.analyze_symbol(
-                symbol=symbol,
-                start_date=start_date.isoformat(),
-                end_date=end_date.isoformat()
-            )
-            
-            # Hiển thị kết quả
-            print(f"\nKết quả phân tích:")
-            print(f"- Analysis Result ID: {result.analysis_result_id}")
-            print(f"- Indicator Config ID: {result.indicator_config_id}")
-            print(f"- Scoring Config ID: {result.scoring_config_id}")
-            print(f"- Analysis Config ID: {result.analysis_config_id}")
-            print(f"- Số tín hiệu: {len(result.signals)}")
-            
-            if result.signals:
-                summary = result.signal_summary
-                print(f"- Tín hiệu mua: {summary['buy_signals']}")
-                print(f"- Tín hiệu bán: {summary['sell_signals']}")
-                print(f"- Tín hiệu mạnh: {summary['strong_signals']}")
-                print(f"- Điểm trung bình: {summary['avg_score']:.2f}")
-                
-                # Tín hiệu gần nhất
-                latest = result.signals[-1]
-                print(f"- Tín hiệu gần nhất: {latest.timestamp.date()} - {latest.action.value} {latest.strength.value}")
-            
-            return result
-        
-        return asyncio.run(run_analysis())
+        # Phân tích
+        symbol = "PDR"
+        end_date = run_now.date()
+        start_date = end_date - timedelta(days=90)
+        
+        print(f"Mã: {symbol}")
+        print(f"Thời gian: {start_date} đến {end_date}")
+        
+        result = await engine.analyze_symbol(
+            symbol=symbol,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat()
+        )
+        
+        # Hiển thị kết quả
+        print(f"\nKết quả phân tích:")
+        print(f"- Analysis Result ID: {result.analysis_result_id}")
+        print(f"- Indicator Config ID: {result.indicator_config_id}")
+        print(f"- Scoring Config ID: {result.scoring_config_id}")
+        print(f"- Analysis Config ID: {result.analysis_config_id}")
+        print(f"- Số tín hiệu: {len(result.signals)}")
+        
+        if result.signals:
+            summary = result.signal_summary
+            print(f"- Tín hiệu mua: {summary['buy_signals']}")
+            print(f"- Tín hiệu bán: {summary['sell_signals']}")
+            print(f"- Tín hiệu mạnh: {summary['strong_signals']}")
+            print(f"- Điểm trung bình: {summary['avg_score']:.2f}")
+            
+            # Tín hiệu gần nhất
+            latest = result.signals[-1]
+            print(f"- Tín hiệu gần nhất: {latest.timestamp.date()} - {latest.action.value} {latest.strength.value}")
+        
+        return result
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return None
     except Exception as e:
         print(f"Lỗi: {e}")
         return None
 
-def query_analysis_history():
+async def query_analysis_history(engine):
     """Truy vấn lịch sử phân tích"""
     
-    print("\n=== Truy vấn lịch sử phân tích ===")
+    # Gom output rồi in một lần, để các truy vấn chạy song song không in xen nhau
+    lines = []
+    
+    lines.append("\n=== Truy vấn lịch sử phân tích ===")
     
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+        # Lấy lịch sử phân tích
+        symbol = "PDR"
+        history = await engine.get_analysis_history(symbol, limit=10)
         
-        async def run_query():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Lấy lịch sử phân tích
-            symbol = "PDR"
-            history = await engine.get_analysis_history(symbol, limit=10)
-            
-            print(f"Lịch sử phân tích {symbol}:")
-            print(f"{'Ngày':<12} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5} {'Điểm TB':<10}")
-            print("-" * 50)
-            
-            for h in history:
-                print(f"{h['analysis_date']:<12} {h['total_signals']:<10} {h['buy_signals']:<5} {h['sell_signals']:<5} {h['avg_score']:<10.2f}")
-            
-            # Lấy lịch sử tín hiệu
-            signal_history = await engine.get_signal_history(symbol, limit=15)
-            
-            print(f"\nLịch sử tín hiệu {symbol}:")
-            print(f"{'Ngày':<12} {'Hành động':<10} {'Sức mạnh':<12} {'Điểm':<10} {'Mô tả':<30}")
-            print("-" * 80)
-            
-            for s in signal_history:
-                description = s['description'][:27] + "..." if len(s['description']) > 30 else s['description']
-                print(f"{s['signal_date']:<12} {s['action']:<10} {s['strength']:<12} {s['score']:<10.2f} {description:<30}")
-            
-            return history, signal_history
+        lines.append(f"Lịch sử phân tích {symbol}:")
+        lines.append(f"{'Ngày':<12} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5} {'Điểm TB':<10}")
+        lines.append("-" * 50)
         
-        return asyncio.run(run_query())
+        lines.extend(map(_HISTORY_ROW, history))
+        
+        # Lấy lịch sử tín hiệu
+        signal_history = await engine.get_signal_history(symbol, limit=15)
+        
+        lines.append(f"\nLịch sử tín hiệu {symbol}:")
+        lines.append(f"{'Ngày':<12} {'Hành động':<10} {'Sức mạnh':<12} {'Điểm':<10} {'Mô tả':<30}")
+        lines.append("-" * 80)
+        
+        lines.extend(map(_SIGNAL_HISTORY_ROW, signal_history))
+        
+        return history, signal_history
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return None, None
     except Exception as e:
-        print(f"Lỗi: {e}")
+        lines.append(f"Lỗi: {e}")
         return None, None
+        
+    finally:
+        print("\n".join(lines))
 
-def query_by_configuration():
+async def query_by_configuration(engine):
     """Truy vấn theo cấu hình"""
     
-    print("\n=== Truy vấn theo cấu hình ===")
+    # Gom output rồi in một lần, để các truy vấn chạy song song không in xen nhau
+    lines = []
+    
+    lines.append("\n=== Truy vấn theo cấu hình ===")
     
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+        # Lấy danh sách cấu hình
+        configs = await engine.get_configurations()
         
-        async def run_query():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Lấy danh sách cấu hình
-            configs = await engine.get_configurations()
+        lines.append(f"Cấu hình có sẵn:")
+        lines.extend(map(_CONFIG_ROW, configs))
+        
+        if configs:
+            # Lấy cấu hình đầu tiên
+            config_id = configs[0]['id']
+            lines.append(f"\nSử dụng cấu hình ID: {config_id}")
             
-            print(f"Cấu hình có sẵn:")
-            for config in configs:
-                print(f"- ID: {config['id']}, Tên: {config['name']}, Loại: {config['config_type']}")
+            # Lấy kết quả phân tích với cấu hình này
+            results = await engine.get_analysis_by_config(config_id, limit=10)
             
-            if configs:
-                # Lấy cấu hình đầu tiên
-                config_id = configs[0]['id']
-                print(f"\nSử dụng cấu hình ID: {config_id}")
-                
-                # Lấy kết quả phân tích với cấu hình này
-                results = await engine.get_analysis_by_config(config_id, limit=10)
-                
-                print(f"\nKết quả phân tích với cấu hình {config_id}:")
-                print(f"{'Mã':<8} {'Ngày':<12} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5}")
-                print("-" * 50)
-                
-                for result in results:
-                    print(f"{result['symbol']:<8} {result['analysis_date']:<12} {result['total_signals']:<10} {result['buy_signals']:<5} {result['sell_signals']:<5}")
+            lines.append(f"\nKết quả phân tích với cấu hình {config_id}:")
+            lines.append(f"{'Mã':<8} {'Ngày':<12} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5}")
+            lines.append("-" * 50)
             
-            return configs, results if 'results' in locals() else []
+            lines.extend(map(_CONFIG_RESULT_ROW, results))
         
-        return asyncio.run(run_query())
+        return configs, results if 'results' in locals() else []
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return [], []
     except Exception as e:
-        print(f"Lỗi: {e}")
+        lines.append(f"Lỗi: {e}")
         return [], []
+        
+    finally:
+        print("\n".join(lines))
 
-def query_signals_by_action():
+async def query_signals_by_action(engine):
     """Truy vấn tín hiệu theo hành động"""
     
-    print("\n=== Truy vấn tín hiệu theo hành động ===")
+    # Gom output rồi in một lần, để các truy vấn chạy song song không in xen nhau
+    lines = []
+    
+    lines.append("\n=== Truy vấn tín hiệu theo hành động ===")
     
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+        # Tín hiệu mua mạnh
+        buy_signals = await engine.get_signals_by_action("MUA", strength="RẤT MẠNH", limit=10,
+                                                  description_max=_DESC_MAX)
         
-        async def run_query():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Tín hiệu mua mạnh
-            buy_signals = await engine.get_signals_by_action("MUA", strength="RẤT MẠNH", limit=10)
-            
-            print(f"Tín hiệu mua mạnh (10 gần nhất):")
-            print(f"{'Mã':<8} {'Ngày':<12} {'Điểm':<10} {'Mô tả':<40}")
-            print("-" * 70)
-            
-            for signal in buy_signals:
-                description = signal['description'][:37] + "..." if len(signal['description']) > 40 else signal['description']
-                print(f"{signal['symbol']:<8} {signal['signal_date']:<12} {signal['score']:<10.2f} {description:<40}")
-            
-            # Tín hiệu bán mạnh
-            sell_signals = await engine.get_signals_by_action("BÁN", strength="RẤT MẠNH", limit=10)
-            
-            print(f"\nTín hiệu bán mạnh (10 gần nhất):")
-            print(f"{'Mã':<8} {'Ngày':<12} {'Điểm':<10} {'Mô tả':<40}")
-            print("-" * 70)
-            
-            for signal in sell_signals:
-                description = signal['description'][:37] + "..." if len(signal['description']) > 40 else signal['description']
-                print(f"{signal['symbol']:<8} {signal['signal_date']:<12} {signal['score']:<10.2f} {description:<40}")
-            
-            return buy_signals, sell_signals
+        lines.append(f"Tín hiệu mua mạnh (10 gần nhất):")
+        lines.append(f"{'Mã':<8} {'Ngày':<12} {'Điểm':<10} {'Mô tả':<40}")
+        lines.append("-" * 70)
         
-        return asyncio.run(run_query())
+        lines.extend(map(_ACTION_SIGNAL_ROW, buy_signals))
+        
+        # Tín hiệu bán mạnh
+        sell_signals = await engine.get_signals_by_action("BÁN", strength="RẤT MẠNH", limit=10,
+                                                  description_max=_DESC_MAX)
+        
+        lines.append(f"\nTín hiệu bán mạnh (10 gần nhất):")
+        lines.append(f"{'Mã':<8} {'Ngày':<12} {'Điểm':<10} {'Mô tả':<40}")
+        lines.append("-" * 70)
+        
+        lines.extend(map(_ACTION_SIGNAL_ROW, sell_signals))
+        
+        return buy_signals, sell_signals
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return [], []
     except Exception as e:
-        print(f"Lỗi: {e}")
+        lines.append(f"Lỗi: {e}")
         return [], []
+        
+    finally:
+        print("\n".join(lines))
 
-def query_performance_stats():
+async def query_performance_stats(engine):
     """Truy vấn thống kê hiệu suất"""
     
-    print("\n=== Thống kê hiệu suất ===")
+    # Gom output rồi in một lần, để các truy vấn chạy song song không in xen nhau
+    lines = []
+    
+    lines.append("\n=== Thống kê hiệu suất ===")
     
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+        # Thống kê tổng quan (dùng lại kết quả ở bước kiểm tra kết nối nếu còn mới)
+        stats = await _cached_stats(engine)
         
-        async def run_query():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Thống kê tổng quan
-            stats = await engine.get_database_stats()
-            
-            print(f"Thống kê tổng quan:")
-            print(f"- Configurations: {stats.get('configurations', {})}")
-            print(f"- Indicator Calculations: {stats.get('indicator_calculations', {})}")
-            print(f"- Analysis Results: {stats.get('analysis_results', {})}")
-            print(f"- Signals: {stats.get('signals', {})}")
-            
-            # Thống kê theo thời gian
-            time_stats = await engine.get_performance_stats()
-            
-            print(f"\nThống kê theo thời gian:")
-            print(f"- Phân tích hôm nay: {time_stats.get('today_analyses', 0)}")
-            print(f"- Phân tích tuần này: {time_stats.get('week_analyses', 0)}")
-            print(f"- Phân tích tháng này: {time_stats.get('month_analyses', 0)}")
-            print(f"- Tín hiệu hôm nay: {time_stats.get('today_signals', 0)}")
-            print(f"- Tín hiệu tuần này: {time_stats.get('week_signals', 0)}")
-            print(f"- Tín hiệu tháng này: {time_stats.get('month_signals', 0)}")
-            
-            # Top mã có nhiều tín hiệu nhất
-            top_symbols = await engine.get_top_symbols_by_signals(limit=10)
-            
-            print(f"\nTop 10 mã có nhiều tín hiệu nhất:")
-            print(f"{'Mã':<8} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5} {'Điểm TB':<10}")
-            print("-" * 50)
-            
-            for symbol in top_symbols:
-                print(f"{symbol['symbol']:<8} {symbol['total_signals']:<10} {symbol['buy_signals']:<5} {symbol['sell_signals']:<5} {symbol['avg_score']:<10.2f}")
-            
-            return stats, time_stats, top_symbols
+        lines.append(f"Thống kê tổng quan:")
+        lines.append(f"- Configurations: {stats.get('configurations', {})}")
+        lines.append(f"- Indicator Calculations: {stats.get('indicator_calculations', {})}")
+        lines.append(f"- Analysis Results: {stats.get('analysis_results', {})}")
+        lines.append(f"- Signals: {stats.get('signals', {})}")
         
-        return asyncio.run(run_query())
+        # Thống kê theo thời gian
+        time_stats = await engine.get_performance_stats()
+        
+        lines.append(f"\nThống kê theo thời gian:")
+        lines.append(f"- Phân tích hôm nay: {time_stats.get('today_analyses', 0)}")
+        lines.append(f"- Phân tích tuần này: {time_stats.get('week_analyses', 0)}")
+        lines.append(f"- Phân tích tháng này: {time_stats.get('month_analyses', 0)}")
+        lines.append(f"- Tín hiệu hôm nay: {time_stats.get('today_signals', 0)}")
+        lines.append(f"- Tín hiệu tuần này: {time_stats.get('week_signals', 0)}")
+        lines.append(f"- Tín hiệu tháng này: {time_stats.get('month_signals', 0)}")
+        
+        # Top mã có nhiều tín hiệu nhất
+        top_symbols = await engine.get_top_symbols_by_signals(limit=10)
+        
+        lines.append(f"\nTop 10 mã có nhiều tín hiệu nhất:")
+        lines.append(f"{'Mã':<8} {'Tín hiệu':<10} {'Mua':<5} {'Bán':<5} {'Điểm TB':<10}")
+        lines.append("-" * 50)
+        
+        lines.extend(map(_TOP_SYMBOL_ROW, top_symbols))
+        
+        return stats, time_stats, top_symbols
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return {}, {}, []
     except Exception as e:
-        print(f"Lỗi: {e}")
+        lines.append(f"Lỗi: {e}")
         return {}, {}, []
+        
+    finally:
+        print("\n".join(lines))
+
+def _json_default(obj):
+    """Chuyển các kiểu thường gặp trong bản ghi DB mà bộ mã hóa JSON không tự xử lý"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if hasattr(obj, 'isoformat'):
+        # date/datetime (với ujson/json) và pandas Timestamp
+        return obj.isoformat()
+    raise TypeError(f"Không mã hóa được kiểu {type(obj).__name__} sang JSON")
+
+def _dump_json(obj):
+    """Mã hóa một object thành JSON bytes (UTF-8, không escape tiếng Việt)"""
+    if orjson_available:
+        return orjson.dumps(
+            obj,
+            default=_json_default,
+            option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    if ujson_available:
+        return ujson.dumps(obj, ensure_ascii=False, default=_json_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+def _write_json_array(f, items):
+    """Ghi từng phần tử của mảng JSON ra file thay vì dựng cả chuỗi trong bộ nhớ"""
+    f.write(b'[')
+    for i, item in enumerate(items):
+        if i:
+            f.write(b',')
+        f.write(_dump_json(item))
+    f.write(b']')
+
+async def _write_json_array_async(f, items):
+    """Như _write_json_array nhưng đọc từ async iterator; trả về số phần tử đã ghi"""
+    count = 0
+    f.write(b'[')
+    async for item in items:
+        if count:
+            f.write(b',')
+        f.write(_dump_json(item))
+        count += 1
+    f.write(b']')
+    return count
 
-def export_database_data():
+async def export_database_data(engine, run_now):
     """Xuất dữ liệu database"""
     
     print("\n=== Xuất dữ liệu database ===")
     
+    # Ghi ra file tạm rồi os.replace: lỗi giữa chừng không để lại file JSON dở
+    output_path = os.path.join(os.path.dirname(__file__), "database_export.json")
+    tmp_path = output_path + ".tmp"
+    
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
-        
-        async def run_export():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Xuất tín hiệu gần đây
-            recent_signals = await engine.get_recent_signals(days=30, limit=100)
-            
-            # Xuất kết quả phân tích gần đây
-            recent_analyses = await engine.get_recent_analyses(days=30, limit=50)
+        # Xuất kết quả phân tích gần đây
+        recent_analyses = await engine.get_recent_analyses(days=30, limit=50)
+        
+        # Lưu file: ghi dần từng bản ghi. Tín hiệu được đọc qua server-side cursor
+        # (engine.iter_recent_signals) nên không giữ cả danh sách trong bộ nhớ;
+        # giữ mô tả đầy đủ khi xuất, truyền description_max để cắt ngắn ngay trong SQL.
+        # export_info ghi sau cùng vì cần số tín hiệu đã stream
+        with open(tmp_path, 'wb') as f:
+            f.write(b'{"recent_signals":')
+            signals_count = await _write_json_array_async(
+                f, engine.iter_recent_signals(days=30, limit=100)
+            )
+            f.write(b',"recent_analyses":')
+            _write_json_array(f, recent_analyses)
             
-            # Tạo dữ liệu xuất
-            export_data = {
-                'export_info': {
-                    'export_date': datetime.now().isoformat(),
-                    'signals_count': len(recent_signals),
-                    'analyses_count': len(recent_analyses)
-                },
-                'recent_signals': recent_signals,
-                'recent_analyses': recent_analyses
+            export_info = {
+                'export_date': run_now.isoformat(),
+                'signals_count': signals_count,
+                'analyses_count': len(recent_analyses)
             }
-            
-            # Lưu file
-            output_path = os.path.join(os.path.dirname(__file__), "database_export.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2, default=str)
-            
-            print(f"Đã xuất dữ liệu:")
-            print(f"- Tín hiệu: {len(recent_signals)}")
-            print(f"- Kết quả phân tích: {len(recent_analyses)}")
-            print(f"- File: {output_path}")
-            
-            return export_data
+            f.write(b',"export_info":' + _dump_json(export_info))
+            f.write(b'}')
+        os.replace(tmp_path, output_path)
         
-        return asyncio.run(run_export())
+        print(f"Đã xuất dữ liệu:")
+        print(f"- Tín hiệu: {signals_count}")
+        print(f"- Kết quả phân tích: {len(recent_analyses)}")
+        print(f"- File: {output_path}")
+        
+        return export_info
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return None
     except Exception as e:
         print(f"Lỗi: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return None
 
-def cleanup_old_data():
+async def cleanup_old_data(engine, run_now):
     """Dọn dẹp dữ liệu cũ"""
     
     print("\n=== Dọn dẹp dữ liệu cũ ===")
     
     try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+        # Dọn dẹp dữ liệu cũ hơn 6 tháng
+        cutoff_date = (run_now - timedelta(days=180)).date()
         
-        async def run_cleanup():
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Dọn dẹp dữ liệu cũ hơn 6 tháng
-            cutoff_date = (datetime.now() - timedelta(days=180)).date()
-            
-            print(f"Dọn dẹp dữ liệu cũ hơn {cutoff_date}")
-            
-            # Đếm dữ liệu sẽ bị xóa
-            old_analyses = await engine.count_old_analyses(cutoff_date)
-            old_signals = await engine.count_old_signals(cutoff_date)
-            old_indicators = await engine.count_old_indicators(cutoff_date)
-            
-            print(f"Dữ liệu sẽ bị xóa:")
-            print(f"- Kết quả phân tích: {old_analyses}")
-            print(f"- Tín hiệu: {old_signals}")
-            print(f"- Chỉ số: {old_indicators}")
-            
-            if old_analyses > 0 or old_signals > 0 or old_indicators > 0:
-                # Thực hiện dọn dẹp
-                deleted = await engine.cleanup_old_data(cutoff_date)
-                
-                print(f"\nĐã xóa:")
-                print(f"- Kết quả phân tích: {deleted.get('analyses', 0)}")
-                print(f"- Tín hiệu: {deleted.get('signals', 0)}")
-                print(f"- Chỉ số: {deleted.get('indicators', 0)}")
-            else:
-                print("Không có dữ liệu cũ cần dọn dẹp")
+        print(f"Dọn dẹp dữ liệu cũ hơn {cutoff_date}")
+        
+        # Đếm dữ liệu sẽ bị xóa (ba số đếm trong một truy vấn)
+        old_counts = await engine.count_old_data(cutoff_date)
+        old_analyses = old_counts['analyses']
+        old_signals = old_counts['signals']
+        old_indicators = old_counts['indicators']
+        
+        print(f"Dữ liệu sẽ bị xóa:")
+        print(f"- Kết quả phân tích: {old_analyses}")
+        print(f"- Tín hiệu: {old_signals}")
+        print(f"- Chỉ số: {old_indicators}")
+        
+        if old_analyses > 0 or old_signals > 0 or old_indicators > 0:
+            # Thực hiện dọn dẹp
+            deleted = await engine.cleanup_old_data(cutoff_date)
             
-            return deleted if 'deleted' in locals() else {}
+            print(f"\nĐã xóa:")
+            print(f"- Kết quả phân tích: {deleted.get('analyses', 0)}")
+            print(f"- Tín hiệu: {deleted.get('signals', 0)}")
+            print(f"- Chỉ số: {deleted.get('indicators', 0)}")
+        else:
+            print("Không có dữ liệu cũ cần dọn dẹp")
         
-        return asyncio.run(run_cleanup())
+        return deleted if 'deleted' in locals() else {}
         
-    except ImportError:
-        print("Database engine không khả dụng")
-        return {}
     except Exception as e:
         print(f"Lỗi: {e}")
         return {}
 
-def main():
-    """Hàm chính"""
-    
-    print("=== Ví dụ tích hợp database ===")
+async def run_all(engine, run_now):
+    """
+    Chạy lần lượt các ví dụ trên cùng một event loop và một engine.
+
+    run_now là mốc thời gian chung của cả lần chạy: mọi khoảng ngày và
+    thời điểm xuất dữ liệu đều tính từ đây nên các bước khớp nhau.
+    """
     
     try:
-        # 1. Kiểm tra kết nối
-        connection_ok = test_database_connection()
-        
-        if not connection_ok:
-            print("Không thể kết nối database, dừng chương trình")
+        # 1. Kiểm tra kết nối; không kết nối được thì dừng ngay, không chạy
+        # các bước phân tích/truy vấn phía sau
+        try:
+            await test_database_connection(engine)
+        except DBUnavailable as e:
+            print(f"❌ Không thể kết nối database ({e}), dừng chương trình")
             return
         
         # 2. Phân tích với database
-        result = analyze_with_database()
-        
-        # 3. Truy vấn lịch sử
-        history, signal_history = query_analysis_history()
-        
-        # 4. Truy vấn theo cấu hình
-        configs, config_results = query_by_configuration()
-        
-        # 5. Truy vấn tín hiệu theo hành động
-        buy_signals, sell_signals = query_signals_by_action()
-        
-        # 6. Thống kê hiệu suất
-        stats, time_stats, top_symbols = query_performance_stats()
+        result = await analyze_with_database(engine, run_now)
+        
+        # 3-6. Các truy vấn chỉ đọc, độc lập nhau: chạy đồng thời trên pool kết nối
+        # (lịch sử, theo cấu hình, tín hiệu theo hành động, thống kê hiệu suất)
+        (
+            (history, signal_history),
+            (configs, config_results),
+            (buy_signals, sell_signals),
+            (stats, time_stats, top_symbols)
+        ) = await asyncio.gather(
+            query_analysis_history(engine),
+            query_by_configuration(engine),
+            query_signals_by_action(engine),
+            query_performance_stats(engine)
+        )
         
         # 7. Xuất dữ liệu
-        export_data = export_database_data()
+        export_data = await export_database_data(engine, run_now)
         
         # 8. Dọn dẹp dữ liệu cũ
-        cleanup_result = cleanup_old_data()
+        cleanup_result = await cleanup_old_data(engine, run_now)
+        
+        # Số lượng bản ghi đã thay đổi, thống kê cũ không còn đúng
+        _stats_cache.clear()
         
         print("\n=== Hoàn thành ===")
         print("Tất cả ví dụ tích hợp database đã chạy thành công!")
         
+    finally:
+        # Đóng pool kết nối trước khi event loop kết thúc
+        await get_database_manager().close_async()
+
+def main():
+    """Hàm chính"""
+    
+    print("=== Ví dụ tích hợp database ===")
+    
+    if DatabaseIntegratedAnalysisEngine is None:
+        print("❌ Database engine không khả dụng")
+        return
+    
+    try:
+        # Một event loop cho cả chương trình để pool kết nối DB được dùng lại
+        asyncio.run(run_all(DatabaseIntegratedAnalysisEngine(), datetime.now()))
+        
     except Exception as e:
         print(f"Lỗi: {e}")
         import traceback
@@ -5,35 +5,127 @@ Single Symbol Analysis Example
 Ví dụ phân tích một mã cổ phiếu với các cấu hình khác nhau
 """
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 from analytis.analysis_engine import AnalysisEngine, AnalysisConfig
 from analytis.engines.indicator_engine import IndicatorConfig
 from analytis.engines.scoring_engine import ScoringConfig
-from datetime import datetime, timedelta
+from analytis.data.loader import load_stock_data
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+import pandas as pd
 
-def analyze_single_symbol():
-    """Phân tích một mã cổ phiếu với cấu hình mặc định"""
+# Engine tích hợp database là tùy chọn; import một lần, None nếu không khả dụng
+try:
+    from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
+except ImportError:
+    DatabaseIntegratedAnalysisEngine = None
+
+# joblib là tùy chọn; có thì kết quả phân tích được cache trên đĩa giữa các lần chạy
+try:
+    from joblib import Memory
+    _memory = Memory(location=".cache/analytis", verbose=0)
+except ImportError:
+    _memory = None
+
+# Đặt biến môi trường này (--no-cache) để bỏ qua cache trên đĩa
+NO_CACHE_ENV = "ANALYTIS_NO_CACHE"
+
+def disk_cache(func=None, cache_if=None, **kwargs):
+    """joblib Memory.cache nếu có joblib, bỏ qua khi NO_CACHE_ENV được đặt
+    
+    Kết quả không thỏa cache_if (nếu có) bị xóa khỏi đĩa ngay sau khi trả về,
+    để lần chạy sau tính lại thay vì dùng lại kết quả lỗi.
+    """
+    if func is None:
+        return lambda f: disk_cache(f, cache_if=cache_if, **kwargs)
+    if _memory is None:
+        return func
+    cached = _memory.cache(func, **kwargs)
     
-    # Khởi tạo engine với cấu hình mặc định
-    engine = AnalysisEngine()
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        if os.environ.get(NO_CACHE_ENV):
+            return func(*args, **kw)
+        result = cached(*args, **kw)
+        if cache_if is not None and not cache_if(result):
+            # Kết quả đã nằm trong cache nên call_and_shelve không tính lại
+            cached.call_and_shelve(*args, **kw).clear()
+        return result
+    return wrapper
+
+def _has_data(result):
+    """Chỉ cache kết quả phân tích có dữ liệu và không lỗi"""
+    return bool(result.data_info.get('total_rows')) and not result.data_info.get('error')
+
+# Khoảng dữ liệu dài nhất mà các ví dụ dùng; các ví dụ ngắn hơn cắt từ đây
+_HISTORY_DAYS = 180
+
+@functools.lru_cache(maxsize=8)
+def _load_history(symbol, end_iso):
+    """Tải dữ liệu giá _HISTORY_DAYS ngày kết thúc tại end_iso, một lần cho mỗi mã
+    
+    Không được sửa DataFrame trả về vì nó dùng chung giữa các lần gọi.
+    """
+    start_date = date.fromisoformat(end_iso) - timedelta(days=_HISTORY_DAYS)
+    return load_stock_data(symbol=symbol, start_date=start_date.isoformat(), end_date=end_iso)
+
+def _history(symbol, start_date, end_date):
+    """Dữ liệu giá trong [start_date, end_date], cắt từ bản đã tải"""
+    df = _load_history(symbol, end_date.isoformat())
+    return df[df.index >= pd.Timestamp(start_date, tz='UTC')]
+
+# Kết quả phân tích theo (mã, thời gian, cấu hình); repr của dataclass cấu hình
+# chứa đủ mọi tham số nên dùng làm khóa được
+_results = {}
+
+@disk_cache(ignore=['config'], cache_if=_has_data)
+def _analyze_on_disk(symbol, start_iso, end_iso, config_repr, config):
+    """Phân tích một cấu hình; kết quả cache trên đĩa theo (mã, thời gian, repr cấu hình)"""
+    engine = AnalysisEngine(config)
+    try:
+        df = _history(symbol, date.fromisoformat(start_iso), date.fromisoformat(end_iso))
+    except Exception:
+        # Để engine tự tải và báo lỗi như bình thường
+        return engine.analyze_symbol(symbol, start_iso, end_iso)
+    return engine.analyze_frame(df, symbol)
+
+def _analyze(config, symbol, start_date, end_date):
+    """Phân tích có memo, dùng chung dữ liệu đã tải thay vì truy vấn lại DB"""
+    key = (symbol, start_date, end_date, repr(config))
+    if key not in _results:
+        _results[key] = _analyze_on_disk(
+            symbol, start_date.isoformat(), end_date.isoformat(), key[3], config
+        )
+    return _results[key]
+
+def _strong_signals(signals):
+    """Tách tín hiệu mua mạnh và bán mạnh trong một lần duyệt danh sách"""
+    strong_buy, strong_sell = [], []
+    append = {
+        ("MUA", "RẤT MẠNH"): strong_buy.append,
+        ("BÁN", "RẤT MẠNH"): strong_sell.append,
+    }
+    for s in signals:
+        fn = append.get((s.action.value, s.strength.value))
+        if fn:
+            fn(s)
+    return strong_buy, strong_sell
+
+def analyze_single_symbol(run_now):
+    """Phân tích một mã cổ phiếu với cấu hình mặc định"""
     
     # Phân tích mã PDR
     symbol = "PDR"
-    end_date = datetime.now().date()
+    end_date = run_now.date()
     start_date = end_date - timedelta(days=180)  # 6 tháng gần đây
     
     print(f"=== Phân tích {symbol} ===")
     print(f"Thời gian: {start_date} đến {end_date}")
     
-    # Chạy phân tích
-    result = engine.analyze_symbol(
-        symbol=symbol,
-        start_date=start_date.isoformat(),
-        end_date=end_date.isoformat()
-    )
+    # Chạy phân tích với cấu hình mặc định
+    result = _analyze(AnalysisConfig(), symbol, start_date, end_date)
     
     # Hiển thị kết quả
     print(f"\nKết quả phân tích:")
@@ -61,7 +153,7 @@ def analyze_single_symbol():
     
     return result
 
-def analyze_with_custom_config():
+def analyze_with_custom_config(run_now):
     """Phân tích với cấu hình tùy chỉnh"""
     
     # Tạo cấu hình tùy chỉnh
@@ -89,22 +181,15 @@ def analyze_with_custom_config():
         lookback_days=90            # Thời gian ngắn hơn
     )
     
-    # Khởi tạo engine với cấu hình tùy chỉnh
-    engine = AnalysisEngine(config)
-    
     # Phân tích
     symbol = "PDR"
-    end_date = datetime.now().date()
+    end_date = run_now.date()
     start_date = end_date - timedelta(days=90)
     
     print(f"\n=== Phân tích {symbol} với cấu hình tùy chỉnh ===")
     print(f"Thời gian: {start_date} đến {end_date}")
     
-    result = engine.analyze_symbol(
-        symbol=symbol,
-        start_date=start_date.isoformat(),
-        end_date=end_date.isoformat()
-    )
+    result = _analyze(config, symbol, start_date, end_date)
     
     # Hiển thị kết quả
     print(f"\nKết quả phân tích:")
@@ -112,23 +197,15 @@ def analyze_with_custom_config():
     print(f"- Số tín hiệu: {len(result.signals)}")
     
     if result.signals:
-        # Tín hiệu mua mạnh
-        strong_buy_signals = [
-            s for s in result.signals 
-            if s.action.value == "MUA" and s.strength.value == "RẤT MẠNH"
-        ]
+        strong_buy_signals, strong_sell_signals = _strong_signals(result.signals)
         
+        # Tín hiệu mua mạnh
         print(f"\nTín hiệu mua mạnh: {len(strong_buy_signals)}")
         for signal in strong_buy_signals[-3:]:  # 3 tín hiệu gần nhất
             print(f"- {signal.timestamp.date()}: {signal.score:.2f} điểm")
             print(f"  {signal.description}")
         
         # Tín hiệu bán mạnh
-        strong_sell_signals = [
-            s for s in result.signals 
-            if s.action.value == "BÁN" and s.strength.value == "RẤT MẠNH"
-        ]
-        
         print(f"\nTín hiệu bán mạnh: {len(strong_sell_signals)}")
         for signal in strong_sell_signals[-3:]:  # 3 tín hiệu gần nhất
             print(f"- {signal.timestamp.date()}: {signal.score:.2f} điểm")
@@ -136,11 +213,11 @@ def analyze_with_custom_config():
     
     return result
 
-def compare_configurations():
+def compare_configurations(run_now):
     """So sánh kết quả với các cấu hình khác nhau"""
     
     symbol = "PDR"
-    end_date = datetime.now().date()
+    end_date = run_now.date()
     start_date = end_date - timedelta(days=120)
     
     # Cấu hình 1: Nhạy cảm
@@ -165,23 +242,27 @@ def compare_configurations():
     print(f"\n=== So sánh cấu hình cho {symbol} ===")
     print(f"Thời gian: {start_date} đến {end_date}")
     
-    results = []
     configs = [
         ("Nhạy cảm", config1),
         ("Bảo thủ", config2),
         ("Cân bằng", config3)
     ]
     
-    for name, config in configs:
-        engine = AnalysisEngine(config)
-        result = engine.analyze_symbol(
-            symbol=symbol,
-            start_date=start_date.isoformat(),
-            end_date=end_date.isoformat()
+    # Tải dữ liệu trước ở luồng chính, sau đó các cấu hình chỉ đọc chung một DataFrame.
+    # Phần tính toán chủ yếu nằm trong NumPy/pandas (nhả GIL) nên chạy bằng thread được
+    try:
+        _history(symbol, start_date, end_date)
+    except Exception:
+        pass  # _analyze tự quay về engine.analyze_symbol và báo lỗi cho từng cấu hình
+    
+    with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+        analyzed = executor.map(
+            lambda item: _analyze(item[1], symbol, start_date, end_date),
+            configs
         )
-        
-        results.append((name, result))
-        
+        results = [(name, result) for (name, _), result in zip(configs, analyzed)]
+    
+    for name, result in results:
         print(f"\n{name}:")
         print(f"- Tín hiệu: {len(result.signals)}")
         if result.signals:
@@ -193,97 +274,96 @@ def compare_configurations():
     # So sánh tín hiệu mua mạnh
     print(f"\n=== Tín hiệu mua mạnh ===")
     for name, result in results:
-        strong_buy = [
-            s for s in result.signals 
-            if s.action.value == "MUA" and s.strength.value == "RẤT MẠNH"
-        ]
+        # Lọc trên bảng cột (signals_df) thay vì duyệt từng đối tượng tín hiệu
+        df = result.signals_df
+        strong_buy = df[(df.action == "MUA") & (df.strength == "RẤT MẠNH")]
         print(f"{name}: {len(strong_buy)} tín hiệu")
         
-        if strong_buy:
-            latest = strong_buy[-1]
+        if not strong_buy.empty:
+            latest = strong_buy.iloc[-1]
             print(f"  Gần nhất: {latest.timestamp.date()} ({latest.score:.2f} điểm)")
     
     return results
 
-def analyze_with_database():
+def analyze_with_database(run_now):
     """Phân tích với lưu trữ database"""
     
-    try:
-        from analytis.analysis_engine_db import DatabaseIntegratedAnalysisEngine
-        import asyncio
+    if DatabaseIntegratedAnalysisEngine is None:
+        print("Database engine không khả dụng, sử dụng engine thường")
+        return analyze_single_symbol(run_now)
+    
+    async def run_analysis():
+        # Khởi tạo engine tích hợp database
+        engine = DatabaseIntegratedAnalysisEngine()
         
-        async def run_analysis():
-            # Khởi tạo engine tích hợp database
-            engine = DatabaseIntegratedAnalysisEngine()
-            
-            # Phân tích
-            symbol = "PDR"
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=90)
-            
-            print(f"\n=== Phân tích {symbol} với database ===")
-            print(f"Thời gian: {start_date} đến {end_date}")
-            
-            result = await engine.analyze_symbol(
-                symbol=symbol,
-                start_date=start_date.isoformat(),
-                end_date=end_date.isoformat()
-            )
-            
-            # Hiển thị thông tin database
-            print(f"\nThông tin database:")
-            print(f"- Analysis Result ID: {result.analysis_result_id}")
-            print(f"- Indicator Config ID: {result.indicator_config_id}")
-            print(f"- Scoring Config ID: {result.scoring_config_id}")
-            print(f"- Analysis Config ID: {result.analysis_config_id}")
-            
-            # Lấy lịch sử phân tích
-            history = await engine.get_analysis_history(symbol, limit=5)
-            print(f"\nLịch sử phân tích: {len(history)} bản ghi")
-            for h in history:
-                print(f"- {h['analysis_date']}: {h['total_signals']} tín hiệu")
-            
-            # Lấy lịch sử tín hiệu
-            signal_history = await engine.get_signal_history(symbol, limit=10)
-            print(f"\nLịch sử tín hiệu: {len(signal_history)} bản ghi")
-            for s in signal_history[:5]:
-                print(f"- {s['signal_date']}: {s['action']} {s['strength']} ({s['score']:.2f})")
-            
-            # Thống kê database
-            stats = await engine.get_database_stats()
-            print(f"\nThống kê database:")
-            print(f"- Configurations: {stats.get('configurations', {})}")
-            print(f"- Indicator Calculations: {stats.get('indicator_calculations', {}).get('total_calculations', 0)}")
-            print(f"- Analysis Results: {stats.get('analysis_results', {}).get('total_analyses', 0)}")
-            print(f"- Signals: {stats.get('signals', {}).get('total_signals', 0)}")
-            
-            return result
+        # Phân tích
+        symbol = "PDR"
+        end_date = run_now.date()
+        start_date = end_date - timedelta(days=90)
         
-        # Chạy phân tích async
-        result = asyncio.run(run_analysis())
-        return result
+        print(f"\n=== Phân tích {symbol} với database ===")
+        print(f"Thời gian: {start_date} đến {end_date}")
         
-    except ImportError:
-        print("Database engine không khả dụng, sử dụng engine thường")
-        return analyze_single_symbol()
+        result = await engine.analyze_symbol(
+            symbol=symbol,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat()
+        )
+        
+        # Hiển thị thông tin database
+        print(f"\nThông tin database:")
+        print(f"- Analysis Result ID: {result.analysis_result_id}")
+        print(f"- Indicator Config ID: {result.indicator_config_id}")
+        print(f"- Scoring Config ID: {result.scoring_config_id}")
+        print(f"- Analysis Config ID: {result.analysis_config_id}")
+        
+        # Lấy lịch sử phân tích
+        history = await engine.get_analysis_history(symbol, limit=5)
+        print(f"\nLịch sử phân tích: {len(history)} bản ghi")
+        for h in history:
+            print(f"- {h['analysis_date']}: {h['total_signals']} tín hiệu")
+        
+        # Lấy lịch sử tín hiệu
+        signal_history = await engine.get_signal_history(symbol, limit=10)
+        print(f"\nLịch sử tín hiệu: {len(signal_history)} bản ghi")
+        for s in signal_history[:5]:
+            print(f"- {s['signal_date']}: {s['action']} {s['strength']} ({s['score']:.2f})")
+        
+        # Thống kê database
+        stats = await engine.get_database_stats()
+        print(f"\nThống kê database:")
+        print(f"- Configurations: {stats.get('configurations', {})}")
+        print(f"- Indicator Calculations: {stats.get('indicator_calculations', {}).get('total_calculations', 0)}")
+        print(f"- Analysis Results: {stats.get('analysis_results', {}).get('total_analyses', 0)}")
+        print(f"- Signals: {stats.get('signals', {}).get('total_signals', 0)}")
+        
+        return result
+    
+    # Chạy phân tích async
+    result = asyncio.run(run_analysis())
+    return result
 
 def main():
     """Hàm chính"""
     
     print("=== Ví dụ phân tích một mã cổ phiếu ===")
     
+    # Mốc thời gian chung cho cả lần chạy: các ví dụ dùng cùng khoảng ngày
+    # nên lịch sử đã tải và kết quả đã nhớ (_results) được dùng lại
+    run_now = datetime.now()
+    
     try:
         # 1. Phân tích cơ bản
-        result1 = analyze_single_symbol()
+        result1 = analyze_single_symbol(run_now)
         
         # 2. Phân tích với cấu hình tùy chỉnh
-        result2 = analyze_with_custom_config()
+        result2 = analyze_with_custom_config(run_now)
         
         # 3. So sánh cấu hình
-        results = compare_configurations()
+        results = compare_configurations(run_now)
         
         # 4. Phân tích với database (nếu có)
-        result3 = analyze_with_database()
+        result3 = analyze_with_database(run_now)
         
         print("\n=== Hoàn thành ===")
         print("Tất cả ví dụ đã chạy thành công!")
@@ -294,4 +374,13 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ví dụ phân tích một mã cổ phiếu")
+    parser.add_argument("--no-cache", action="store_true", help="Không dùng kết quả đã cache trên đĩa")
+    args = parser.parse_args()
+    
+    if args.no_cache:
+        os.environ[NO_CACHE_ENV] = "1"
+    
     main()
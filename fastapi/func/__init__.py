@@ -12,16 +12,21 @@ Author: StockAI Team
 Version: 1.0.0
 """
 
-from .stock_data_fetcher import fetch_stock_data, StockDataFetcher
-from .normalize_foreign_data import normalize_foreign_data
-from .vn100_fetcher import (
-    get_vn100_symbols, 
-    get_vn100_dataframe, 
-    save_vn100_csv, 
-    get_vn100_by_sector, 
-    get_vn100_top_n,
-    VN100Fetcher
-)
+import importlib
+
+# Các hàm/class được import lười (PEP 562): module con chỉ được nạp khi truy cập
+# lần đầu, nên import package không kéo theo pandas/requests nếu chưa cần
+_LAZY = {
+    "fetch_stock_data": "stock_data_fetcher",
+    "StockDataFetcher": "stock_data_fetcher",
+    "normalize_foreign_data": "normalize_foreign_data",
+    "get_vn100_symbols": "vn100_fetcher",
+    "get_vn100_dataframe": "vn100_fetcher",
+    "save_vn100_csv": "vn100_fetcher",
+    "get_vn100_by_sector": "vn100_fetcher",
+    "get_vn100_top_n": "vn100_fetcher",
+    "VN100Fetcher": "vn100_fetcher",
+}
 
 __version__ = "1.0.0"
 __author__ = "StockAI Team"
@@ -36,3 +41,15 @@ __all__ = [
     "get_vn100_top_n",
     "VN100Fetcher"
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value  # lần sau không qua __getattr__ nữa
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from analytis.engines.indicator_engine import _obv_loop, _obv_numpy, _rsi_loop
+
+PERIOD = 14
+
+
+def _random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 25_000 + np.cumsum(rng.normal(0, 250, n)).round(-1)
+    volume = rng.integers(10_000, 1_000_000, n).astype(np.float64)
+    return close, volume
+
+
+def _pandas_rsi(close, period):
+    delta = pd.Series(close).diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return (100 - (100 / (1 + gain / loss))).to_numpy()
+
+
+def test_rsi_loop_matches_pandas():
+    close, _ = _random_walk(2_000)
+    np.testing.assert_allclose(
+        _rsi_loop(close, PERIOD), _pandas_rsi(close, PERIOD), rtol=1e-9, atol=1e-9
+    )
+
+
+def test_rsi_loop_flat_window_after_moves():
+    # Moves followed by a flat stretch: the running sums must return to
+    # exactly zero so the flat windows give NaN like pandas
+    close, _ = _random_walk(200, seed=1)
+    close = np.concatenate([close, np.full(3 * PERIOD, close[-1])])
+    rsi = _rsi_loop(close, PERIOD)
+    assert np.isnan(rsi[-1])
+    np.testing.assert_allclose(rsi, _pandas_rsi(close, PERIOD), rtol=1e-9, atol=1e-9)
+
+
+def test_obv_loop_matches_numpy():
+    close, volume = _random_walk(2_000)
+    np.testing.assert_allclose(_obv_loop(close, volume), _obv_numpy(close, volume))